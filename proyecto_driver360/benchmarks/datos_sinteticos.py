@@ -0,0 +1,336 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+#Los módulos del motor están en scripts/, igual que cuando se ejecutan los scripts de anonimización
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from dialectos import DialectoMysql, DialectoPostgres
+from planificador import leer_plan
+
+### DATOS SINTÉTICOS PARA LOS BENCHMARKS ###
+#Crea las tablas cor_* del plan (scripts/tablas.csv) con una clave "id" (más "rev_ver" en las tablas _aud, con varias
+#revisiones por id) y las columnas del plan, y las llena con datos personales inventados pero con el formato real
+#(DNI con letra, IBAN, matrículas, IPv4, direcciones...). Con la misma semilla se generan siempre los mismos datos,
+#así cada estrategia se mide sobre la misma tabla
+
+RUTA_PLAN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "tablas.csv")
+#Tablas que se crean por defecto: una de cada forma de plan (columnas sueltas, bloques de dirección, emails e IPs,
+#tabla ancha con muchas operaciones) y sus variantes _aud
+TABLAS_POR_DEFECTO = ["cor_users", "cor_users_aud", "cor_addresses", "cor_addresses_aud", "cor_phones", "cor_phones_aud",
+                      "cor_assignment_contracts"]
+FILAS_POR_CARGA = 50000 #Filas generadas y cargadas (con un commit) de cada vez
+REVISIONES_AUD = 3 #Revisiones por id en las tablas _aud
+PROPORCION_NULOS = 0.05 #En las columnas opcionales (segundo apellido, datos adicionales, piso, escalera...)
+SEMILLA = 360
+
+#Tipos de columna por dialecto
+TIPOS = {
+    "postgres": {"clave": "bigint", "revision": "integer", "texto": "varchar(255)", "largo": "text", "fecha": "date",
+                 "decimal": "double precision", "momento": "timestamp"},
+    "mysql": {"clave": "bigint", "revision": "int", "texto": "varchar(255)", "largo": "text", "fecha": "date",
+              "decimal": "double", "momento": "datetime"},
+}
+ANALIZAR = {"postgres": "ANALYZE {tabla}", "mysql": "ANALYZE TABLE {tabla}"}
+DIALECTOS = {"postgres": DialectoPostgres, "mysql": DialectoMysql}
+
+NOMBRES = ["Antonio", "Manuel", "José", "Francisco", "David", "Juan", "Javier", "Daniel", "Carlos", "Alejandro", "Miguel",
+           "Rafael", "Pablo", "Sergio", "Jorge", "Alberto", "María", "Carmen", "Ana", "Laura", "Isabel", "Lucía", "Cristina",
+           "Marta", "Elena", "Sara", "Paula", "Raquel", "Rocío", "Pilar", "Nuria", "Silvia", "Begoña", "Iñaki", "Núria", "Xabier"]
+APELLIDOS = ["García", "Rodríguez", "González", "Fernández", "López", "Martínez", "Sánchez", "Pérez", "Gómez", "Martín",
+             "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Muñoz", "Álvarez", "Romero", "Alonso", "Gutiérrez", "Navarro",
+             "Torres", "Domínguez", "Vázquez", "Ramos", "Gil", "Ramírez", "Serrano", "Blanco", "Molina", "Castro", "Ortiz"]
+CALLES = ["Calle Mayor", "Avenida de la Constitución", "Calle Real", "Plaza de España", "Calle del Sol", "Paseo de Gracia",
+          "Calle Alcalá", "Gran Vía", "Avenida de Andalucía", "Calle San Juan", "Ronda de Valencia", "Camino Viejo",
+          "Calle de la Iglesia", "Travesía del Carmen", "Calle Nueva", "Avenida del Puerto"]
+PROVINCIAS = ["Madrid", "Barcelona", "Valencia", "Sevilla", "Málaga", "Zaragoza", "Murcia", "Alicante", "Bizkaia", "A Coruña",
+              "Asturias", "Cádiz", "Granada", "Navarra", "Toledo", "Valladolid"]
+MUNICIPIOS = ["Alcobendas", "Getafe", "Badalona", "Sabadell", "Gandia", "Dos Hermanas", "Marbella", "Calatayud", "Lorca",
+              "Elche", "Getxo", "Santiago de Compostela", "Gijón", "Jerez de la Frontera", "Motril", "Tudela", "Talavera",
+              "Medina del Campo"]
+DOMINIOS = ["gmail.com", "hotmail.com", "yahoo.es", "outlook.com", "telefonica.net", "taller-ejemplo.es", "icloud.com"]
+PAISES = ["ES", "ES", "ES", "ES", "PT", "FR", "AD"]
+BICS = ["CAIXESBBXXX", "BSCHESMMXXX", "BBVAESMMXXX", "CAGLESMMXXX", "BSABESBBXXX", "UCJAES2MXXX"]
+SOCIEDADES = ["S.L.", "S.A.", "S.L.U.", "S.Coop."]
+LETRAS_DNI = "TRWAGMYFPDXBNJZSQVHLCKE"
+LETRAS_MATRICULA = np.array(list("BCDFGHJKLMNPRSTVWXYZ"), dtype=object)
+CARACTERES_VIN = np.array(list("ABCDEFGHJKLMNPRSTUVWXYZ0123456789"), dtype=object)
+
+
+### GENERADORES DE VALORES ###
+#Cada generador recibe el generador aleatorio y el número de filas y devuelve una lista de valores de Python
+
+def elegir(rng, valores, n):
+    return np.array(valores, dtype=object)[rng.integers(len(valores), size=n)]
+
+
+def cifras(rng, n, digitos):
+    #Cadenas de exactamente "digitos" cifras
+    return [f"{valor:0{digitos}d}" for valor in rng.integers(0, 10 ** min(digitos, 18), size=n).tolist()]
+
+
+def nombres(rng, n):
+    return elegir(rng, NOMBRES, n).tolist()
+
+
+def apellidos(rng, n):
+    return elegir(rng, APELLIDOS, n).tolist()
+
+
+def emails(rng, n):
+    sin_tildes = str.maketrans("áéíóúÁÉÍÓÚñÑüç", "aeiouAEIOUnNuc")
+    return [f"{nombre}.{apellido}{numero}@{dominio}".lower().translate(sin_tildes)
+            for nombre, apellido, numero, dominio in zip(elegir(rng, NOMBRES, n).tolist(), elegir(rng, APELLIDOS, n).tolist(),
+                                                         rng.integers(1, 1000, size=n).tolist(), elegir(rng, DOMINIOS, n).tolist())]
+
+
+def claves_hex(rng, n, digitos):
+    return [f"{alto:016x}{bajo:016x}"[:digitos] for alto, bajo in rng.integers(0, 2**63, size=(n, 2)).tolist()]
+
+
+def ips(rng, n):
+    octetos = rng.integers(0, 256, size=(n, 4)).tolist()
+    return [".".join(map(str, grupo)) for grupo in octetos]
+
+
+def telefonos(rng, n):
+    return [f"+34 {numero}" for numero in rng.integers(600000000, 750000000, size=n).tolist()]
+
+
+def documentos(rng, n):
+    #DNI con su letra de control
+    return [f"{numero:08d}{LETRAS_DNI[numero % 23]}" for numero in rng.integers(0, 10**8, size=n).tolist()]
+
+
+def fechas_nacimiento(rng, n):
+    inicio = date(1940, 1, 1).toordinal()
+    return [date.fromordinal(dia) for dia in rng.integers(inicio, date(2005, 12, 31).toordinal(), size=n).tolist()]
+
+
+def calles(rng, n):
+    return elegir(rng, CALLES, n).tolist()
+
+
+def direcciones(rng, n):
+    return [f"{calle} {numero}, {codigo} {municipio}" for calle, numero, codigo, municipio in
+            zip(calles(rng, n), rng.integers(1, 300, size=n).tolist(), codigos_postales(rng, n), elegir(rng, MUNICIPIOS, n).tolist())]
+
+
+def numeros_portal(rng, n):
+    return [str(numero) for numero in rng.integers(1, 300, size=n).tolist()]
+
+
+def pisos(rng, n):
+    return [f"{piso}º{letra}" for piso, letra in zip(rng.integers(1, 12, size=n).tolist(), elegir(rng, list("ABCD"), n).tolist())]
+
+
+def escaleras(rng, n):
+    return elegir(rng, ["A", "B", "C", "Izq", "Dcha"], n).tolist()
+
+
+def bloques(rng, n):
+    return [str(numero) for numero in rng.integers(1, 10, size=n).tolist()]
+
+
+def codigos_postales(rng, n):
+    return [f"{codigo:05d}" for codigo in rng.integers(1000, 52999, size=n).tolist()]
+
+
+def matriculas(rng, n):
+    letras = LETRAS_MATRICULA[rng.integers(len(LETRAS_MATRICULA), size=(n, 3))].sum(axis=1).tolist()
+    return [f"{numero:04d} {letra}" for numero, letra in zip(rng.integers(0, 10000, size=n).tolist(), letras)]
+
+
+def bastidores(rng, n):
+    return CARACTERES_VIN[rng.integers(len(CARACTERES_VIN), size=(n, 17))].sum(axis=1).tolist()
+
+
+def ibans(rng, n):
+    return [f"ES{control:02d}{cuenta}" for control, cuenta in zip(rng.integers(0, 100, size=n).tolist(), cifras(rng, n, 20))]
+
+
+def titulares(rng, n):
+    return [f"{nombre} {apellido}".upper() for nombre, apellido in zip(nombres(rng, n), apellidos(rng, n))]
+
+
+def empresas(rng, n):
+    return [f"{apellido} {municipio} {sociedad}" for apellido, municipio, sociedad in
+            zip(apellidos(rng, n), elegir(rng, MUNICIPIOS, n).tolist(), elegir(rng, SOCIEDADES, n).tolist())]
+
+
+def registros_mercantiles(rng, n):
+    return [f"Registro Mercantil de {provincia}, tomo {tomo}, folio {folio}" for provincia, tomo, folio in
+            zip(elegir(rng, PROVINCIAS, n).tolist(), rng.integers(1000, 40000, size=n).tolist(), rng.integers(1, 220, size=n).tolist())]
+
+
+def mensajes(rng, n):
+    return [f"Hola {nombre}, su vehículo {matricula} ya está listo. Para cualquier consulta llame al {telefono}."
+            for nombre, matricula, telefono in zip(nombres(rng, n), matriculas(rng, n), telefonos(rng, n))]
+
+
+def latitudes(rng, n):
+    return np.round(rng.uniform(36.0, 43.8, size=n), 6).tolist()
+
+
+def longitudes(rng, n):
+    return np.round(rng.uniform(-9.3, 3.3, size=n), 6).tolist()
+
+
+def textos(rng, n):
+    return [f"dato {valor}" for valor in rng.integers(0, 10**9, size=n).tolist()]
+
+
+#(condición sobre tabla y columna, tipo, generador), en orden: se usa la primera que se cumple
+COLUMNAS = [
+    (lambda tabla, col: col in ("latitude",), "decimal", latitudes),
+    (lambda tabla, col: col in ("longitude",), "decimal", longitudes),
+    (lambda tabla, col: "birth" in col, "fecha", fechas_nacimiento),
+    (lambda tabla, col: "email" in col, "texto", emails),
+    (lambda tabla, col: col == "password", "texto", lambda rng, n: claves_hex(rng, n, 20)),
+    (lambda tabla, col: col == "access_key", "texto", lambda rng, n: claves_hex(rng, n, 32)),
+    (lambda tabla, col: col == "ip", "texto", ips),
+    (lambda tabla, col: "phone" in col or ("phone" in tabla and col == "number"), "texto", telefonos),
+    (lambda tabla, col: col.endswith("id_country") or col.endswith("document_country"), "texto", lambda rng, n: elegir(rng, PAISES, n).tolist()),
+    (lambda tabla, col: "document" in col, "texto", documentos),
+    (lambda tabla, col: col == "social_security_number", "texto", lambda rng, n: cifras(rng, n, 12)),
+    (lambda tabla, col: col == "insurance_policy_number", "texto", lambda rng, n: [f"POL-{c}" for c in cifras(rng, n, 10)]),
+    (lambda tabla, col: col == "iban", "texto", ibans),
+    (lambda tabla, col: col == "bic", "texto", lambda rng, n: elegir(rng, BICS, n).tolist()),
+    (lambda tabla, col: col == "fuc", "texto", lambda rng, n: cifras(rng, n, 9)),
+    (lambda tabla, col: col == "trade_register", "texto", registros_mercantiles),
+    (lambda tabla, col: col == "vehicle_plate", "texto", matriculas),
+    (lambda tabla, col: col == "vehicle_vin", "texto", bastidores),
+    (lambda tabla, col: col == "headline", "texto", titulares),
+    (lambda tabla, col: col == "message", "largo", mensajes),
+    (lambda tabla, col: col in ("company_address", "company_center_address"), "texto", direcciones),
+    (lambda tabla, col: col.endswith("street_name"), "texto", calles),
+    (lambda tabla, col: col.endswith("postal_code"), "texto", codigos_postales),
+    (lambda tabla, col: col.endswith("council"), "texto", lambda rng, n: elegir(rng, MUNICIPIOS, n).tolist()),
+    (lambda tabla, col: col.endswith("province"), "texto", lambda rng, n: elegir(rng, PROVINCIAS, n).tolist()),
+    (lambda tabla, col: col.endswith("apartment"), "texto", pisos),
+    (lambda tabla, col: col.endswith("stair"), "texto", escaleras),
+    (lambda tabla, col: col.endswith("block"), "texto", bloques),
+    (lambda tabla, col: col.endswith("number") or col.endswith("number1"), "texto", numeros_portal),
+    (lambda tabla, col: col == "name" and "compan" in tabla, "texto", empresas),
+    (lambda tabla, col: col.endswith("name"), "texto", nombres),
+    (lambda tabla, col: "surname" in col, "texto", apellidos),
+]
+
+
+def columna_opcional(columna):
+    return (columna.startswith("additional_") or "second_surname" in columna or columna.endswith(("apartment", "stair", "block"))
+            or columna.endswith(("number2", "number3")))
+
+
+def tipo_y_generador(tabla, columna):
+    for condicion, tipo, generador in COLUMNAS:
+        if condicion(tabla, columna):
+            return tipo, generador
+    return "texto", textos
+
+
+def columnas_tabla(plan, tabla):
+    #Columnas del plan en el orden en que aparecen (una columna puede estar en varias operaciones)
+    columnas = []
+    for _, columnas_operacion in plan[tabla]:
+        columnas += [col for col in columnas_operacion if col not in columnas]
+    return columnas
+
+
+def sentencia_crear_tabla(motor, plan, tabla):
+    tipos = TIPOS[motor]
+    definiciones = [f"id {tipos['clave']} NOT NULL"]
+    clave = ["id"]
+    if tabla.endswith("_aud"):
+        definiciones.append(f"rev_ver {tipos['revision']} NOT NULL")
+        clave.append("rev_ver")
+    definiciones += [f"{col} {tipos[tipo_y_generador(tabla, col)[0]]}" for col in columnas_tabla(plan, tabla)]
+    #Columnas que no se anonimizan, para que las filas tengan un ancho realista
+    definiciones += [f"created_at {tipos['momento']}", f"status {tipos['texto']}"]
+    definiciones.append(f"PRIMARY KEY ({', '.join(clave)})")
+    return f"CREATE TABLE {tabla} ({', '.join(definiciones)})"
+
+
+def crear_tabla(motor, cursor, plan, tabla):
+    cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+    cursor.execute(sentencia_crear_tabla(motor, plan, tabla))
+    #Un índice secundario sobre la primera columna que se reordena, para que SUSPENDER_INDICES tenga trabajo
+    reordenadas = [col for operacion, columnas in plan[tabla] if operacion != "eliminar_columnas" for col in columnas]
+    if reordenadas:
+        #Los nombres de índice están limitados a 63 caracteres en PostgreSQL y 64 en MySQL
+        cursor.execute(f"CREATE INDEX {f'ix_{tabla}_{reordenadas[0]}'[:60]} ON {tabla} ({reordenadas[0]})")
+
+
+def generar_filas(plan, tabla, inicio, n, rng):
+    #Filas [inicio, inicio + n) de la tabla: id (y rev_ver) seguidos de las columnas del plan y las de relleno
+    posiciones = np.arange(inicio, inicio + n)
+    if tabla.endswith("_aud"):
+        columnas = [(posiciones // REVISIONES_AUD + 1).tolist(), (posiciones % REVISIONES_AUD + 1).tolist()]
+    else:
+        columnas = [(posiciones + 1).tolist()]
+    for col in columnas_tabla(plan, tabla):
+        valores = tipo_y_generador(tabla, col)[1](rng, n)
+        if columna_opcional(col):
+            for posicion in np.flatnonzero(rng.random(n) < PROPORCION_NULOS).tolist():
+                valores[posicion] = None
+        columnas.append(valores)
+    momento = datetime(2015, 1, 1).timestamp()
+    columnas.append([datetime.fromtimestamp(segundos) for segundos in (momento + rng.integers(0, 3e8, size=n)).tolist()])
+    columnas.append(elegir(rng, ["activo", "baja", "pendiente"], n).tolist())
+    return list(zip(*columnas))
+
+
+def nombres_columnas(plan, tabla):
+    return (["id", "rev_ver"] if tabla.endswith("_aud") else ["id"]) + columnas_tabla(plan, tabla) + ["created_at", "status"]
+
+
+def llenar_tabla(motor, dialecto, conn, cursor, plan, tabla, filas, semilla=SEMILLA):
+    #Cada tabla tiene su propio generador: sus datos no dependen de qué otras tablas se generen
+    rng = np.random.default_rng([semilla, sum(map(ord, tabla))])
+    columnas = nombres_columnas(plan, tabla)
+    for inicio in range(0, filas, FILAS_POR_CARGA):
+        lote = generar_filas(plan, tabla, inicio, min(FILAS_POR_CARGA, filas - inicio), rng)
+        dialecto.cargar_filas(cursor, tabla, columnas, lote)
+        conn.commit()
+    cursor.execute(ANALIZAR[motor].format(tabla=tabla))
+    if motor == "mysql":
+        cursor.fetchall()
+    conn.commit()
+
+
+def preparar_tablas(motor, tablas, filas, ruta_plan=RUTA_PLAN, semilla=SEMILLA, informar=True):
+    #Crea y llena las tablas indicadas con "filas" filas cada una
+    plan = leer_plan(ruta_plan)
+    desconocidas = [tabla for tabla in tablas if tabla not in plan]
+    if desconocidas:
+        raise ValueError(f"Tablas que no están en {ruta_plan}: {', '.join(desconocidas)}")
+    dialecto = DIALECTOS[motor]()
+    conn, cursor = dialecto.conectar()
+    try:
+        for tabla in tablas:
+            inicio = time.perf_counter()
+            crear_tabla(motor, cursor, plan, tabla)
+            conn.commit()
+            llenar_tabla(motor, dialecto, conn, cursor, plan, tabla, filas, semilla)
+            if informar:
+                print(f"{tabla}: {filas} filas generadas en {time.perf_counter() - inicio:.1f} s", flush=True)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea y llena las tablas cor_* con datos personales sintéticos")
+    parser.add_argument("motor", choices=sorted(DIALECTOS))
+    parser.add_argument("--filas", type=float, default=1e4, help="filas por tabla (admite notación 1e6)")
+    parser.add_argument("--tablas", nargs="+", default=TABLAS_POR_DEFECTO)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    argumentos = parser.parse_args()
+    preparar_tablas(argumentos.motor, argumentos.tablas, int(argumentos.filas), semilla=argumentos.semilla)
+
+
+if __name__ == "__main__":
+    main()
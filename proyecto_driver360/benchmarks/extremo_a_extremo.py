@@ -0,0 +1,158 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from datos_sinteticos import DIALECTOS, RUTA_PLAN, SEMILLA, TABLAS_POR_DEFECTO, preparar_tablas
+
+### BENCHMARK DE EXTREMO A EXTREMO ###
+#Para cada escala y estrategia regenera las tablas sintéticas (con la misma semilla) y ejecuta el script de
+#anonimización del motor en un proceso aparte, con su propio directorio de trabajo (log, diario y métricas).
+#Mide el tiempo total, las filas por segundo, la memoria residente máxima del script y de sus procesos hijos y los
+#bytes de registro de transacciones escritos por el servidor (WAL en PostgreSQL, redo log de InnoDB en MySQL).
+#Cada ejecución se anota como una línea JSON en el fichero de resultados
+
+DIRECTORIO_SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = {"postgres": "anonimizacion_postgres.py", "mysql": "anonimizacion_mysql.py"}
+
+#Variables de entorno del motor (macros de motor.py) de cada estrategia. Las no indicadas toman su valor por defecto
+ESTRATEGIAS = {
+    "copy": {},
+    "fila": {"MODO_ESCRITURA": "fila"},
+    "sql": {"MODO_EJECUCION": "sql"},
+    "fusionada": {"FUSIONAR_OPERACIONES": "1"},
+    "reescritura": {"REESCRIBIR_TABLAS": "1"},
+    "sin_indices": {"SUSPENDER_INDICES": "1"},
+    "paralela": {"NUM_PROCESOS": "4"},
+    "rangos": {"NUM_RANGOS": "4", "FILAS_MINIMAS_RANGOS": "0"},
+    "global": {"ALCANCE_REORDENACION": "global"},
+    "canalizada": {"CANALIZAR_PAGINAS": "1"},
+    "asyncio": {},
+}
+#Argumentos de línea de comandos del script de anonimización de cada estrategia
+ARGUMENTOS_ESTRATEGIAS = {"asyncio": ["--motor", "asyncio"]}
+
+
+def bytes_registro(motor, cursor):
+    #Posición actual del registro de transacciones del servidor, en bytes desde un origen fijo
+    if motor == "postgres":
+        cursor.execute("SELECT pg_current_wal_lsn() - '0/0'::pg_lsn")
+        return int(cursor.fetchone()[0])
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_os_log_written'")
+    return int(cursor.fetchone()[1])
+
+
+def preparar_servidor(motor, conn, cursor):
+    #En PostgreSQL un CHECKPOINT antes de cada ejecución hace comparables los bytes de WAL: tras un checkpoint la
+    #primera modificación de cada página escribe la página entera en el WAL
+    if motor == "postgres":
+        conn.autocommit = True
+        cursor.execute("CHECKPOINT")
+        conn.autocommit = False
+
+
+def escribir_plan(ruta, tablas):
+    #Copia de tablas.csv con solo las tablas del benchmark, que el motor lee en RUTA_TABLAS_ANONIMIZABLES
+    with open(RUTA_PLAN, newline="") as origen, open(ruta, "w", newline="") as destino:
+        lector = csv.DictReader(origen)
+        escritor = csv.DictWriter(destino, fieldnames=lector.fieldnames)
+        escritor.writeheader()
+        escritor.writerows(fila for fila in lector if fila["tabla"] in tablas)
+
+
+def ejecutar_script(motor, argumentos, entorno, directorio):
+    #Lanza el script de anonimización y espera con wait4 para obtener su uso de recursos. ru_maxrss (KiB en Linux)
+    #es el máximo entre el script y los procesos hijos que ha esperado (los procesos paralelos)
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, os.path.join(DIRECTORIO_SCRIPTS, SCRIPTS[motor])] + argumentos,
+                               cwd=directorio, env=entorno)
+    _, estado, uso = os.wait4(proceso.pid, 0)
+    proceso.returncode = os.waitstatus_to_exitcode(estado)
+    return time.perf_counter() - inicio, proceso.returncode, uso.ru_maxrss * 1024
+
+
+def errores_log(directorio):
+    ruta = os.path.join(directorio, "logs.txt")
+    if not os.path.exists(ruta):
+        return 0
+    with open(ruta, encoding="utf-8") as f:
+        return sum(1 for linea in f if linea.startswith("Error"))
+
+
+def ejecutar_estrategia(motor, estrategia, filas, tablas, directorio_ejecucion, semilla):
+    directorio = os.path.join(directorio_ejecucion, f"{estrategia}_{filas}")
+    os.makedirs(directorio, exist_ok=True)
+    ruta_plan = os.path.join(directorio, "tablas.csv")
+    escribir_plan(ruta_plan, tablas)
+    preparar_tablas(motor, tablas, filas, semilla=semilla, informar=False)
+
+    entorno = dict(os.environ, RUTA_TABLAS_ANONIMIZABLES=ruta_plan, **ESTRATEGIAS[estrategia])
+    conn, cursor = DIALECTOS[motor]().conectar()
+    try:
+        preparar_servidor(motor, conn, cursor)
+        registro_inicial = bytes_registro(motor, cursor)
+        conn.commit()
+        segundos, codigo, memoria = ejecutar_script(motor, ARGUMENTOS_ESTRATEGIAS.get(estrategia, []), entorno, directorio)
+        registro_final = bytes_registro(motor, cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+    filas_totales = filas * len(tablas)
+    return {
+        "momento": datetime.now().isoformat(timespec="seconds"),
+        "motor": motor,
+        "estrategia": estrategia,
+        "entorno": ESTRATEGIAS[estrategia],
+        "argumentos": ARGUMENTOS_ESTRATEGIAS.get(estrategia, []),
+        "filas_por_tabla": filas,
+        "tablas": tablas,
+        "segundos": round(segundos, 3),
+        "filas_por_segundo": round(filas_totales / segundos, 1),
+        "memoria_maxima_bytes": memoria,
+        "bytes_registro": registro_final - registro_inicial,
+        "codigo_salida": codigo,
+        "errores": errores_log(directorio),
+        #Con todas las tablas terminadas el motor archiva el diario
+        "completa": codigo == 0 and not os.path.exists(os.path.join(directorio, "diario.jsonl")),
+        "directorio": directorio,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo de las estrategias de anonimización")
+    parser.add_argument("motor", choices=sorted(SCRIPTS))
+    parser.add_argument("--escalas", nargs="+", type=float, default=[1e4, 1e5], help="filas por tabla (admite notación 1e6)")
+    parser.add_argument("--estrategias", nargs="+", choices=list(ESTRATEGIAS), default=list(ESTRATEGIAS))
+    parser.add_argument("--tablas", nargs="+", default=TABLAS_POR_DEFECTO)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--salida", default=os.path.join(DIRECTORIO_BENCHMARKS, "resultados.jsonl"))
+    parser.add_argument("--forzar", action="store_true", help="permite una base de datos cuyo nombre no contenga 'bench'")
+    argumentos = parser.parse_args()
+
+    #Las tablas del benchmark se borran y se vuelven a crear: nunca sobre una base de datos con datos reales
+    base_datos = os.environ.get("DB_NAME", "")
+    if "bench" not in base_datos and not argumentos.forzar:
+        parser.error(f"DB_NAME='{base_datos}': use una base de datos de pruebas con 'bench' en el nombre o --forzar")
+
+    directorio_ejecucion = os.path.join(DIRECTORIO_BENCHMARKS, "ejecuciones", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    print(f"{'estrategia':<12} {'filas':>10} {'segundos':>10} {'filas/s':>12} {'RSS MB':>8} {'registro MB':>12}  estado", flush=True)
+    for escala in argumentos.escalas:
+        for estrategia in argumentos.estrategias:
+            resultado = ejecutar_estrategia(argumentos.motor, estrategia, int(escala), argumentos.tablas, directorio_ejecucion,
+                                            argumentos.semilla)
+            with open(argumentos.salida, "a", encoding="utf-8") as f:
+                f.write(json.dumps(resultado) + "\n")
+            estado = "ok" if resultado["completa"] and not resultado["errores"] else f"revisar {resultado['directorio']}"
+            print(f"{estrategia:<12} {resultado['filas_por_tabla']:>10} {resultado['segundos']:>10.2f} "
+                  f"{resultado['filas_por_segundo']:>12.0f} {resultado['memoria_maxima_bytes'] / 2**20:>8.0f} "
+                  f"{resultado['bytes_registro'] / 2**20:>12.1f}  {estado}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime
+
+import numpy as np
+
+from datos_sinteticos import RUTA_PLAN, columnas_tabla, tipo_y_generador
+
+#Los módulos del motor están en scripts/ (datos_sinteticos ya lo ha añadido a la ruta)
+from dialectos import texto_copy_columnas, valor_copy
+from motor import anonimizar_pagina
+from planificador import leer_plan
+from transformaciones import (columnas_de_filas, reordenar_locales_email, reordenar_octetos_ipv4, reordenar_pagina_bloque,
+                              reordenar_pagina_columnas, transformar_pagina)
+
+### MICROBENCHMARKS DE LOS NÚCLEOS DE TRANSFORMACIÓN ###
+#Mide, sin base de datos, las partes de CPU de cada página: los mismos núcleos que usa el motor aplicados a páginas
+#generadas en memoria con los datos sintéticos de datos_sinteticos.py. Cada caso es una tabla y una operación del
+#plan, con las filas tal como las devuelve el driver (clave seguida de las columnas leídas).
+#Con --copy cada caso incluye también el texto de COPY que el escritor de PostgreSQL forma con la página.
+#Con --referencia se compara con otro fichero de resultados y se avisa de los casos más lentos que la tolerancia
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+SEMILLA = 360
+TOLERANCIA = 0.2 #Un caso es una regresión si su mejor tiempo supera en más de un 20 % al de la referencia
+
+#caso -> (tabla, operación del plan). Las columnas salen de tablas.csv
+CASOS = {
+    "columna_en_bloques": ("cor_assignment_contracts", "reordenar_columna_en_bloques"),
+    "columna_en_bloques_listas": ("cor_assignment_contracts", "reordenar_columna_en_bloques"),
+    "bloques_columna_en_bloques": ("cor_invoice_reparation_orders", "reordenar_bloques_columna_en_bloques"),
+    "antes_arroba": ("cor_users", "reordenar_antes_arroba"),
+    "grupos_ip": ("cor_users", "reordenar_grupos_ip"),
+    "fusionada": ("cor_users", None),
+}
+
+
+def generar_pagina(tabla, columnas, filas, semilla=SEMILLA):
+    #Filas (id, columnas...) con los generadores de datos sintéticos de cada columna
+    rng = np.random.default_rng(semilla)
+    valores = [list(range(1, filas + 1))] + [tipo_y_generador(tabla, col)[1](rng, filas) for col in columnas]
+    return list(zip(*valores))
+
+
+def reordenar_pagina_listas(filas, total_columnas, columnas_clave, columnas):
+    #El núcleo de reordenar_columna_en_bloques anterior a los de NumPy, como referencia de columna_en_bloques: cada
+    #fila pasa a una lista, cada columna se baraja con random.shuffle y se vuelven a formar las tuplas a escribir
+    nuevas_filas = [list(fila) for fila in filas]
+    for nombre_columna in columnas:
+        idx_col = total_columnas.index(nombre_columna)
+        valores_a_randomizar = [fila[idx_col] for fila in nuevas_filas]
+        random.shuffle(valores_a_randomizar)
+        for i, fila in enumerate(nuevas_filas):
+            fila[idx_col] = valores_a_randomizar[i]
+    indices_clave = [total_columnas.index(col) for col in columnas_clave]
+    indices_columnas = [total_columnas.index(col) for col in columnas]
+    return [tuple(fila[i] for i in indices_clave) + tuple(fila[i] for i in indices_columnas) for fila in nuevas_filas]
+
+
+def texto_copy_filas(filas):
+    #Texto de COPY fila a fila, como lo formaba el escritor antes de recibir la página por columnas
+    return "".join("\t".join(valor_copy(valor) for valor in fila) + "\n" for fila in filas)
+
+
+def preparar_caso(caso, filas, copy=False):
+    #Devuelve una función sin argumentos que procesa una página del caso (y forma su texto de COPY, con copy)
+    tabla, operacion = CASOS[caso]
+    plan = leer_plan(RUTA_PLAN)
+    if operacion is None:
+        #Todas las operaciones de la tabla sobre la misma página, como en FUSIONAR_OPERACIONES
+        operaciones = [(op, columnas) for op, columnas in plan[tabla] if op != "eliminar_columnas"]
+        columnas = columnas_tabla(plan, tabla)
+        pagina = generar_pagina(tabla, columnas, filas)
+
+        def procesar():
+            valores = dict(zip(["id"] + columnas, columnas_de_filas(pagina, range(len(columnas) + 1))))
+            anonimizar_pagina(valores, operaciones, ["id"], {})
+            if copy:
+                texto_copy_columnas(list(valores.values()))
+        return procesar
+
+    columnas = next(columnas for op, columnas in plan[tabla] if op == operacion)
+    pagina = generar_pagina(tabla, columnas, filas)
+    if caso == "columna_en_bloques_listas":
+        escribir = texto_copy_filas if copy else lambda filas_a_escribir: None
+        return lambda: escribir(reordenar_pagina_listas(pagina, ["id"] + columnas, ["id"], columnas))
+    escribir = texto_copy_columnas if copy else lambda columnas_a_escribir: None
+    if operacion == "reordenar_columna_en_bloques":
+        return lambda: escribir(reordenar_pagina_columnas(pagina, 1))
+    if operacion == "reordenar_bloques_columna_en_bloques":
+        return lambda: escribir(reordenar_pagina_bloque(pagina, 1))
+    transformar = reordenar_locales_email if operacion == "reordenar_antes_arroba" else reordenar_octetos_ipv4
+    return lambda: escribir(transformar_pagina(pagina, 1, transformar)[0])
+
+
+def medir(caso, filas, repeticiones, copy=False):
+    procesar = preparar_caso(caso, filas, copy)
+    tiempos = timeit.repeat(procesar, number=1, repeat=repeticiones)
+    return {
+        "momento": datetime.now().isoformat(timespec="seconds"),
+        "caso": caso,
+        "filas": filas,
+        "copy": copy,
+        "repeticiones": repeticiones,
+        "mejor_segundos": round(min(tiempos), 6),
+        "mediana_segundos": round(statistics.median(tiempos), 6),
+        "filas_por_segundo": round(filas / min(tiempos), 1),
+    }
+
+
+def leer_referencia(ruta):
+    #Último resultado de cada (caso, filas) del fichero de referencia
+    referencia = {}
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                resultado = json.loads(linea)
+                referencia[(resultado["caso"], resultado["filas"], resultado.get("copy", False))] = resultado
+    return referencia
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de los núcleos de transformación, sin base de datos")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=list(CASOS))
+    parser.add_argument("--filas", type=float, default=1e5, help="filas por página (admite notación 1e6)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--copy", action="store_true", help="incluir el texto de COPY de la página")
+    parser.add_argument("--salida", default=os.path.join(DIRECTORIO_BENCHMARKS, "resultados_micro.jsonl"))
+    parser.add_argument("--referencia", help="fichero de resultados con el que comparar")
+    argumentos = parser.parse_args()
+
+    referencia = leer_referencia(argumentos.referencia) if argumentos.referencia else {}
+    regresiones = []
+    print(f"{'caso':<28} {'filas':>9} {'mejor s':>9} {'mediana s':>10} {'filas/s':>12}  referencia", flush=True)
+    for caso in argumentos.casos:
+        resultado = medir(caso, int(argumentos.filas), argumentos.repeticiones, argumentos.copy)
+        with open(argumentos.salida, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resultado) + "\n")
+        comparacion = ""
+        anterior = referencia.get((caso, resultado["filas"], argumentos.copy))
+        if anterior:
+            cociente = resultado["mejor_segundos"] / anterior["mejor_segundos"]
+            comparacion = f"x{cociente:.2f}"
+            if cociente > 1 + TOLERANCIA:
+                comparacion += " REGRESIÓN"
+                regresiones.append(caso)
+        print(f"{caso:<28} {resultado['filas']:>9} {resultado['mejor_segundos']:>9.4f} {resultado['mediana_segundos']:>10.4f} "
+              f"{resultado['filas_por_segundo']:>12.0f}  {comparacion}", flush=True)
+
+    if regresiones:
+        sys.exit(f"Regresiones respecto a {argumentos.referencia}: {', '.join(regresiones)}")
+
+
+if __name__ == "__main__":
+    main()
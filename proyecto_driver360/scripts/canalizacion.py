@@ -0,0 +1,97 @@
+import os
+import queue
+import threading
+
+### CANALIZACIÓN DE PÁGINAS ###
+#Solapa la lectura, la transformación y la escritura de páginas consecutivas. Un hilo lector recorre las páginas
+#(con su propia conexión, abierta dentro del generador de páginas) y otro las transforma, mientras el hilo que llama
+#escribe y confirma cada página en orden. Las etapas se unen con colas de PROFUNDIDAD_CANALIZACION páginas: si la
+#escritura se retrasa, la lectura se detiene al llenarse las colas y la memoria queda acotada a unas pocas páginas.
+#La escritura (y con ella el diario) va siempre en el hilo que llama, así que solo avanza con páginas confirmadas
+
+PROFUNDIDAD_CANALIZACION = int(os.environ.get("PROFUNDIDAD_CANALIZACION", 2)) #Páginas máximas en cada cola
+ESPERA_COLA = 0.1 #Segundos entre comprobaciones de parada mientras una etapa espera en una cola
+
+FIN = object() #Marca el final de las páginas en una cola
+
+
+class ErrorEtapa:
+    #Excepción de una etapa, que se pasa por la cola para relanzarla en el hilo que escribe
+    def __init__(self, excepcion):
+        self.excepcion = excepcion
+
+
+def poner(cola, elemento, parar):
+    #put bloqueante que se abandona si las demás etapas han parado. Devuelve si se ha puesto
+    while not parar.is_set():
+        try:
+            cola.put(elemento, timeout=ESPERA_COLA)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def sacar(cola, parar):
+    #get bloqueante que se abandona si las demás etapas han parado
+    while not parar.is_set():
+        try:
+            return cola.get(timeout=ESPERA_COLA)
+        except queue.Empty:
+            pass
+    return FIN
+
+
+def etapa_lectora(paginas, salida, parar):
+    #paginas: generador de (tiempos, filas). Se cierra al terminar para que libere su conexión
+    try:
+        for pagina in paginas:
+            if not poner(salida, pagina, parar):
+                return
+        poner(salida, FIN, parar)
+    except Exception as e:
+        poner(salida, ErrorEtapa(e), parar)
+    finally:
+        paginas.close()
+
+
+def etapa_transformadora(entrada, salida, transformar, parar):
+    try:
+        while True:
+            pagina = sacar(entrada, parar)
+            if pagina is FIN or isinstance(pagina, ErrorEtapa):
+                poner(salida, pagina, parar)
+                return
+            tiempos, filas = pagina
+            if not poner(salida, (tiempos, filas, transformar(tiempos, filas)), parar):
+                return
+    except Exception as e:
+        poner(salida, ErrorEtapa(e), parar)
+
+
+def canalizar_paginas(paginas, transformar, escribir, profundidad=PROFUNDIDAD_CANALIZACION):
+    #Lee con paginas en un hilo, aplica transformar(tiempos, filas) en otro y llama a escribir(tiempos, filas,
+    #transformadas) en este hilo, página a página y en el orden de lectura. Un error en cualquier etapa detiene las
+    #demás y se relanza aquí, después de la última página escrita
+    leidas = queue.Queue(maxsize=profundidad)
+    transformadas = queue.Queue(maxsize=profundidad)
+    parar = threading.Event()
+    hilos = [
+        threading.Thread(target=etapa_lectora, args=(paginas, leidas, parar), name="lector", daemon=True),
+        threading.Thread(target=etapa_transformadora, args=(leidas, transformadas, transformar, parar), name="transformador",
+                         daemon=True),
+    ]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        while True:
+            pagina = transformadas.get()
+            if pagina is FIN:
+                break
+            if isinstance(pagina, ErrorEtapa):
+                raise pagina.excepcion
+            escribir(*pagina)
+    finally:
+        parar.set()
+        for hilo in hilos:
+            hilo.join()
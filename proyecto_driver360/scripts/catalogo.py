@@ -0,0 +1,54 @@
+### INSTANTÁNEA DEL CATÁLOGO ###
+#Al arrancar se leen de una vez, con unas pocas consultas al catálogo del dialecto, los datos de todas las tablas del
+#plan: columnas con su tipo y si admiten NULL, claves primarias y únicas, índices, triggers y filas y tamaño
+#estimados. Las operaciones consultan esta instantánea en lugar de preguntar al catálogo cada vez. Los procesos
+#paralelos la heredan del proceso principal; cada proceso la actualiza cuando elimina columnas.
+#Una tabla que no estaba en la instantánea (p. ej. la tabla nueva de una reescritura) se lee al pedirla
+
+#tabla -> {"columnas": [..], "tipos": {col: tipo}, "nulas": {col, ..}, "primaria": [..] o None,
+#          "unicas": [[..], ..], "indices": {nombre: [columnas]}, "triggers": [..], "filas": n, "tamano": bytes}
+CATALOGO = {}
+
+
+def tabla_vacia():
+    return {"columnas": [], "tipos": {}, "nulas": set(), "primaria": None, "unicas": [], "indices": {}, "triggers": [],
+            "filas": 0, "tamano": 0}
+
+
+def cargar_catalogo(dialecto, cursor, tablas):
+    #Sustituye la instantánea de las tablas indicadas. Las que no existen quedan sin columnas
+    instantanea = {tabla: tabla_vacia() for tabla in tablas}
+    dialecto.leer_catalogo(cursor, instantanea)
+    CATALOGO.update(instantanea)
+    return instantanea
+
+
+def tabla_catalogo(dialecto, cursor, tabla):
+    if tabla not in CATALOGO:
+        cargar_catalogo(dialecto, cursor, [tabla])
+    return CATALOGO[tabla]
+
+
+def clave_tabla(entrada):
+    #Clave de fila: la clave primaria o, si no hay, la clave única más corta con todas sus columnas NOT NULL.
+    #None si la tabla no tiene ninguna
+    if entrada["primaria"]:
+        return list(entrada["primaria"])
+    candidatas = [unica for unica in entrada["unicas"] if not set(unica) & entrada["nulas"]]
+    return list(min(candidatas, key=len)) if candidatas else None
+
+
+def quitar_columnas(tabla, columnas):
+    #Tras un DROP COLUMN: PostgreSQL y MySQL borran también los índices y las claves que usaban la columna
+    entrada = CATALOGO.get(tabla)
+    if entrada is None:
+        return
+    eliminadas = set(columnas)
+    entrada["columnas"] = [col for col in entrada["columnas"] if col not in eliminadas]
+    for col in eliminadas:
+        entrada["tipos"].pop(col, None)
+        entrada["nulas"].discard(col)
+    if entrada["primaria"] and set(entrada["primaria"]) & eliminadas:
+        entrada["primaria"] = None
+    entrada["unicas"] = [unica for unica in entrada["unicas"] if not set(unica) & eliminadas]
+    entrada["indices"] = {nombre: cols for nombre, cols in entrada["indices"].items() if not set(cols) & eliminadas}
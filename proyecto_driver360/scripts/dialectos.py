@@ -0,0 +1,821 @@
+import io
+import json
+import os
+
+from transformaciones import filas_de_columnas
+
+### DIALECTOS DE BASE DE DATOS ###
+#El motor (motor.py) es común a PostgreSQL y MySQL. Cada dialecto aporta solo lo que cambia entre ambos:
+#conexión, consultas al catálogo, lectura en streaming, carga masiva de páginas y el SQL de la permutación en el servidor
+
+FILAS_POR_INSERT = 1000 #Filas por cada INSERT multifila de la carga masiva en MySQL (limitado por max_allowed_packet)
+ESPECIALES_COPY = ("\\", "\t", "\n", "\r") #Caracteres que hay que escapar en el formato texto de COPY
+
+
+def valor_copy(valor):
+    #Serializa un valor al formato texto de COPY (NULL como \N y escapando los caracteres especiales)
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, (dict, list)):
+        valor = json.dumps(valor)
+    elif isinstance(valor, (bytes, bytearray, memoryview)):
+        valor = "\\x" + bytes(valor).hex()
+    else:
+        valor = str(valor)
+    return valor.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def columna_copy(valores):
+    #Serializa una columna entera (lista de valores) al formato texto de COPY, con el mismo resultado que valor_copy.
+    #Una columna de textos se escapa de una vez: se une con "\x00" (que no puede aparecer en un texto de PostgreSQL),
+    #se hacen los reemplazos sobre el texto completo y se vuelve a separar. Los demás tipos que valor_copy pasa a texto
+    #con str (números, fechas...) se convierten con str y se escapan igual. Los NULL se ponen después por posición
+    try:
+        return escapar_textos(valores)
+    except TypeError:
+        pass #Hay valores que no son texto
+    tipos = set(map(type, valores))
+    if any(issubclass(tipo, (dict, list, bytes, bytearray, memoryview)) for tipo in tipos):
+        return list(map(valor_copy, valores))
+    if type(None) not in tipos:
+        return escapar_textos(list(map(str, valores)))
+    escapados = escapar_textos(["" if valor is None else str(valor) for valor in valores])
+    for i in [i for i, valor in enumerate(valores) if valor is None]:
+        escapados[i] = "\\N"
+    return escapados
+
+
+def escapar_textos(textos):
+    #Escapa una lista de textos para COPY con una sola pasada de reemplazos. TypeError si algún valor no es texto.
+    #Si ningún texto tiene caracteres especiales (lo normal) se devuelve la misma lista, sin reemplazar ni separar
+    unidos = "\x00".join(textos)
+    if not any(caracter in unidos for caracter in ESPECIALES_COPY):
+        return textos
+    escapados = unidos.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r").split("\x00")
+    if len(escapados) != len(textos):
+        #Algún texto contiene "\x00": cada valor se escapa por separado
+        return list(map(valor_copy, textos))
+    return escapados
+
+
+def texto_copy_columnas(columnas):
+    #Texto de COPY de una página por columnas (arrays de objetos de la misma longitud, ver transformaciones.py):
+    #cada columna se serializa entera y las filas se forman al unir los textos, sin pasar por tuplas de valores
+    serializadas = [columna_copy(columna.tolist()) for columna in columnas]
+    if not serializadas or not serializadas[0]:
+        return ""
+    return "\n".join(map("\t".join, zip(*serializadas))) + "\n"
+
+
+def condicion_where(condiciones):
+    return "WHERE " + " AND ".join(condiciones) if condiciones else ""
+
+
+class DialectoPostgres:
+    nombre = "postgres"
+
+    def conectar(self):
+        import psycopg2
+        try:
+            conn = psycopg2.connect(
+                host=os.environ.get("DB_HOST", "localhost"),
+                user=os.environ.get("DB_USER", "postgres"),
+                password=os.environ.get("DB_PASSWORD", "1234"),
+                dbname=os.environ.get("DB_NAME", "demo_driver360_copia"),
+                port=int(os.environ.get("DB_PORT", 5432))
+            )
+            cursor = conn.cursor()
+            return conn, cursor
+        except psycopg2.Error as error:
+            print(f"Error de conexión: {error}", flush=True)
+            return None, None
+
+    async def conectar_asincrono(self):
+        #Conexión de psycopg 3 para el motor asyncio (motor_asincrono.py). En autocommit: cada página abre y cierra su
+        #propia transacción dentro del pipeline
+        import psycopg
+        return await psycopg.AsyncConnection.connect(
+            host=os.environ.get("DB_HOST", "localhost"),
+            user=os.environ.get("DB_USER", "postgres"),
+            password=os.environ.get("DB_PASSWORD", "1234"),
+            dbname=os.environ.get("DB_NAME", "demo_driver360_copia"),
+            port=int(os.environ.get("DB_PORT", 5432)),
+            autocommit=True
+        )
+
+    def obtener_columnas(self, cursor, tabla_origen):
+        #Solo la tabla que resuelve el search_path, no las homónimas de otros esquemas
+        cursor.execute("""
+            SELECT attname
+            FROM pg_attribute
+            WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+            ORDER BY attnum;
+        """, (tabla_origen, ))
+        return [fila[0] for fila in cursor.fetchall()]
+
+    def leer_catalogo(self, cursor, instantanea):
+        #Rellena la instantánea del catálogo (catalogo.py) de todas las tablas con una consulta por tipo de dato.
+        #Cada nombre se resuelve con to_regclass, es decir, en el search_path de la conexión como el resto de consultas.
+        #Los tipos incluyen su modificador (p. ej. varchar(255)) para poder usarlos en casts
+        tablas = list(instantanea)
+        cursor.execute("""
+            SELECT t.tabla, a.attname, format_type(a.atttypid, a.atttypmod), NOT a.attnotnull
+            FROM unnest(%s::text[]) AS t(tabla)
+            JOIN pg_attribute a ON a.attrelid = to_regclass(t.tabla)
+            WHERE a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY t.tabla, a.attnum;
+        """, (tablas, ))
+        for tabla, columna, tipo, nula in cursor.fetchall():
+            entrada = instantanea[tabla]
+            entrada["columnas"].append(columna)
+            entrada["tipos"][columna] = tipo
+            if nula:
+                entrada["nulas"].add(columna)
+        #Índices con sus columnas en orden. Los de expresiones o parciales no sirven como clave de fila
+        cursor.execute("""
+            SELECT t.tabla, c.relname, i.indisprimary, i.indisunique AND i.indexprs IS NULL AND i.indpred IS NULL,
+                   ARRAY(SELECT a.attname::text FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, n)
+                         JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum ORDER BY k.n)
+            FROM unnest(%s::text[]) AS t(tabla)
+            JOIN pg_index i ON i.indrelid = to_regclass(t.tabla)
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indisvalid
+            ORDER BY t.tabla, c.relname;
+        """, (tablas, ))
+        for tabla, nombre, primaria, unica, columnas in cursor.fetchall():
+            entrada = instantanea[tabla]
+            entrada["indices"][nombre] = columnas
+            if primaria:
+                entrada["primaria"] = columnas
+            elif unica:
+                entrada["unicas"].append(columnas)
+        cursor.execute("""
+            SELECT t.tabla, g.tgname
+            FROM unnest(%s::text[]) AS t(tabla)
+            JOIN pg_trigger g ON g.tgrelid = to_regclass(t.tabla)
+            WHERE NOT g.tgisinternal
+            ORDER BY t.tabla, g.tgname;
+        """, (tablas, ))
+        for tabla, nombre in cursor.fetchall():
+            instantanea[tabla]["triggers"].append(nombre)
+        for tabla, (filas, tamano) in self.obtener_estimaciones_tablas(cursor, tablas).items():
+            instantanea[tabla].update({"filas": filas, "tamano": tamano})
+
+    def obtener_estimaciones_tablas(self, cursor, tablas):
+        #Filas estimadas (pg_class.reltuples) y tamaño en disco (tabla + índices + TOAST) de cada tabla, 0 si no existe
+        cursor.execute("""
+            SELECT tabla, GREATEST(COALESCE(c.reltuples, 0), 0)::bigint, COALESCE(pg_total_relation_size(c.oid), 0)
+            FROM unnest(%s::text[]) AS tabla
+            LEFT JOIN pg_class c ON c.oid = to_regclass(tabla);
+        """, (list(tablas), ))
+        return {tabla: (filas, tamano) for tabla, filas, tamano in cursor.fetchall()}
+
+    def obtener_claves_foraneas(self, cursor):
+        #Pares (tabla, tabla_referenciada) de las claves foráneas existentes en la base de datos
+        cursor.execute("""
+            SELECT conrelid::regclass::text, confrelid::regclass::text
+            FROM pg_constraint
+            WHERE contype = 'f';
+        """)
+        return set(cursor.fetchall())
+
+    def limites_muestra(self, cursor, tabla_origen, columna_id, fracciones, porcentaje):
+        #Cuantiles de la columna sobre una muestra por bloques (TABLESAMPLE) del porcentaje indicado de la tabla
+        cursor.execute(f"""
+            SELECT percentile_disc(%s::float8[]) WITHIN GROUP (ORDER BY {columna_id})
+            FROM {tabla_origen} TABLESAMPLE SYSTEM (%s);
+        """, (fracciones, porcentaje))
+        return cursor.fetchone()[0] or []
+
+    def leer_en_lotes(self, conn, nombre, consulta, parametros, tam_lote):
+        #Cursor de servidor (con nombre) en una conexión propia, como en MySQL: los commits de los lotes en la conexión
+        #principal no lo cierran. No se usa WITH HOLD, que al primer commit materializaría en el servidor el resultado
+        #entero (la tabla completa, en memoria o en ficheros temporales) antes de enviar el primer lote
+        conn_lectura, _ = self.conectar()
+        if conn_lectura is None:
+            raise RuntimeError("no se pudo abrir la conexión de lectura")
+        try:
+            cursor_servidor = conn_lectura.cursor(name=nombre)
+            cursor_servidor.itersize = tam_lote
+            cursor_servidor.execute(consulta, parametros)
+            while True:
+                filas = cursor_servidor.fetchmany(tam_lote)
+                if not filas:
+                    break
+                yield filas
+        finally:
+            conn_lectura.close()
+
+    def cargar_filas(self, cursor, tabla, columnas, filas):
+        #Inserta las filas con un único COPY en formato texto
+        buffer = io.StringIO()
+        for fila in filas:
+            buffer.write("\t".join(valor_copy(valor) for valor in fila))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN", buffer)
+
+    def cargar_columnas(self, cursor, tabla, columnas, valores):
+        #Como cargar_filas, con la página por columnas (un array por columna)
+        cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN", io.StringIO(texto_copy_columnas(valores)))
+
+    def aplicar_pagina(self, cursor, tabla_origen, columnas_clave, columnas, valores):
+        #Vuelca la página (por columnas: clave seguida de las columnas) a una tabla temporal con COPY y la aplica con
+        #un único UPDATE ... FROM unido por la clave
+        tabla_temporal = f"tmp_{tabla_origen}"
+        columnas_tmp = ", ".join(list(columnas_clave) + list(columnas))
+
+        #La tabla temporal copia los tipos de la original y desaparece con el commit de la página
+        cursor.execute(f"""
+            CREATE TEMP TABLE {tabla_temporal} ON COMMIT DROP AS
+            SELECT {columnas_tmp} FROM {tabla_origen} WITH NO DATA;
+        """)
+
+        self.cargar_columnas(cursor, tabla_temporal, list(columnas_clave) + list(columnas), valores)
+        cursor.execute(f"ANALYZE {tabla_temporal};")
+
+        set_clause = ", ".join([f"{col} = tmp.{col}" for col in columnas])
+        where_clause = " AND ".join([f"t.{col} = tmp.{col}" for col in columnas_clave])
+        cursor.execute(f"""
+            UPDATE {tabla_origen} AS t
+            SET {set_clause}
+            FROM {tabla_temporal} AS tmp
+            WHERE {where_clause};
+        """)
+
+    def bloques_tabla(self, cursor, tabla_origen):
+        #Bloques del heap de la tabla según su tamaño actual en disco
+        cursor.execute("SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::bigint;", (tabla_origen, ))
+        return cursor.fetchone()[0]
+
+    def consulta_fragmento(self, tabla_origen, columnas, inicio, fin):
+        #Filas de los bloques [inicio, fin) con su ctid. Las condiciones sobre ctid se resuelven con un TID Range Scan
+        #(PostgreSQL 14 o posterior), que lee solo esos bloques en orden físico y sin ordenar
+        return f"""
+            SELECT ctid, {", ".join(columnas)} FROM {tabla_origen}
+            WHERE ctid >= %s::tid AND ctid < %s::tid;
+        """, [f"({inicio},0)", f"({fin},0)"]
+
+    def aplicar_fragmento(self, cursor, tabla_origen, columnas, valores, inicio, fin):
+        #Como aplicar_pagina, unido por ctid. La condición de rango limita la tabla a un TID Range Scan de los
+        #bloques del fragmento en lugar de recorrerla entera. Devuelve los ctid de las versiones nuevas de las filas
+        tabla_temporal = f"tmp_{tabla_origen}"
+        cursor.execute(f"""
+            CREATE TEMP TABLE {tabla_temporal} ON COMMIT DROP AS
+            SELECT ctid AS ctid_fila, {", ".join(columnas)} FROM {tabla_origen} WITH NO DATA;
+        """)
+        self.cargar_columnas(cursor, tabla_temporal, ["ctid_fila"] + list(columnas), valores)
+        cursor.execute(f"ANALYZE {tabla_temporal};")
+        set_clause = ", ".join([f"{col} = tmp.{col}" for col in columnas])
+        cursor.execute(f"""
+            UPDATE {tabla_origen} AS t
+            SET {set_clause}
+            FROM {tabla_temporal} AS tmp
+            WHERE t.ctid = tmp.ctid_fila AND t.ctid >= %s::tid AND t.ctid < %s::tid
+            RETURNING t.ctid;
+        """, (f"({inicio},0)", f"({fin},0)"))
+        return [ctid for ctid, in cursor.fetchall()]
+
+    def crear_tabla_nueva(self, cursor, tabla_origen, tabla_nueva, columnas_eliminadas):
+        #Misma estructura sin índices ni restricciones (salvo NOT NULL) y UNLOGGED, para que la carga no escriba WAL.
+        #Las columnas identity lo siguen siendo, con una secuencia propia que se ajusta en intercambiar_tabla
+        cursor.execute(f"DROP TABLE IF EXISTS {tabla_nueva};")
+        cursor.execute(f"""
+            CREATE UNLOGGED TABLE {tabla_nueva}
+            (LIKE {tabla_origen} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE INCLUDING COMMENTS);
+        """)
+        for columna in columnas_eliminadas:
+            cursor.execute(f"ALTER TABLE {tabla_nueva} DROP COLUMN {columna};")
+
+    def intercambiar_tabla(self, cursor, tabla_origen, tabla_nueva):
+        #Sustituye la tabla original por la nueva en una única transacción (la hace el llamador con commit).
+        #Se recrean las restricciones, índices, claves foráneas entrantes y triggers de la original, y las
+        #secuencias de sus columnas serial pasan a la nueva para que no se borren con la original. También se copian
+        #el dueño, los permisos de la tabla y de sus columnas, la seguridad por filas con sus políticas y la posición
+        #de las secuencias de las columnas identity, que LIKE no copia
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid),
+                   ARRAY(SELECT attname::text FROM pg_attribute WHERE attrelid = conrelid AND attnum = ANY(conkey))
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'c', 'f')
+            ORDER BY contype IN ('p', 'u', 'x') DESC, conname;
+        """, (tabla_origen, ))
+        restricciones = cursor.fetchall()
+        cursor.execute("""
+            SELECT pg_get_indexdef(i.indexrelid),
+                   ARRAY(SELECT attname::text FROM pg_attribute WHERE attrelid = i.indrelid AND attnum = ANY(i.indkey))
+            FROM pg_index i
+            WHERE i.indrelid = %s::regclass
+            AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint c
+                WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid AND c.contype IN ('p', 'u', 'x')
+            );
+        """, (tabla_origen, ))
+        indices = cursor.fetchall()
+        cursor.execute("""
+            SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE confrelid = %s::regclass AND conrelid <> confrelid AND contype = 'f';
+        """, (tabla_origen, ))
+        claves_entrantes = cursor.fetchall()
+        cursor.execute("SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal;", (tabla_origen, ))
+        triggers = [fila[0] for fila in cursor.fetchall()]
+        cursor.execute("""
+            SELECT s.oid::regclass::text, a.attname
+            FROM pg_depend d
+            JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+            JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+            WHERE d.refobjid = %s::regclass AND d.deptype = 'a';
+        """, (tabla_origen, ))
+        secuencias = cursor.fetchall()
+        columnas_nuevas = set(self.obtener_columnas(cursor, tabla_nueva))
+        #Último valor de la secuencia de cada columna identity (NULL si no se ha usado)
+        cursor.execute("""
+            SELECT attname, pg_sequence_last_value(pg_get_serial_sequence(%s, attname)::regclass)
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attidentity <> '' AND NOT attisdropped;
+        """, (tabla_origen, tabla_origen))
+        identidades = cursor.fetchall()
+        cursor.execute("""
+            SELECT relowner::regrole::text, relrowsecurity, relforcerowsecurity FROM pg_class WHERE oid = %s::regclass;
+        """, (tabla_origen, ))
+        dueno, seguridad_filas, seguridad_forzada = cursor.fetchone()
+        permisos = self.permisos_tabla(cursor, tabla_origen)
+        permisos_nueva = self.permisos_tabla(cursor, tabla_nueva)
+        cursor.execute("""
+            SELECT polname, CASE WHEN polpermissive THEN 'PERMISSIVE' ELSE 'RESTRICTIVE' END,
+                   CASE polcmd WHEN 'r' THEN 'SELECT' WHEN 'a' THEN 'INSERT' WHEN 'w' THEN 'UPDATE'
+                               WHEN 'd' THEN 'DELETE' ELSE 'ALL' END,
+                   ARRAY(SELECT CASE WHEN r = 0 THEN 'PUBLIC' ELSE r::regrole::text END FROM unnest(polroles) AS r),
+                   pg_get_expr(polqual, polrelid), pg_get_expr(polwithcheck, polrelid)
+            FROM pg_policy
+            WHERE polrelid = %s::regclass
+            ORDER BY polname;
+        """, (tabla_origen, ))
+        politicas = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {tabla_nueva} SET LOGGED;")
+        cursor.execute(f"LOCK TABLE {tabla_origen} IN ACCESS EXCLUSIVE MODE;")
+        for tabla, nombre, _ in claves_entrantes:
+            cursor.execute(f"ALTER TABLE {tabla} DROP CONSTRAINT {nombre};")
+        for secuencia, columna in secuencias:
+            if columna in columnas_nuevas:
+                cursor.execute(f"ALTER SEQUENCE {secuencia} OWNED BY {tabla_nueva}.{columna};")
+        #Sin CASCADE: si otros objetos (vistas) dependen de la tabla, el DROP falla y no se intercambia nada
+        cursor.execute(f"DROP TABLE {tabla_origen};")
+        cursor.execute(f"ALTER TABLE {tabla_nueva} RENAME TO {tabla_origen};")
+
+        #Las definiciones nombran la tabla original, que ahora es la nueva. Las de columnas eliminadas se descartan,
+        #igual que las borraría un DROP COLUMN
+        for nombre, definicion, columnas in restricciones:
+            if set(columnas) <= columnas_nuevas:
+                cursor.execute(f"ALTER TABLE {tabla_origen} ADD CONSTRAINT {nombre} {definicion};")
+        for definicion, columnas in indices:
+            if set(columnas) <= columnas_nuevas:
+                cursor.execute(definicion)
+        for definicion in triggers:
+            cursor.execute(definicion)
+        for tabla, nombre, definicion in claves_entrantes:
+            cursor.execute(f"ALTER TABLE {tabla} ADD CONSTRAINT {nombre} {definicion};")
+        for columna, ultimo_valor in identidades:
+            if columna in columnas_nuevas and ultimo_valor is not None:
+                cursor.execute("SELECT setval(pg_get_serial_sequence(%s, %s), %s);", (tabla_origen, columna, ultimo_valor))
+
+        #Permisos: la tabla nueva pasa al dueño de la original y se le quitan los que le hayan dado los privilegios
+        #por defecto de quien la creó antes de darle los de la original
+        cursor.execute(f"ALTER TABLE {tabla_origen} OWNER TO {dueno};")
+        for beneficiario in {beneficiario for _, _, beneficiario, _ in permisos_nueva}:
+            cursor.execute(f"REVOKE ALL ON {tabla_origen} FROM {beneficiario};")
+        for privilegio, columna, beneficiario, con_opcion in permisos:
+            if columna is not None and columna not in columnas_nuevas:
+                continue
+            columnas_permiso = f" ({columna})" if columna is not None else ""
+            opcion = " WITH GRANT OPTION" if con_opcion else ""
+            cursor.execute(f"GRANT {privilegio}{columnas_permiso} ON {tabla_origen} TO {beneficiario}{opcion};")
+        if seguridad_filas:
+            cursor.execute(f"ALTER TABLE {tabla_origen} ENABLE ROW LEVEL SECURITY;")
+        if seguridad_forzada:
+            cursor.execute(f"ALTER TABLE {tabla_origen} FORCE ROW LEVEL SECURITY;")
+        for nombre, tipo, orden, roles, condicion, comprobacion in politicas:
+            usando = f" USING ({condicion})" if condicion else ""
+            con_comprobacion = f" WITH CHECK ({comprobacion})" if comprobacion else ""
+            cursor.execute(f"CREATE POLICY {nombre} ON {tabla_origen} AS {tipo} FOR {orden} TO {', '.join(roles)}{usando}{con_comprobacion};")
+        cursor.execute(f"ANALYZE {tabla_origen};")
+
+    def permisos_tabla(self, cursor, tabla):
+        #Permisos concedidos sobre la tabla y sus columnas a otros roles: (privilegio, columna o None, rol, con GRANT OPTION).
+        #Los del dueño son implícitos y no se listan
+        cursor.execute("""
+            SELECT p.privilege_type, NULL::text, CASE WHEN p.grantee = 0 THEN 'PUBLIC' ELSE p.grantee::regrole::text END,
+                   p.is_grantable
+            FROM pg_class c CROSS JOIN LATERAL aclexplode(c.relacl) AS p
+            WHERE c.oid = %s::regclass AND p.grantee <> c.relowner
+            UNION ALL
+            SELECT p.privilege_type, a.attname::text, CASE WHEN p.grantee = 0 THEN 'PUBLIC' ELSE p.grantee::regrole::text END,
+                   p.is_grantable
+            FROM pg_attribute a CROSS JOIN LATERAL aclexplode(a.attacl) AS p
+            WHERE a.attrelid = %s::regclass AND NOT a.attisdropped;
+        """, (tabla, tabla))
+        return cursor.fetchall()
+
+    def obtener_indices_y_triggers(self, cursor, tabla_origen):
+        #Índices que no sostienen una restricción (PK, UNIQUE, EXCLUDE) y triggers de usuario activos. Cada índice es
+        #[nombre, sentencia de creación, columnas] y cada trigger [nombre, None] porque solo se desactiva.
+        #Se recrean con CREATE INDEX normal: toma un ShareLock, que no bloquea a otros CREATE INDEX de la misma tabla,
+        #mientras que dos CREATE INDEX CONCURRENTLY sobre una tabla se esperan entre sí y acaban en interbloqueo
+        cursor.execute("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid),
+                   ARRAY(SELECT attname::text FROM pg_attribute WHERE attrelid = i.indrelid AND attnum = ANY(i.indkey))
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass
+            AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint r
+                WHERE r.conrelid = i.indrelid AND r.conindid = i.indexrelid AND r.contype IN ('p', 'u', 'x')
+            )
+            ORDER BY c.relname;
+        """, (tabla_origen, ))
+        indices = [list(fila) for fila in cursor.fetchall()]
+        cursor.execute("""
+            SELECT tgname FROM pg_trigger
+            WHERE tgrelid = %s::regclass AND NOT tgisinternal AND tgenabled <> 'D'
+            ORDER BY tgname;
+        """, (tabla_origen, ))
+        triggers = [[fila[0], None] for fila in cursor.fetchall()]
+        return {"indices": indices, "triggers": triggers}
+
+    def sentencias_indices(self, tabla_origen, indices):
+        #Una sentencia por índice, así se construyen en paralelo (ver obtener_indices_y_triggers)
+        return [([nombre], sentencia) for nombre, sentencia, _ in indices]
+
+    def suspender_indices_y_triggers(self, cursor, tabla_origen, definiciones):
+        for nombre, _, _ in definiciones["indices"]:
+            cursor.execute(f"DROP INDEX IF EXISTS {nombre};")
+        for nombre, _ in definiciones["triggers"]:
+            cursor.execute(f"ALTER TABLE {tabla_origen} DISABLE TRIGGER {nombre};")
+
+    def reactivar_triggers(self, cursor, tabla_origen, definiciones):
+        #Los triggers que dependían de una columna eliminada ya no existen
+        cursor.execute("SELECT tgname FROM pg_trigger WHERE tgrelid = %s::regclass;", (tabla_origen, ))
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        for nombre, _ in definiciones["triggers"]:
+            if nombre in existentes:
+                cursor.execute(f"ALTER TABLE {tabla_origen} ENABLE TRIGGER {nombre};")
+
+    def preparar_construccion_indices(self, cursor, memoria_mb):
+        cursor.execute(f"SET maintenance_work_mem = '{int(memoria_mb)}MB';")
+
+    def indice_pendiente(self, cursor, tabla_origen, nombre):
+        cursor.execute("SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(%s) AND indrelid = %s::regclass;", (nombre, tabla_origen))
+        return cursor.fetchone() is None
+
+    def sentencia_permutacion(self, tabla_origen, columnas_clave, grupos, condiciones, parametros):
+        #Cada grupo de columnas se permuta conjuntamente con row_number() over (order by random()) y se aplica
+        #con un único UPDATE ... FROM unido a la página por el número de fila
+        tupla_clave = ", ".join(columnas_clave)
+        orden = ", ".join([f"{col} ASC" for col in columnas_clave])
+        columnas = [col for grupo in grupos for col in grupo]
+        permutaciones = []
+        joins = []
+        set_clause = []
+        for i, grupo in enumerate(grupos):
+            permutaciones.append(f"""perm_{i} AS (
+                SELECT {", ".join(grupo)}, row_number() OVER (ORDER BY random()) AS rn FROM pagina
+            )""")
+            joins.append(f"JOIN perm_{i} USING (rn)")
+            set_clause.extend([f"{col} = perm_{i}.{col}" for col in grupo])
+        where_clause = " AND ".join([f"t.{col} = pagina.{col}" for col in columnas_clave])
+        return f"""
+            WITH pagina AS (
+                SELECT {tupla_clave}, {", ".join(columnas)}, row_number() OVER (ORDER BY {orden}) AS rn
+                FROM {tabla_origen}
+                {condicion_where(condiciones)}
+            ),
+            {", ".join(permutaciones)}
+            UPDATE {tabla_origen} AS t
+            SET {", ".join(set_clause)}
+            FROM pagina {" ".join(joins)}
+            WHERE {where_clause};
+        """, list(parametros)
+
+
+class DialectoMysql:
+    nombre = "mysql"
+
+    def conectar(self, buffered=True):
+        import mysql.connector
+        try:
+            conn = mysql.connector.connect(
+                host=os.environ.get("DB_HOST", "localhost"),
+                user=os.environ.get("DB_USER", "root"),
+                password=os.environ.get("DB_PASSWORD", "1234"),
+                database=os.environ.get("DB_NAME", "demo_driver360_copia"),
+                port=int(os.environ.get("DB_PORT", 3306))
+            )
+            if conn.is_connected():
+                #Cursor con buffer: los resultados se leen enteros y se puede ejecutar otra consulta sin leerlos todos
+                cursor = conn.cursor(buffered=buffered)
+                return conn, cursor
+            else:
+                print("Conexión fallida", flush=True)
+                return None, None
+        except mysql.connector.Error as error:
+            print(f"Error de conexión: {error}", flush=True)
+            return None, None
+
+    def obtener_columnas(self, cursor, tabla_origen):
+        cursor.execute("""
+            SELECT COLUMN_NAME
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION;
+        """, (tabla_origen, ))
+        return [fila[0] for fila in cursor.fetchall()]
+
+    def leer_catalogo(self, cursor, instantanea):
+        #Rellena la instantánea del catálogo (catalogo.py) con una consulta a INFORMATION_SCHEMA por tipo de dato,
+        #de todo el esquema actual; las tablas que no están en el plan se descartan
+        cursor.execute("""
+            SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE = 'YES'
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME, ORDINAL_POSITION;
+        """)
+        for tabla, columna, tipo, nula in cursor.fetchall():
+            if tabla not in instantanea:
+                continue
+            entrada = instantanea[tabla]
+            entrada["columnas"].append(columna)
+            entrada["tipos"][columna] = tipo
+            if nula:
+                entrada["nulas"].add(columna)
+        #Índices con sus columnas en orden. Los funcionales (COLUMN_NAME NULL) no sirven como clave de fila
+        cursor.execute("""
+            SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX;
+        """)
+        indices = {}
+        for tabla, nombre, no_unico, columna in cursor.fetchall():
+            if tabla in instantanea:
+                indices.setdefault((tabla, nombre), (not no_unico, []))[1].append(columna)
+        for (tabla, nombre), (unico, columnas) in indices.items():
+            entrada = instantanea[tabla]
+            entrada["indices"][nombre] = [col for col in columnas if col is not None]
+            if nombre == "PRIMARY":
+                entrada["primaria"] = columnas
+            elif unico and None not in columnas:
+                entrada["unicas"].append(columnas)
+        cursor.execute("""
+            SELECT EVENT_OBJECT_TABLE, TRIGGER_NAME
+            FROM INFORMATION_SCHEMA.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE()
+            ORDER BY EVENT_OBJECT_TABLE, TRIGGER_NAME;
+        """)
+        for tabla, nombre in cursor.fetchall():
+            if tabla in instantanea:
+                instantanea[tabla]["triggers"].append(nombre)
+        for tabla, (filas, tamano) in self.obtener_estimaciones_tablas(cursor, list(instantanea)).items():
+            instantanea[tabla].update({"filas": filas, "tamano": tamano})
+
+    def obtener_estimaciones_tablas(self, cursor, tablas):
+        #Filas estimadas y tamaño en disco (datos + índices) de cada tabla según INFORMATION_SCHEMA.TABLES
+        estimaciones = {tabla: (0, 0) for tabla in tablas}
+        cursor.execute("""
+            SELECT TABLE_NAME, COALESCE(TABLE_ROWS, 0), COALESCE(DATA_LENGTH, 0) + COALESCE(INDEX_LENGTH, 0)
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE();
+        """)
+        for tabla, filas, tamano in cursor.fetchall():
+            if tabla in estimaciones:
+                estimaciones[tabla] = (int(filas), int(tamano))
+        return estimaciones
+
+    def obtener_claves_foraneas(self, cursor):
+        cursor.execute("""
+            SELECT DISTINCT TABLE_NAME, REFERENCED_TABLE_NAME
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND REFERENCED_TABLE_NAME IS NOT NULL;
+        """)
+        return set(cursor.fetchall())
+
+    def limites_muestra(self, cursor, tabla_origen, columna_id, fracciones, porcentaje):
+        #MySQL no tiene TABLESAMPLE ni percentile_disc: se muestrea con RAND() y los cuantiles se toman en Python
+        cursor.execute(f"""
+            SELECT {columna_id} FROM {tabla_origen}
+            WHERE RAND() < %s
+            ORDER BY {columna_id};
+        """, (porcentaje / 100.0, ))
+        muestra = [fila[0] for fila in cursor.fetchall()]
+        if not muestra:
+            return []
+        return [muestra[min(int(fraccion * len(muestra)), len(muestra) - 1)] for fraccion in fracciones]
+
+    def leer_en_lotes(self, conn, nombre, consulta, parametros, tam_lote):
+        #Cursor sin buffer en una conexión propia: el servidor envía las filas según se leen y los commits
+        #de los lotes en la conexión principal no interrumpen la lectura
+        conn_lectura, cursor_lectura = self.conectar(buffered=False)
+        try:
+            cursor_lectura.execute(consulta, parametros)
+            while True:
+                filas = cursor_lectura.fetchmany(tam_lote)
+                if not filas:
+                    break
+                yield filas
+        finally:
+            conn_lectura.close()
+
+    def cargar_filas(self, cursor, tabla, columnas, filas):
+        #INSERT multifila en lotes de FILAS_POR_INSERT filas
+        marcadores = "(" + ", ".join(["%s"] * len(columnas)) + ")"
+        for inicio in range(0, len(filas), FILAS_POR_INSERT):
+            lote = filas[inicio:inicio + FILAS_POR_INSERT]
+            cursor.execute(
+                f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES {', '.join([marcadores] * len(lote))};",
+                [valor for fila in lote for valor in fila]
+            )
+
+    def cargar_columnas(self, cursor, tabla, columnas, valores):
+        #Los INSERT multifila llevan los valores fila a fila
+        self.cargar_filas(cursor, tabla, columnas, filas_de_columnas(valores))
+
+    def aplicar_pagina(self, cursor, tabla_origen, columnas_clave, columnas, valores):
+        #Inserta la página (por columnas) en una tabla temporal con INSERT multifila y la aplica con un único UPDATE ... JOIN por la clave
+        tabla_temporal = f"tmp_{tabla_origen}"
+        lista_columnas = list(columnas_clave) + list(columnas)
+        columnas_tmp = ", ".join(lista_columnas)
+
+        #CREATE/DROP TEMPORARY TABLE no provocan commit implícito, así que la página sigue siendo una única transacción
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {tabla_temporal};")
+        cursor.execute(f"""
+            CREATE TEMPORARY TABLE {tabla_temporal} (INDEX ({", ".join(columnas_clave)}))
+            SELECT {columnas_tmp} FROM {tabla_origen} WHERE 1 = 0;
+        """)
+
+        self.cargar_columnas(cursor, tabla_temporal, lista_columnas, valores)
+
+        set_clause = ", ".join([f"t.{col} = tmp.{col}" for col in columnas])
+        join_clause = " AND ".join([f"t.{col} = tmp.{col}" for col in columnas_clave])
+        cursor.execute(f"""
+            UPDATE {tabla_origen} AS t
+            JOIN {tabla_temporal} AS tmp ON {join_clause}
+            SET {set_clause};
+        """)
+        cursor.execute(f"DROP TEMPORARY TABLE {tabla_temporal};")
+
+    def crear_tabla_nueva(self, cursor, tabla_origen, tabla_nueva, columnas_eliminadas):
+        #RENAME TABLE no actualiza las claves foráneas que apuntan a la tabla: quedarían apuntando a la original
+        cursor.execute("""
+            SELECT DISTINCT TABLE_NAME
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = %s AND TABLE_NAME <> %s;
+        """, (tabla_origen, tabla_origen))
+        tablas_referentes = [fila[0] for fila in cursor.fetchall()]
+        if tablas_referentes:
+            raise ValueError(f"la tabla {tabla_origen} no se puede reescribir porque la referencian claves foráneas de {', '.join(tablas_referentes)}")
+        #CREATE TABLE ... LIKE copia columnas e índices, pero no las claves foráneas
+        cursor.execute(f"DROP TABLE IF EXISTS {tabla_nueva};")
+        cursor.execute(f"CREATE TABLE {tabla_nueva} LIKE {tabla_origen};")
+        for columna in columnas_eliminadas:
+            cursor.execute(f"ALTER TABLE {tabla_nueva} DROP COLUMN {columna};")
+
+    def intercambiar_tabla(self, cursor, tabla_origen, tabla_nueva):
+        #RENAME TABLE intercambia las dos tablas de forma atómica. Después se recrean las claves foráneas
+        #y los triggers de la original, que se borran con ella
+        cursor.execute("""
+            SELECT k.CONSTRAINT_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME,
+                   r.DELETE_RULE, r.UPDATE_RULE
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+            JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS r
+                ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+            WHERE k.TABLE_SCHEMA = DATABASE() AND k.TABLE_NAME = %s AND k.REFERENCED_TABLE_NAME IS NOT NULL
+            ORDER BY k.CONSTRAINT_NAME, k.ORDINAL_POSITION;
+        """, (tabla_origen, ))
+        claves_foraneas = {}
+        for nombre, columna, referenciada, columna_referenciada, al_borrar, al_actualizar in cursor.fetchall():
+            clave = claves_foraneas.setdefault(nombre, {"columnas": [], "referenciada": referenciada,
+                                                         "columnas_referenciadas": [], "reglas": (al_borrar, al_actualizar)})
+            clave["columnas"].append(columna)
+            clave["columnas_referenciadas"].append(columna_referenciada)
+        cursor.execute("""
+            SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, ACTION_STATEMENT
+            FROM INFORMATION_SCHEMA.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s;
+        """, (tabla_origen, ))
+        triggers = cursor.fetchall()
+        columnas_nuevas = set(self.obtener_columnas(cursor, tabla_nueva))
+
+        tabla_antigua = f"{tabla_origen}_antigua"
+        cursor.execute(f"RENAME TABLE {tabla_origen} TO {tabla_antigua}, {tabla_nueva} TO {tabla_origen};")
+        cursor.execute(f"DROP TABLE {tabla_antigua};")
+        for nombre, clave in claves_foraneas.items():
+            if not set(clave["columnas"]) <= columnas_nuevas:
+                continue #La clave foránea era de una columna eliminada
+            al_borrar, al_actualizar = clave["reglas"]
+            cursor.execute(f"""
+                ALTER TABLE {tabla_origen} ADD CONSTRAINT {nombre}
+                FOREIGN KEY ({", ".join(clave["columnas"])})
+                REFERENCES {clave["referenciada"]} ({", ".join(clave["columnas_referenciadas"])})
+                ON DELETE {al_borrar} ON UPDATE {al_actualizar};
+            """)
+        for nombre, momento, evento, sentencia in triggers:
+            cursor.execute(f"CREATE TRIGGER {nombre} {momento} {evento} ON {tabla_origen} FOR EACH ROW {sentencia};")
+
+    def obtener_indices_y_triggers(self, cursor, tabla_origen):
+        #Índices secundarios (ni la PK ni los que usan las claves foráneas de la tabla, que MySQL no deja borrar)
+        #y triggers, que en MySQL no se pueden desactivar: se borran y se vuelven a crear. Cada índice es
+        #[nombre, cláusula ADD del ALTER TABLE, columnas] (ver sentencias_indices)
+        cursor.execute("""
+            SELECT DISTINCT COLUMN_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL;
+        """, (tabla_origen, ))
+        columnas_claves_foraneas = {fila[0] for fila in cursor.fetchall()}
+        cursor.execute("""
+            SELECT INDEX_NAME, NON_UNIQUE, COLUMN_NAME, SUB_PART
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME <> 'PRIMARY'
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX;
+        """, (tabla_origen, ))
+        por_indice = {}
+        for nombre, no_unico, columna, prefijo in cursor.fetchall():
+            indice = por_indice.setdefault(nombre, {"unico": not no_unico, "columnas": [], "partes": []})
+            indice["columnas"].append(columna)
+            indice["partes"].append(f"{columna}({prefijo})" if prefijo else columna)
+        indices = []
+        for nombre, indice in por_indice.items():
+            if None in indice["columnas"] or set(indice["columnas"]) & columnas_claves_foraneas:
+                continue #Índices funcionales o necesarios para una clave foránea
+            tipo = "UNIQUE INDEX" if indice["unico"] else "INDEX"
+            indices.append([nombre, f"ADD {tipo} {nombre} ({', '.join(indice['partes'])})", indice["columnas"]])
+        cursor.execute("""
+            SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, ACTION_STATEMENT
+            FROM INFORMATION_SCHEMA.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s;
+        """, (tabla_origen, ))
+        triggers = [[nombre, f"CREATE TRIGGER {nombre} {momento} {evento} ON {tabla_origen} FOR EACH ROW {sentencia}"]
+                    for nombre, momento, evento, sentencia in cursor.fetchall()]
+        return {"indices": indices, "triggers": triggers}
+
+    def suspender_indices_y_triggers(self, cursor, tabla_origen, definiciones):
+        if definiciones["indices"]:
+            cursor.execute(f"ALTER TABLE {tabla_origen} {', '.join(f'DROP INDEX {nombre}' for nombre, _, _ in definiciones['indices'])};")
+        for nombre, _ in definiciones["triggers"]:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nombre};")
+
+    def sentencias_indices(self, tabla_origen, indices):
+        #Cada ALTER TABLE ... ADD INDEX toma el bloqueo de metadatos de la tabla, así que varios a la vez sobre una misma
+        #tabla se hacen uno detrás de otro, y cada uno recorre la tabla. Van todos en un único ALTER TABLE, que la recorre
+        #una vez; solo las tablas distintas reconstruyen sus índices en paralelo
+        if not indices:
+            return []
+        clausulas = ", ".join(clausula for _, clausula, _ in indices)
+        return [([nombre for nombre, _, _ in indices], f"ALTER TABLE {tabla_origen} {clausulas}, ALGORITHM=INPLACE, LOCK=NONE;")]
+
+    def reactivar_triggers(self, cursor, tabla_origen, definiciones):
+        cursor.execute("""
+            SELECT TRIGGER_NAME FROM INFORMATION_SCHEMA.TRIGGERS
+            WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s;
+        """, (tabla_origen, ))
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        for nombre, sentencia in definiciones["triggers"]:
+            if nombre not in existentes:
+                cursor.execute(sentencia)
+
+    def preparar_construccion_indices(self, cursor, memoria_mb):
+        #Buffer de ordenación de la construcción de índices (MySQL 8.0.27 o posterior)
+        try:
+            cursor.execute("SET SESSION innodb_ddl_buffer_size = %s;", (int(memoria_mb) * 1024 * 1024, ))
+        except Exception as e:
+            print(f"No se pudo ajustar innodb_ddl_buffer_size: {e}", flush=True)
+
+    def indice_pendiente(self, cursor, tabla_origen, nombre):
+        cursor.execute("""
+            SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s;
+        """, (tabla_origen, nombre))
+        return cursor.fetchone() is None
+
+    def sentencia_permutacion(self, tabla_origen, columnas_clave, grupos, condiciones, parametros):
+        #Sin UPDATE ... FROM ni CTE modificables: la página y cada permutación son tablas derivadas unidas por el número
+        #de fila. Las funciones de ventana obligan a materializarlas, así que se pueden leer de la misma tabla que se actualiza
+        tupla_clave = ", ".join(columnas_clave)
+        orden = ", ".join([f"{col} ASC" for col in columnas_clave])
+        where = condicion_where(condiciones)
+        joins = [f"""JOIN (
+            SELECT {tupla_clave}, row_number() OVER (ORDER BY {orden}) AS rn FROM {tabla_origen} {where}
+        ) AS pagina ON {" AND ".join([f"t.{col} = pagina.{col}" for col in columnas_clave])}"""]
+        set_clause = []
+        for i, grupo in enumerate(grupos):
+            joins.append(f"""JOIN (
+                SELECT {", ".join(grupo)}, row_number() OVER (ORDER BY RAND()) AS rn FROM {tabla_origen} {where}
+            ) AS perm_{i} ON perm_{i}.rn = pagina.rn""")
+            set_clause.extend([f"t.{col} = perm_{i}.{col}" for col in grupo])
+        return f"""
+            UPDATE {tabla_origen} AS t
+            {" ".join(joins)}
+            SET {", ".join(set_clause)};
+        """, list(parametros) * (len(grupos) + 1)
+
@@ -0,0 +1,139 @@
+import json
+import os
+from datetime import datetime
+
+### DIARIO DE PROGRESO ###
+#Fichero de solo anexado con un registro JSON por línea. Cada registro se escribe con un único write sobre un
+#descriptor en modo O_APPEND seguido de fsync: una línea confirmada sobrevive a una caída y las líneas de varios
+#procesos no se mezclan. Una línea sin salto de línea final es una escritura cortada por una caída y se descarta.
+#Registros (un "paso" es una operación de una tabla y el "ambito" un rango de clave, "" para toda la tabla):
+#  {"tipo": "inicio", "tabla", "paso", "ambito"}: paso que no puede repetirse empezado, antes de su primera escritura
+#  {"tipo": "progreso", "tabla", "paso", "ambito", "clave"}: última clave confirmada del paso
+#  {"tipo": "paso", "tabla", "paso", "ambito"}: paso terminado
+#  {"tipo": "rangos", "tabla", "paso", "rangos"}: límites de los rangos de clave en los que se dividió el paso
+#  {"tipo": "tabla", "tabla"}: tabla terminada (todos sus pasos)
+
+ARCHIVO_DIARIO = "diario.jsonl"
+
+#Estado reconstruido a partir del diario. Cada proceso lo mantiene al día leyendo solo las líneas nuevas
+ESTADO_DIARIO = {"iniciados": set(), "claves": {}, "pasos": set(), "rangos": {}, "tablas": set()}
+POSICION_DIARIO = {"inodo": None, "posicion": 0}
+
+
+def reparar_diario():
+    #Elimina la última línea si quedó cortada, para que el siguiente registro no se pegue a ella.
+    #Se llama al arrancar, antes de lanzar procesos que escriban en el diario
+    if not os.path.exists(ARCHIVO_DIARIO):
+        return
+    with open(ARCHIVO_DIARIO, "rb+") as f:
+        contenido = f.read()
+        if contenido and not contenido.endswith(b"\n"):
+            f.truncate(contenido.rfind(b"\n") + 1)
+            f.flush()
+            os.fsync(f.fileno())
+            print(f"Diario {ARCHIVO_DIARIO}: descartado un registro incompleto al final", flush=True)
+
+
+def anotar(registro):
+    linea = (json.dumps(registro, default=str) + "\n").encode("utf-8")
+    descriptor = os.open(ARCHIVO_DIARIO, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(descriptor, linea)
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def aplicar(registro):
+    tipo = registro["tipo"]
+    if tipo == "tabla":
+        ESTADO_DIARIO["tablas"].add(registro["tabla"])
+        return
+    paso = (registro["tabla"], registro["paso"], registro.get("ambito", ""))
+    if tipo == "inicio":
+        ESTADO_DIARIO["iniciados"].add(paso)
+    elif tipo == "progreso":
+        ESTADO_DIARIO["claves"][paso] = registro["clave"]
+    elif tipo == "paso":
+        ESTADO_DIARIO["pasos"].add(paso)
+    elif tipo == "rangos":
+        ESTADO_DIARIO["rangos"][paso[:2]] = registro["rangos"]
+
+
+def actualizar():
+    #Aplica las líneas completas escritas desde la última lectura (por este proceso o por otros)
+    if not os.path.exists(ARCHIVO_DIARIO):
+        reiniciar_estado()
+        return
+    inodo = os.stat(ARCHIVO_DIARIO).st_ino
+    if inodo != POSICION_DIARIO["inodo"] or os.path.getsize(ARCHIVO_DIARIO) < POSICION_DIARIO["posicion"]:
+        reiniciar_estado()
+        POSICION_DIARIO["inodo"] = inodo
+    with open(ARCHIVO_DIARIO, "rb") as f:
+        f.seek(POSICION_DIARIO["posicion"])
+        contenido = f.read()
+    completo = contenido[:contenido.rfind(b"\n") + 1]
+    for linea in completo.splitlines():
+        if linea.strip():
+            aplicar(json.loads(linea))
+    POSICION_DIARIO["posicion"] += len(completo)
+
+
+def reiniciar_estado():
+    ESTADO_DIARIO.update({"iniciados": set(), "claves": {}, "pasos": set(), "rangos": {}, "tablas": set()})
+    POSICION_DIARIO.update({"inodo": None, "posicion": 0})
+
+
+def clave_paso(tabla, paso, ambito=""):
+    #Última clave confirmada del paso (lista JSON), o None si no ha avanzado
+    actualizar()
+    return ESTADO_DIARIO["claves"].get((tabla, paso, ambito))
+
+
+def paso_iniciado(tabla, paso, ambito=""):
+    actualizar()
+    return (tabla, paso, ambito) in ESTADO_DIARIO["iniciados"]
+
+
+def paso_terminado(tabla, paso, ambito=""):
+    actualizar()
+    return (tabla, paso, ambito) in ESTADO_DIARIO["pasos"]
+
+
+def rangos_paso(tabla, paso):
+    actualizar()
+    return ESTADO_DIARIO["rangos"].get((tabla, paso))
+
+
+def tabla_terminada(tabla):
+    actualizar()
+    return tabla in ESTADO_DIARIO["tablas"]
+
+
+def anotar_paso_iniciado(tabla, paso, ambito=""):
+    anotar({"tipo": "inicio", "tabla": tabla, "paso": paso, "ambito": ambito})
+
+
+def anotar_progreso(tabla, paso, ambito, clave):
+    anotar({"tipo": "progreso", "tabla": tabla, "paso": paso, "ambito": ambito, "clave": list(clave) if clave is not None else None})
+
+
+def anotar_paso_terminado(tabla, paso, ambito=""):
+    anotar({"tipo": "paso", "tabla": tabla, "paso": paso, "ambito": ambito})
+
+
+def anotar_rangos(tabla, paso, rangos):
+    anotar({"tipo": "rangos", "tabla": tabla, "paso": paso, "rangos": rangos})
+
+
+def anotar_tabla_terminada(tabla):
+    anotar({"tipo": "tabla", "tabla": tabla})
+
+
+def archivar_diario():
+    #Con todas las tablas terminadas se aparta el diario, así la próxima ejecución empieza de cero
+    if os.path.exists(ARCHIVO_DIARIO):
+        destino = f"{os.path.splitext(ARCHIVO_DIARIO)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        os.replace(ARCHIVO_DIARIO, destino)
+        print(f"Ejecución completa. Diario archivado en {destino}", flush=True)
+    reiniciar_estado()
@@ -0,0 +1,87 @@
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+### PLANIFICACIÓN DE TABLAS EN PARALELO ###
+
+PATRON_CLAVE_FORANEA = re.compile(
+    r'ALTER TABLE "?(\w+)"?\s+ADD CONSTRAINT\s+"?[^"]+"?\s+FOREIGN KEY\s*\(.*?\)\s*REFERENCES\s+"?(\w+)"?',
+    re.IGNORECASE
+)
+
+
+def leer_claves_foraneas(ruta):
+    #Devuelve los pares (tabla, tabla_referenciada) de un fichero de ALTER TABLE ... FOREIGN KEY como migraciones/foreign_keys.sql
+    pares = set()
+    if not os.path.exists(ruta):
+        return pares
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            coincidencia = PATRON_CLAVE_FORANEA.search(linea)
+            if coincidencia:
+                pares.add((coincidencia.group(1), coincidencia.group(2)))
+    return pares
+
+
+def construir_conflictos(tablas, pares_claves_foraneas):
+    #Dos tablas relacionadas por una clave foránea (en cualquier sentido) no se reescriben a la vez:
+    #el DROP COLUMN y los UPDATE de una toman bloqueos que esperan o interbloquean con la otra
+    conflictos = {tabla: set() for tabla in tablas}
+    for tabla, referenciada in pares_claves_foraneas:
+        if tabla in conflictos and referenciada in conflictos and tabla != referenciada:
+            conflictos[tabla].add(referenciada)
+            conflictos[referenciada].add(tabla)
+    return conflictos
+
+
+def inicializar_proceso(ruta_logs):
+    #Cada proceso escribe en el mismo fichero de logs que el proceso principal
+    sys.stdout = open(ruta_logs, 'a', encoding='utf-8')
+
+
+def ejecutar_tablas_en_paralelo(tablas, conflictos, num_procesos, funcion, ruta_logs, al_terminar=None):
+    #tablas: lista de (tabla, argumento) ya ordenada por prioridad (las más grandes primero).
+    #Se lanza siempre la primera tabla pendiente que no entre en conflicto con ninguna de las que están en curso.
+    #funcion(tabla, argumento) se ejecuta en un proceso del pool, que abre su propia conexión
+    pendientes = list(tablas)
+    en_curso = {}
+
+    with ProcessPoolExecutor(max_workers=num_procesos, initializer=inicializar_proceso, initargs=(ruta_logs,)) as pool:
+        while pendientes or en_curso:
+            tablas_en_curso = set(en_curso.values())
+            for tabla, argumento in list(pendientes):
+                if len(en_curso) >= num_procesos:
+                    break
+                if conflictos.get(tabla, set()) & tablas_en_curso:
+                    continue
+                futuro = pool.submit(funcion, tabla, argumento)
+                en_curso[futuro] = tabla
+                tablas_en_curso.add(tabla)
+                pendientes.remove((tabla, argumento))
+                print(f"Lanzada tabla {tabla} ({len(en_curso)} en curso, {len(pendientes)} pendientes)", flush=True)
+
+            terminados, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                tabla = en_curso.pop(futuro)
+                try:
+                    futuro.result()
+                    if al_terminar:
+                        al_terminar(tabla)
+                except Exception as e:
+                    print(f"Error en el proceso de la tabla {tabla}: {e}", flush=True)
+
+
+def ejecutar_en_paralelo(tareas, num_procesos, funcion, ruta_logs, al_terminar=None):
+    #Ejecuta funcion(*argumentos) para cada tarea (lista de tuplas de argumentos) sin restricciones entre ellas.
+    #al_terminar(indice, resultado) se llama en este proceso según va acabando cada tarea
+    with ProcessPoolExecutor(max_workers=num_procesos, initializer=inicializar_proceso, initargs=(ruta_logs,)) as pool:
+        futuros = {pool.submit(funcion, *argumentos): i for i, argumentos in enumerate(tareas)}
+        for futuro in as_completed(futuros):
+            indice = futuros[futuro]
+            try:
+                resultado = futuro.result()
+                if al_terminar:
+                    al_terminar(indice, resultado)
+            except Exception as e:
+                print(f"Error en la tarea paralela {tareas[indice]}: {e}", flush=True)
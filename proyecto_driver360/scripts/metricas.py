@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+### MÉTRICAS DE RENDIMIENTO ###
+#Cada página (o lote) mide el tiempo de sus fases y cuenta filas y bytes leídos. Cada página se anota como una línea
+#JSON en RUTA_METRICAS, que se conserva entre ejecuciones. Los totales por tabla, paso y rango se vuelcan en formato
+#Prometheus (textfile collector) en DIRECTORIO_PROMETHEUS, un fichero por tabla y rango, reescrito de forma atómica
+
+RUTA_METRICAS = os.environ.get("RUTA_METRICAS", "metricas.jsonl")
+DIRECTORIO_PROMETHEUS = os.environ.get("DIRECTORIO_PROMETHEUS", "metricas")
+#Fases de una página: lectura (SELECT o lote del cursor), transformación en memoria, volcado a disco (reordenación
+#global), escritura (carga masiva, UPDATE o UPDATE por fila) y commit
+FASES = ("lectura", "transformacion", "volcado", "escritura", "commit")
+#Identificador de la ejecución. Los procesos paralelos lo heredan del proceso principal
+EJECUCION = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+#Totales de este proceso por (tabla, paso, ámbito)
+TOTALES = {}
+
+
+def nueva_pagina():
+    return dict.fromkeys(FASES, 0.0)
+
+
+@contextmanager
+def fase(tiempos, nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos[nombre] += time.perf_counter() - inicio
+
+
+def registrar_pagina(tabla, paso, ambito, tiempos, filas, bytes_leidos):
+    segundos = sum(tiempos.values())
+    registro = {
+        "ejecucion": EJECUCION,
+        "momento": datetime.now().isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+        "tabla": tabla,
+        "paso": paso,
+        "ambito": ambito,
+        "filas": filas,
+        "bytes": int(bytes_leidos),
+        "segundos": round(segundos, 6),
+        "fases": {nombre: round(valor, 6) for nombre, valor in tiempos.items() if valor},
+        "filas_por_segundo": round(filas / segundos, 1) if segundos else None,
+        "bytes_por_segundo": round(bytes_leidos / segundos, 1) if segundos else None,
+    }
+    #Un único write en modo O_APPEND: las líneas de los procesos paralelos no se mezclan
+    descriptor = os.open(RUTA_METRICAS, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(descriptor, (json.dumps(registro) + "\n").encode("utf-8"))
+    finally:
+        os.close(descriptor)
+
+    totales = TOTALES.setdefault((tabla, paso, ambito), {"paginas": 0, "filas": 0, "bytes": 0, "fases": nueva_pagina()})
+    totales["paginas"] += 1
+    totales["filas"] += filas
+    totales["bytes"] += int(bytes_leidos)
+    for nombre, valor in tiempos.items():
+        totales["fases"][nombre] += valor
+    escribir_prometheus(tabla, ambito)
+
+
+def etiqueta(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def escribir_prometheus(tabla, ambito):
+    #Reescribe el fichero .prom de la tabla y el rango con los totales de este proceso
+    if not DIRECTORIO_PROMETHEUS:
+        return
+    os.makedirs(DIRECTORIO_PROMETHEUS, exist_ok=True)
+    lineas = {
+        "anonimizacion_fase_segundos_total": ["# HELP anonimizacion_fase_segundos_total Segundos dedicados a cada fase de las páginas",
+                                              "# TYPE anonimizacion_fase_segundos_total counter"],
+        "anonimizacion_paginas_total": ["# HELP anonimizacion_paginas_total Páginas o lotes procesados",
+                                        "# TYPE anonimizacion_paginas_total counter"],
+        "anonimizacion_filas_total": ["# HELP anonimizacion_filas_total Filas leídas y procesadas",
+                                      "# TYPE anonimizacion_filas_total counter"],
+        "anonimizacion_bytes_total": ["# HELP anonimizacion_bytes_total Bytes en memoria de las filas leídas",
+                                      "# TYPE anonimizacion_bytes_total counter"],
+        "anonimizacion_filas_por_segundo": ["# HELP anonimizacion_filas_por_segundo Filas por segundo del paso",
+                                            "# TYPE anonimizacion_filas_por_segundo gauge"],
+        "anonimizacion_bytes_por_segundo": ["# HELP anonimizacion_bytes_por_segundo Bytes por segundo del paso",
+                                            "# TYPE anonimizacion_bytes_por_segundo gauge"],
+    }
+    for (tabla_total, paso, ambito_total), totales in TOTALES.items():
+        if (tabla_total, ambito_total) != (tabla, ambito):
+            continue
+        etiquetas = f'tabla="{etiqueta(tabla)}",paso="{etiqueta(paso)}",ambito="{etiqueta(ambito)}"'
+        for nombre, valor in totales["fases"].items():
+            lineas["anonimizacion_fase_segundos_total"].append(f'anonimizacion_fase_segundos_total{{{etiquetas},fase="{nombre}"}} {valor:.6f}')
+        lineas["anonimizacion_paginas_total"].append(f"anonimizacion_paginas_total{{{etiquetas}}} {totales['paginas']}")
+        lineas["anonimizacion_filas_total"].append(f"anonimizacion_filas_total{{{etiquetas}}} {totales['filas']}")
+        lineas["anonimizacion_bytes_total"].append(f"anonimizacion_bytes_total{{{etiquetas}}} {totales['bytes']}")
+        segundos = sum(totales["fases"].values())
+        if segundos:
+            lineas["anonimizacion_filas_por_segundo"].append(f"anonimizacion_filas_por_segundo{{{etiquetas}}} {totales['filas'] / segundos:.1f}")
+            lineas["anonimizacion_bytes_por_segundo"].append(f"anonimizacion_bytes_por_segundo{{{etiquetas}}} {totales['bytes'] / segundos:.1f}")
+
+    nombre_fichero = f"anonimizacion_{tabla}{'_' + ambito if ambito else ''}.prom"
+    ruta = os.path.join(DIRECTORIO_PROMETHEUS, nombre_fichero)
+    #El collector no debe leer un fichero a medio escribir: se escribe aparte y se renombra
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write("\n".join(linea for grupo in lineas.values() for linea in grupo) + "\n")
+    os.replace(temporal, ruta)
+
+
+def resumen_tabla(tabla):
+    #Tiempo por fase, filas y filas/s de la tabla en este proceso, para el log
+    fases = nueva_pagina()
+    filas = 0
+    for (tabla_total, _, _), totales in TOTALES.items():
+        if tabla_total == tabla:
+            filas += totales["filas"]
+            for nombre, valor in totales["fases"].items():
+                fases[nombre] += valor
+    segundos = sum(fases.values())
+    if not segundos:
+        return None
+    detalle = ", ".join(f"{nombre} {valor:.2f} s" for nombre, valor in fases.items() if valor)
+    return f"{detalle}. {filas} filas, {filas / segundos:.0f} filas/s"
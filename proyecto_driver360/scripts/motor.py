@@ -0,0 +1,1417 @@
+import argparse
+import json
+import os
+import time
+from contextvars import ContextVar
+from datetime import datetime
+import sys
+
+from itertools import islice
+
+import catalogo
+from canalizacion import canalizar_paginas
+from ejecucion_paralela import construir_conflictos, ejecutar_en_paralelo, ejecutar_tablas_en_paralelo, leer_claves_foraneas
+import diario
+import metricas
+import progreso
+from metricas import fase, nueva_pagina
+from planificador import imprimir_plan, leer_plan, planificar
+from seudonimizacion import comprobar_clave, seudonimizar_columna
+from reordenacion_externa import (borrar_tramos, escribir_tramo, marcar_tramos_completos, mezclar_tramos, preparar_directorio,
+                                  ruta_tramo, tramos_completos, tramos_grupo)
+from transformaciones import (columnas_de_filas, filas_de_columnas, num_filas, permutar_bloque, permutar_columnas,
+                              reordenar_locales_email, reordenar_octetos_ipv4, reordenar_pagina_bloque, reordenar_pagina_columnas,
+                              transformar_pagina)
+
+### MACROS ###
+
+TAM_PAGINA = 500000 #Filas máximas por página. El tamaño real se ajusta a MEMORIA_PAGINA_MB según el ancho de las filas
+TAM_PAGINA_MINIMA = 1000
+#Memoria de cliente para cada página leída en modo "python", contando las copias de trabajo (columnas, filas reordenadas
+#y buffer de escritura), que se estiman en FACTOR_MEMORIA_PAGINA veces lo que ocupan las filas leídas
+MEMORIA_PAGINA_MB = int(os.environ.get("MEMORIA_PAGINA_MB", 1024))
+FACTOR_MEMORIA_PAGINA = 3
+FILAS_MUESTRA_ANCHO = 1000 #Filas con las que se mide el ancho medio de las filas de una página
+TAM_LOTE = 50000 #Filas por lote en la lectura en streaming y en cada commit
+#Rutas relativas a scripts/ y a la raíz del proyecto, así funcionan desde cualquier directorio de trabajo.
+#El plan puede sustituirse por otro fichero con la misma estructura (p. ej. el de benchmarks/)
+RUTA_TABLAS_ANONIMIZABLES = os.environ.get("RUTA_TABLAS_ANONIMIZABLES",
+                                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablas.csv"))
+RUTA_CLAVES_FORANEAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migraciones", "foreign_keys.sql")
+RUTA_LOGS = "logs.txt"
+#Procesos (cada uno con su conexión) que anonimizan tablas a la vez. Con 1 se procesan en orden, una tras otra
+NUM_PROCESOS = int(os.environ.get("NUM_PROCESOS", 1))
+#Modo de escritura de las páginas reordenadas: "copy" (carga masiva del dialecto a una tabla temporal + un único UPDATE
+#unido por la clave: COPY en PostgreSQL, INSERT multifila en MySQL) o "fila" (un UPDATE por fila)
+MODO_ESCRITURA = os.environ.get("MODO_ESCRITURA", "copy")
+#Dónde se reordenan las columnas: "python" (se leen las páginas y se reordenan en el cliente) o "sql" (permutación en el servidor, sin mover filas)
+MODO_EJECUCION = os.environ.get("MODO_EJECUCION", "python")
+#Ámbito de cada permutación: "pagina" (TAM_PAGINA filas consecutivas por clave), "rango" (todo el rango de clave
+#que procesa cada proceso, ver NUM_RANGOS), "tabla" (toda la tabla de una vez) o "global" (toda la tabla con memoria
+#acotada, volcando tramos ordenados a DIRECTORIO_REORDENACION y mezclándolos, ver reordenacion_externa.py).
+#"rango" y "tabla" solo se admiten con la permutación en el servidor (ver alcance_sin_memoria_acotada)
+ALCANCE_REORDENACION = os.environ.get("ALCANCE_REORDENACION", "pagina")
+DIRECTORIO_REORDENACION = os.environ.get("DIRECTORIO_REORDENACION", ".")
+#Con 1 todas las operaciones de una tabla se aplican en una sola pasada (una lectura y una escritura por página).
+#Con 0 cada operación recorre y reescribe la tabla por separado
+FUSIONAR_OPERACIONES = os.environ.get("FUSIONAR_OPERACIONES", "0") == "1"
+#Con 1 cada tabla se escribe anonimizada en una tabla nueva (sin las columnas eliminadas) que sustituye a la original,
+#en lugar de actualizar las filas en el sitio. Evita las tuplas muertas de los UPDATE y de DROP COLUMN
+REESCRIBIR_TABLAS = os.environ.get("REESCRIBIR_TABLAS", "0") == "1"
+#Con 1 se borran los índices secundarios y se desactivan los triggers de cada tabla mientras se anonimiza en el sitio,
+#y al terminarla se reconstruyen en paralelo con PROCESOS_INDICES conexiones de MEMORIA_INDICES_MB cada una
+SUSPENDER_INDICES = os.environ.get("SUSPENDER_INDICES", "0") == "1"
+PROCESOS_INDICES = int(os.environ.get("PROCESOS_INDICES", 4))
+MEMORIA_INDICES_MB = int(os.environ.get("MEMORIA_INDICES_MB", 1024)) #maintenance_work_mem en PostgreSQL
+#Procesos que reordenan a la vez rangos disjuntos de la clave de una misma tabla. Con 1 la tabla no se divide
+NUM_RANGOS = int(os.environ.get("NUM_RANGOS", 1))
+FILAS_MINIMAS_RANGOS = int(os.environ.get("FILAS_MINIMAS_RANGOS", 1000000)) #Las tablas más pequeñas no se dividen
+FILAS_MUESTRA_RANGOS = 100000 #Filas aproximadas de la muestra con la que se calculan los límites de los rangos
+#Con 1 las reordenaciones por bloques en modo "python" solapan la lectura de la página siguiente (con una conexión
+#propia) y su reordenación con la escritura y el commit de la actual, ver canalizacion.py
+CANALIZAR_PAGINAS = os.environ.get("CANALIZAR_PAGINAS", "0") == "1"
+#Las tablas sin clave primaria ni única se recorren por rangos de bloques físicos (ctid) en PostgreSQL, ver
+#recorrer_por_bloques. Con 1 se recorren así todas, sin ordenar por clave
+RECORRIDO_POR_BLOQUES = os.environ.get("RECORRIDO_POR_BLOQUES", "0") == "1"
+MAX_EJEMPLOS_INVALIDOS = 5 #Valores inválidos de ejemplo por columna que se escriben en el log
+
+#Dialecto de la base de datos (dialectos.py). Lo fija cada script de entrada con configurar() antes de llamar a main()
+DIALECTO = None
+#Paso del diario (tabla, paso, ámbito) que se está ejecutando, ver iniciar_paso(). Es una variable de contexto para
+#que cada tarea del motor asyncio (motor_asincrono.py), que procesa varias tablas en el mismo proceso, tenga el suyo
+PASO_ACTUAL = ContextVar("PASO_ACTUAL", default=None)
+
+### ESTADO DE LA EJECUCIÓN Y CONFIGURACIÓN ###
+
+def configurar(dialecto):
+    global DIALECTO
+    DIALECTO = dialecto
+
+
+def conexion():
+    return DIALECTO.conectar()
+
+
+def nombre_paso(operacion, columnas):
+    #Identifica un paso en el diario: la misma operación puede aparecer en el plan con columnas distintas
+    return f"{operacion}({' '.join(columnas)})"
+
+
+def iniciar_paso(tabla_origen, paso, ambito=""):
+    #Fija el paso del diario al que anotan guardar_progreso y terminar_paso en este proceso.
+    #Devuelve si el paso ya terminó y, si no, la última clave confirmada desde la que reanudarlo
+    PASO_ACTUAL.set((tabla_origen, paso, ambito))
+    return diario.paso_terminado(tabla_origen, paso, ambito), diario.clave_paso(tabla_origen, paso, ambito)
+
+
+def guardar_progreso(tabla_origen, clave):
+    #Anota la última clave confirmada del paso en curso. Se llama después del commit de cada página o lote
+    _, paso, ambito = PASO_ACTUAL.get()
+    diario.anotar_progreso(tabla_origen, paso, ambito, clave)
+
+
+def terminar_paso(tabla_origen):
+    _, paso, ambito = PASO_ACTUAL.get()
+    diario.anotar_paso_terminado(tabla_origen, paso, ambito)
+
+
+def registrar_pagina(tabla_origen, tiempos, filas, bytes_leidos=0):
+    #Anota las métricas de una página (tiempo por fase, filas y bytes) para el paso en curso, ver metricas.py
+    _, paso, ambito = PASO_ACTUAL.get()
+    metricas.registrar_pagina(tabla_origen, paso, ambito, tiempos, filas, bytes_leidos)
+    progreso.informar_progreso()
+
+
+### MÉTODOS AUXILIARES ###
+def obtener_columnas(cursor, tabla_origen):
+    #Columnas de la tabla según la instantánea del catálogo (catalogo.py)
+    columnas = catalogo.tabla_catalogo(DIALECTO, cursor, tabla_origen)["columnas"]
+    if not columnas:
+        print(f"Warning: No se encontraron columnas para tabla '{tabla_origen}'")
+    return columnas
+
+
+def obtener_columnas_clave(cursor, tabla_origen):
+    #La clave de cada fila es la clave primaria de la tabla en el catálogo (en las tablas de auditoría _aud, la
+    #compuesta con rev_ver) o, si no tiene, su clave única NOT NULL más corta.
+    #Sin ninguna de las dos se usa la primera columna, y en las tablas _aud también rev_ver, como en el esquema migrado
+    clave = catalogo.clave_tabla(catalogo.tabla_catalogo(DIALECTO, cursor, tabla_origen))
+    if clave:
+        return clave
+    columna_id = obtener_columnas(cursor, tabla_origen)[0]
+    clave = [columna_id, "rev_ver"] if tabla_origen.endswith('_aud') else [columna_id]
+    print(f"Warning: la tabla '{tabla_origen}' no tiene clave primaria ni única en el catálogo. Se usa ({', '.join(clave)})", flush=True)
+    return clave
+
+
+def obtener_tablas_anonimizables():
+    #Tablas del plan en el orden de tablas.csv
+    return [(tabla, i) for i, tabla in enumerate(leer_plan(RUTA_TABLAS_ANONIMIZABLES))]
+
+
+def aplicar_pagina_por_filas(cursor, tabla_origen, columnas_clave, columnas, filas):
+    #Un UPDATE por fila. Cada fila son los valores de la clave seguidos de los valores de las columnas
+    set_clause = ", ".join([f"{col} = %s" for col in columnas])
+    where_clause = " AND ".join([f"{col} = %s" for col in columnas_clave])
+    num_claves = len(columnas_clave)
+    for fila in filas:
+        cursor.execute(
+            f"""UPDATE {tabla_origen} SET {set_clause} WHERE {where_clause};""",
+            list(fila[num_claves:]) + list(fila[:num_claves])
+        ) #Los valores del SET van primero y después los de la clave, en el orden de los %s
+
+
+def alcance_sin_memoria_acotada():
+    #Con alcance "tabla" o "rango" toda la tabla (o todo el rango) es una única página. Solo se admite cuando la
+    #permutación se hace en el servidor: en memoria del cliente la página crecería con la tabla
+    return ALCANCE_REORDENACION in ("tabla", "rango") and (MODO_EJECUCION != "sql" or FUSIONAR_OPERACIONES or REESCRIBIR_TABLAS)
+
+
+def tam_pagina_efectivo(ancho_fila=None):
+    #Con alcance "tabla" o "rango" (solo en el servidor) no hay límite de página.
+    #Con el ancho medio de fila (bytes en memoria) la página se limita para que quepa en MEMORIA_PAGINA_MB
+    if ALCANCE_REORDENACION in ("tabla", "rango"):
+        return None
+    if not ancho_fila:
+        return TAM_PAGINA
+    filas = int(MEMORIA_PAGINA_MB * 1024 * 1024 / (ancho_fila * FACTOR_MEMORIA_PAGINA))
+    return min(TAM_PAGINA, max(TAM_PAGINA_MINIMA, filas))
+
+
+def ancho_medio_filas(filas):
+    #Bytes que ocupa de media una fila leída en memoria de Python (la tupla y sus valores), sobre una muestra de filas
+    if not filas:
+        return None
+    muestra = filas[::max(1, len(filas) // FILAS_MUESTRA_ANCHO)]
+    return sum(sys.getsizeof(fila) + sum(map(sys.getsizeof, fila)) for fila in muestra) / len(muestra)
+
+
+def medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_actual, rango=None):
+    #Ancho medio de las filas que se van a leer (misma proyección), medido sobre las siguientes FILAS_MUESTRA_ANCHO filas.
+    #Fija el tamaño de la primera página; las siguientes usan el ancho observado en la página anterior
+    if tam_pagina_efectivo() is None:
+        return None
+    consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_actual, FILAS_MUESTRA_ANCHO, rango, columnas)
+    cursor.execute(consulta, parametros)
+    ancho_fila = ancho_medio_filas(cursor.fetchall())
+    if ancho_fila:
+        print(f"Tabla {tabla_origen}: {ancho_fila:.0f} bytes por fila en memoria, páginas de {tam_pagina_efectivo(ancho_fila)} filas", flush=True)
+    return ancho_fila
+
+
+def condiciones_rango(columna_id, rango):
+    #Un rango (desde, hasta] sobre la primera columna de la clave. None en un extremo significa sin límite
+    condiciones = []
+    parametros = []
+    if rango is not None:
+        desde, hasta = rango
+        if desde is not None:
+            condiciones.append(f"{columna_id} > %s")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append(f"{columna_id} <= %s")
+            parametros.append(hasta)
+    return condiciones, parametros
+
+
+def consulta_pagina(tabla_origen, columnas_clave, clave_actual, tam_pagina, rango=None, columnas=None):
+    #Paginación por clave (keyset): la siguiente página empieza justo después de la última clave procesada.
+    #Con columnas se leen solo la clave y esas columnas (solo la clave si la lista está vacía); si no, la fila completa
+    seleccion = ", ".join(list(columnas_clave) + list(columnas)) if columnas is not None else "*"
+    orden = ", ".join([f"{col} ASC" for col in columnas_clave])
+    condiciones, parametros = condiciones_rango(columnas_clave[0], rango)
+    if clave_actual is not None:
+        tupla_clave = ", ".join(columnas_clave)
+        marcadores = ", ".join(["%s"] * len(columnas_clave))
+        condiciones.append(f"({tupla_clave}) > ({marcadores})")
+        parametros.extend(clave_actual)
+    condicion = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+    limite = ""
+    if tam_pagina is not None:
+        limite = " LIMIT %s"
+        parametros.append(tam_pagina)
+    return f"SELECT {seleccion} FROM {tabla_origen}{condicion} ORDER BY {orden}{limite};", parametros
+
+
+def escribir_pagina(cursor, tabla_origen, columnas_clave, columnas, valores):
+    #Aplica una página ya anonimizada, por columnas (clave seguida de las columnas), según MODO_ESCRITURA. No hace commit
+    if MODO_ESCRITURA == "fila":
+        aplicar_pagina_por_filas(cursor, tabla_origen, columnas_clave, columnas, filas_de_columnas(valores))
+    else:
+        DIALECTO.aplicar_pagina(cursor, tabla_origen, columnas_clave, columnas, valores)
+
+
+def reordenar_en_servidor(cursor, conn, tabla_origen, columnas_clave, clave_inicial, grupos, rango=None):
+    #Reordena en el servidor sin traer filas al cliente. Cada grupo de columnas se permuta conjuntamente y se
+    #aplica con un único UPDATE por página (o por tabla). El SQL de la permutación depende del dialecto
+    #En el servidor el alcance "global" es la tabla entera en una sola sentencia
+    tam_pagina = None if ALCANCE_REORDENACION == "global" else tam_pagina_efectivo()
+    clave_actual = clave_inicial if clave_inicial else None
+    tupla_clave = ", ".join(columnas_clave)
+    marcadores = ", ".join(["%s"] * len(columnas_clave))
+    orden = ", ".join([f"{col} ASC" for col in columnas_clave])
+    orden_inverso = ", ".join([f"{col} DESC" for col in columnas_clave])
+
+    exito = True
+    while True:
+        try:
+            tiempos = nueva_pagina()
+            condiciones, parametros = condiciones_rango(columnas_clave[0], rango)
+            if clave_actual is not None:
+                condiciones.append(f"({tupla_clave}) > ({marcadores})")
+                parametros.extend(clave_actual)
+
+            #Última clave de la página: solo viaja la clave, nunca los datos
+            with fase(tiempos, "lectura"):
+                if tam_pagina is None:
+                    cursor.execute(f"""
+                        SELECT {tupla_clave} FROM {tabla_origen}
+                        {"WHERE " + " AND ".join(condiciones) if condiciones else ""}
+                        ORDER BY {orden_inverso} LIMIT 1;
+                    """, parametros)
+                else:
+                    cursor.execute(f"""
+                        SELECT {tupla_clave} FROM (
+                            SELECT {tupla_clave} FROM {tabla_origen}
+                            {"WHERE " + " AND ".join(condiciones) if condiciones else ""}
+                            ORDER BY {orden} LIMIT %s
+                        ) p ORDER BY {orden_inverso} LIMIT 1;
+                    """, parametros + [tam_pagina])
+                clave_final = cursor.fetchone()
+            if clave_final is None:
+                break
+
+            condiciones.append(f"({tupla_clave}) <= ({marcadores})")
+            parametros.extend(clave_final)
+            sentencia, parametros = DIALECTO.sentencia_permutacion(tabla_origen, columnas_clave, grupos, condiciones, parametros)
+            #La permutación se calcula y se aplica en la misma sentencia: todo cuenta como escritura
+            with fase(tiempos, "escritura"):
+                cursor.execute(sentencia, parametros)
+            filas_actualizadas = max(cursor.rowcount, 0)
+            with fase(tiempos, "commit"):
+                conn.commit()
+            registrar_pagina(tabla_origen, tiempos, filas_actualizadas)
+
+            clave_actual = clave_final
+            guardar_progreso(tabla_origen, clave_actual)
+
+        except Exception as e:
+            print(f"Error en tabla {tabla_origen} en la clave {clave_actual}: {e}", flush=True)
+            conn.rollback()
+            guardar_progreso(tabla_origen, clave_actual)
+            exito = False
+            break
+
+    if exito:
+        terminar_paso(tabla_origen)
+
+    return clave_actual
+
+
+### DIVISIÓN DE UNA TABLA EN RANGOS DE CLAVE ###
+def obtener_filas_estimadas(cursor, tabla_origen):
+    return catalogo.tabla_catalogo(DIALECTO, cursor, tabla_origen)["filas"]
+
+
+def calcular_rangos(cursor, tabla_origen, columna_id, num_rangos, filas_estimadas):
+    #Límites de los rangos a partir de los cuantiles de una muestra de la clave. Si la muestra no da límites
+    #se reparte uniformemente entre el mínimo y el máximo. Devuelve una lista de rangos (desde, hasta]
+    porcentaje = 100.0
+    if filas_estimadas > FILAS_MUESTRA_RANGOS:
+        porcentaje = max(100.0 * FILAS_MUESTRA_RANGOS / filas_estimadas, 0.01)
+    fracciones = [i / num_rangos for i in range(1, num_rangos)]
+    muestra = DIALECTO.limites_muestra(cursor, tabla_origen, columna_id, fracciones, porcentaje)
+    limites = sorted({limite for limite in muestra if limite is not None})
+
+    if not limites:
+        cursor.execute(f"SELECT min({columna_id}), max({columna_id}) FROM {tabla_origen};")
+        minimo, maximo = cursor.fetchone()
+        if isinstance(minimo, int) and isinstance(maximo, int):
+            limites = sorted({minimo + (maximo - minimo) * i // num_rangos for i in range(1, num_rangos)})
+
+    bordes = [None] + limites + [None]
+    return [(bordes[i], bordes[i + 1]) for i in range(len(bordes) - 1)]
+
+
+def debe_dividirse(cursor, tabla_origen, rango):
+    #Solo se divide la llamada inicial (sin rango) de una tabla suficientemente grande
+    return rango is None and NUM_RANGOS > 1 and obtener_filas_estimadas(cursor, tabla_origen) >= FILAS_MINIMAS_RANGOS
+
+
+def procesar_rango_en_proceso(funcion, tabla_origen, columnas, rango, paso, indice):
+    #Punto de entrada de cada proceso de rango: conexión propia y su propio ámbito en el diario
+    ambito = f"r{indice}"
+    terminado, clave = iniciar_paso(tabla_origen, paso, ambito)
+    if terminado:
+        return True
+    conn, cursor = conexion()
+    try:
+        funcion(cursor, conn, tabla_origen, clave, *columnas, rango=rango)
+    finally:
+        conn.close()
+    return diario.paso_terminado(tabla_origen, paso, ambito)
+
+
+def reordenar_por_rangos(cursor, conn, tabla_origen, funcion, columnas):
+    #Reparte el paso en curso entre NUM_RANGOS procesos, cada uno con un rango disjunto de la clave.
+    #Los límites de los rangos se anotan en el diario para reanudar con los mismos, y cada rango anota su progreso
+    _, paso, _ = PASO_ACTUAL.get()
+    rangos = diario.rangos_paso(tabla_origen, paso)
+    if rangos is not None:
+        terminados = [i for i in range(len(rangos)) if diario.paso_terminado(tabla_origen, paso, f"r{i}")]
+        print(f"Reanudando {paso} en {tabla_origen} con los rangos guardados. Terminados: {terminados}", flush=True)
+    elif recorrido_por_bloques(cursor, tabla_origen):
+        rangos = rangos_bloques(cursor, tabla_origen, NUM_RANGOS)
+        diario.anotar_rangos(tabla_origen, paso, rangos)
+    else:
+        columna_id = obtener_columnas_clave(cursor, tabla_origen)[0]
+        filas_estimadas = obtener_filas_estimadas(cursor, tabla_origen)
+        rangos = calcular_rangos(cursor, tabla_origen, columna_id, NUM_RANGOS, filas_estimadas)
+        diario.anotar_rangos(tabla_origen, paso, rangos)
+    conn.commit() #Sin transacción abierta mientras trabajan los procesos de los rangos
+
+    tareas = [
+        (funcion, tabla_origen, columnas, tuple(rango), paso, i)
+        for i, rango in enumerate(rangos) if not diario.paso_terminado(tabla_origen, paso, f"r{i}")
+    ]
+    ejecutar_en_paralelo(tareas, NUM_RANGOS, procesar_rango_en_proceso, RUTA_LOGS)
+
+    if all(diario.paso_terminado(tabla_origen, paso, f"r{i}") for i in range(len(rangos))):
+        terminar_paso(tabla_origen)
+    else:
+        print(f"{paso} en {tabla_origen} con rangos pendientes. Se reanudará en la próxima ejecución", flush=True)
+
+
+### RECORRIDO POR BLOQUES FÍSICOS ###
+#Para tablas sin clave de fila: en lugar de paginar por clave se recorre el heap por fragmentos de bloques consecutivos
+#[inicio, fin) con un TID Range Scan (ctid >= '(inicio,0)' AND ctid < '(fin,0)'), que lee solo esos bloques y no
+#ordena, y cada fragmento se actualiza por ctid en su propia transacción. El diario guarda el siguiente bloque y el
+#último bloque del recorrido, fijado al empezar, así que las versiones nuevas que los UPDATE añaden al final de la
+#tabla no se vuelven a leer. Una fila actualizada que PostgreSQL coloque en un bloque aún no recorrido tampoco: la
+#escritura devuelve los ctid nuevos y esas filas se saltan al leer su bloque (salvo si se reanuda tras una
+#interrupción, porque esos ctid solo se guardan en memoria). Los rangos de NUM_RANGOS son rangos de bloques
+def recorrido_por_bloques(cursor, tabla_origen):
+    if not hasattr(DIALECTO, "consulta_fragmento"):
+        return False
+    return RECORRIDO_POR_BLOQUES or catalogo.clave_tabla(catalogo.tabla_catalogo(DIALECTO, cursor, tabla_origen)) is None
+
+
+def rangos_bloques(cursor, tabla_origen, num_rangos):
+    #Rangos [inicio, fin) de bloques del mismo tamaño, que cubren los bloques actuales de la tabla
+    bloques = DIALECTO.bloques_tabla(cursor, tabla_origen)
+    limites = sorted({bloques * i // num_rangos for i in range(num_rangos + 1)})
+    return [(limites[i], limites[i + 1]) for i in range(len(limites) - 1)]
+
+
+def bloque_ctid(ctid):
+    #Número de bloque de un ctid en su forma de texto '(bloque,tupla)'
+    return int(ctid[1:].split(",", 1)[0])
+
+
+def escribir_fragmento(cursor, tabla_origen, columnas, valores, inicio, fin):
+    #Aplica un fragmento ya anonimizado (por columnas: ctid seguido de las columnas) según MODO_ESCRITURA y devuelve
+    #los ctid de las versiones nuevas de las filas. No hace commit
+    if MODO_ESCRITURA != "fila":
+        return DIALECTO.aplicar_fragmento(cursor, tabla_origen, columnas, valores, inicio, fin)
+    set_clause = ", ".join([f"{col} = %s" for col in columnas])
+    nuevos = []
+    for fila in filas_de_columnas(valores):
+        cursor.execute(f"UPDATE {tabla_origen} SET {set_clause} WHERE ctid = %s RETURNING ctid;", list(fila[1:]) + [fila[0]])
+        nuevos.extend(ctid for ctid, in cursor.fetchall())
+    return nuevos
+
+
+def recorrer_por_bloques(cursor, conn, tabla_origen, clave_inicial, columnas, transformar, rango=None, escribir=None):
+    #Lee cada fragmento (ctid + columnas), obtiene las columnas a escribir con transformar(filas, invalidos) y las escribe
+    #con escribir(valores, inicio, fin) (por defecto, por ctid en la propia tabla), que devuelve los ctid nuevos de las
+    #filas escritas en la propia tabla o None. Los fragmentos empiezan con los bloques de TAM_PAGINA_MINIMA filas y
+    #después se ajustan a las filas por bloque y el ancho observados.
+    #Devuelve la clave guardada en el diario, (siguiente bloque, último bloque), y si el recorrido ha terminado
+    escribir = escribir or (lambda valores, inicio, fin: escribir_fragmento(cursor, tabla_origen, columnas, valores, inicio, fin))
+    bloques_tabla = DIALECTO.bloques_tabla(cursor, tabla_origen)
+    if clave_inicial:
+        inicio, fin = clave_inicial
+    elif rango is not None:
+        inicio, fin = rango
+    else:
+        inicio, fin = 0, bloques_tabla
+    clave_actual = clave_inicial if clave_inicial else None
+    filas_por_bloque = max(1, obtener_filas_estimadas(cursor, tabla_origen) // max(1, bloques_tabla))
+    bloques = max(1, TAM_PAGINA_MINIMA // filas_por_bloque)
+    exito = True
+    invalidos = {}
+    movidas = {} #bloque aún no recorrido -> ctid de las filas ya escritas que se han movido a él
+
+    try:
+        while inicio < fin:
+            siguiente = min(inicio + bloques, fin)
+            consulta, parametros = DIALECTO.consulta_fragmento(tabla_origen, columnas, inicio, siguiente)
+            tiempos = nueva_pagina()
+            with fase(tiempos, "lectura"):
+                cursor.execute(consulta, parametros)
+                filas = cursor.fetchall()
+                ya_escritas = set().union(*(movidas.pop(b, ()) for b in range(inicio, siguiente)))
+                if ya_escritas:
+                    filas = [fila for fila in filas if fila[0] not in ya_escritas]
+            if filas:
+                with fase(tiempos, "transformacion"):
+                    valores_a_escribir = transformar(filas, invalidos)
+                with fase(tiempos, "escritura"):
+                    nuevos = escribir(valores_a_escribir, inicio, siguiente) if num_filas(valores_a_escribir) else None
+                    for ctid in nuevos or ():
+                        if siguiente <= bloque_ctid(ctid) < fin:
+                            movidas.setdefault(bloque_ctid(ctid), set()).add(ctid)
+            with fase(tiempos, "commit"):
+                conn.commit()
+            if filas:
+                ancho_fila = ancho_medio_filas(filas)
+                registrar_pagina(tabla_origen, tiempos, len(filas), ancho_fila * len(filas))
+                #El siguiente fragmento se ajusta a las filas por bloque y al ancho observados en este
+                filas_por_bloque = max(1, len(filas) // (siguiente - inicio))
+                bloques = max(1, (tam_pagina_efectivo(ancho_fila) or TAM_PAGINA) // filas_por_bloque)
+            else:
+                bloques *= 2 #Bloques vacíos: el siguiente fragmento abarca más
+
+            inicio = siguiente
+            clave_actual = (inicio, fin) #Fragmentos confirmados hasta el bloque inicio
+            guardar_progreso(tabla_origen, clave_actual)
+
+    except Exception as e:
+        print(f"Error en tabla {tabla_origen} en el bloque {inicio}: {e}", flush=True)
+        conn.rollback()
+        guardar_progreso(tabla_origen, clave_actual)
+        exito = False
+    finally:
+        informar_invalidos(tabla_origen, invalidos)
+
+    return clave_actual, exito
+
+
+def reordenar_por_bloques(cursor, conn, tabla_origen, clave_inicial, columnas, transformar, rango=None):
+    #Recorrido por bloques de una operación en el sitio: el paso termina con el último fragmento
+    clave_actual, exito = recorrer_por_bloques(cursor, conn, tabla_origen, clave_inicial, columnas, transformar, rango)
+    if exito:
+        terminar_paso(tabla_origen)
+    return clave_actual
+
+
+def transformacion_valores(columnas, transformar):
+    #transformar de recorrer_por_bloques para las operaciones de TRANSFORMACIONES_VALOR: solo las filas que cambian
+    def transformar_fragmento(filas, invalidos):
+        valores_a_escribir, claves, originales, invalidas = transformar_pagina(filas, 1, transformar)
+        for columna, valores, posiciones_invalidas in zip(columnas, originales, invalidas):
+            registrar_invalidos(invalidos, columna, claves, valores, posiciones_invalidas)
+        return valores_a_escribir
+    return transformar_fragmento
+
+
+def transformacion_fusionada(operaciones, columnas):
+    #transformar de recorrer_por_bloques con todas las operaciones de la tabla a la vez (ver anonimizar_pagina)
+    def transformar_fragmento(filas, invalidos):
+        columnas_pagina = ["ctid"] + list(columnas)
+        valores = dict(zip(columnas_pagina, columnas_de_filas(filas, range(len(columnas_pagina)))))
+        anonimizar_pagina(valores, operaciones, ["ctid"], invalidos)
+        return [valores[col] for col in columnas_pagina]
+    return transformar_fragmento
+
+
+### MÉTODOS DE ANONIMIZACIÓN ###
+def eliminar_columnas(cursor, conn, tabla_origen, *columnas):
+    #Elimino las columnas seleccionadas de la tabla
+    for columna in columnas:
+        try:
+            cursor.execute(f"ALTER TABLE {tabla_origen} DROP COLUMN {columna};")
+            catalogo.quitar_columnas(tabla_origen, [columna])
+        except Exception as e:
+            print(f"Error en tabla {tabla_origen} al eliminar la columna {columna}. Revisar si existía previamente. {e}", flush=True)
+    conn.commit()
+
+
+def registrar_invalidos(invalidos, columna, claves, valores, posiciones):
+    #Acumula por columna el número de valores que no se han podido transformar y unos pocos ejemplos con su clave,
+    #que se escriben en el log al terminar la tabla en lugar de un mensaje por valor
+    if len(posiciones) == 0:
+        return
+    total, ejemplos = invalidos.get(columna, (0, []))
+    for i in posiciones[:MAX_EJEMPLOS_INVALIDOS - len(ejemplos)]:
+        ejemplos.append((tuple(clave[i] for clave in claves), valores[i]))
+    invalidos[columna] = (total + len(posiciones), ejemplos)
+
+
+def informar_invalidos(tabla_origen, invalidos):
+    for columna, (total, ejemplos) in invalidos.items():
+        print(f"Tabla {tabla_origen}, columna {columna}: {total} valores inválidos sin transformar. Ejemplos (clave, valor): {ejemplos}", flush=True)
+
+
+def transformar_en_streaming(cursor, conn, tabla_origen, clave_inicial, columnas, transformar):
+    #Recorre la tabla en streaming (lectura por lotes del dialecto) y reescribe cada valor con transformar(valor).
+    #Se leen y escriben lotes de TAM_LOTE filas con commit por lote, así que la memoria no depende del tamaño de la tabla
+    if recorrido_por_bloques(cursor, tabla_origen):
+        return reordenar_por_bloques(cursor, conn, tabla_origen, clave_inicial, columnas, transformacion_valores(columnas, transformar))
+
+    columnas_clave = obtener_columnas_clave(cursor, tabla_origen)
+    num_claves = len(columnas_clave)
+    clave_actual = clave_inicial if clave_inicial else None
+    exito = True
+
+    tupla_clave = ", ".join(columnas_clave)
+    orden = ", ".join([f"{col} ASC" for col in columnas_clave])
+    condicion = ""
+    parametros = []
+    if clave_actual is not None:
+        condicion = f"WHERE ({tupla_clave}) > ({', '.join(['%s'] * num_claves)})"
+        parametros = list(clave_actual)
+
+    consulta = f"""
+        SELECT {tupla_clave}, {", ".join(columnas)} FROM {tabla_origen}
+        {condicion}
+        ORDER BY {orden};
+    """
+    invalidos = {}
+    lotes = DIALECTO.leer_en_lotes(conn, f"streaming_{tabla_origen}", consulta, parametros, TAM_LOTE)
+    try:
+        while True:
+            tiempos = nueva_pagina()
+            with fase(tiempos, "lectura"):
+                filas = next(lotes, None)
+            if filas is None:
+                break
+
+            #Cada columna del lote se transforma de una vez con el núcleo por lotes (transformaciones.py)
+            with fase(tiempos, "transformacion"):
+                valores_a_escribir, claves, originales, invalidas = transformar_pagina(filas, num_claves, transformar)
+                for columna, valores, posiciones_invalidas in zip(columnas, originales, invalidas):
+                    registrar_invalidos(invalidos, columna, claves, valores, posiciones_invalidas)
+
+            with fase(tiempos, "escritura"):
+                if num_filas(valores_a_escribir):
+                    escribir_pagina(cursor, tabla_origen, columnas_clave, columnas, valores_a_escribir)
+            with fase(tiempos, "commit"):
+                conn.commit()
+            registrar_pagina(tabla_origen, tiempos, len(filas), ancho_medio_filas(filas) * len(filas))
+
+            clave_actual = tuple(filas[-1][:num_claves]) #Última clave del lote ya confirmado
+            guardar_progreso(tabla_origen, clave_actual)
+
+    except Exception as e:
+        print(f"Error en tabla {tabla_origen} en la clave {clave_actual}: {e}", flush=True)
+        conn.rollback()
+        guardar_progreso(tabla_origen, clave_actual)
+        exito = False
+    finally:
+        lotes.close()
+        informar_invalidos(tabla_origen, invalidos)
+
+    if exito:
+        terminar_paso(tabla_origen)
+
+    return clave_actual
+
+
+def reordenar_grupos_ip(cursor, conn, tabla_origen, clave_inicial, *columnas):
+    return transformar_en_streaming(cursor, conn, tabla_origen, clave_inicial, columnas, reordenar_octetos_ipv4)
+
+
+def reordenar_antes_arroba(cursor, conn, tabla_origen, clave_inicial, *columnas):
+    return transformar_en_streaming(cursor, conn, tabla_origen, clave_inicial, columnas, reordenar_locales_email)
+
+
+def seudonimizar(cursor, conn, tabla_origen, clave_inicial, *columnas):
+    return transformar_en_streaming(cursor, conn, tabla_origen, clave_inicial, columnas, seudonimizar_columna)
+
+
+def leer_paginas(tabla_origen, columnas_clave, columnas, clave_inicial, rango=None):
+    #Generador de páginas (tiempos, filas) de la clave y las columnas, con su propia conexión. Lo recorre el hilo
+    #lector de canalizar_paginas mientras la conexión principal escribe páginas anteriores. Cada lectura se confirma
+    #para no mantener abierta una transacción (ni su snapshot) durante toda la tabla
+    conn, cursor = conexion()
+    if conn is None:
+        raise RuntimeError("no se pudo abrir la conexión de lectura")
+    try:
+        clave_actual = clave_inicial
+        ancho_fila = medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_actual, rango)
+        while True:
+            consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_actual, tam_pagina_efectivo(ancho_fila), rango, columnas)
+            tiempos = nueva_pagina()
+            with fase(tiempos, "lectura"):
+                cursor.execute(consulta, parametros)
+                filas = cursor.fetchall()
+                conn.commit()
+            if not filas:
+                return
+            ancho_fila = ancho_medio_filas(filas) #La página siguiente se ajusta al ancho observado en esta
+            clave_actual = tuple(filas[-1][:len(columnas_clave)])
+            yield tiempos, filas
+    finally:
+        conn.close()
+
+
+def reordenar_en_canalizacion(cursor, conn, tabla_origen, columnas_clave, columnas, clave_inicial, rango, reordenar):
+    #Bucle de las reordenaciones por bloques con CANALIZAR_PAGINAS: la lectura y reordenar(filas, número de columnas
+    #de la clave) van en sus propios hilos, y aquí se escribe, se confirma y se anota cada página en orden.
+    #El diario solo avanza hasta la última página confirmada por esta conexión
+    num_claves = len(columnas_clave)
+    estado = {"clave": clave_inicial}
+
+    def transformar(tiempos, filas):
+        with fase(tiempos, "transformacion"):
+            return reordenar(filas, num_claves)
+
+    def escribir(tiempos, filas, valores_a_escribir):
+        with fase(tiempos, "escritura"):
+            escribir_pagina(cursor, tabla_origen, columnas_clave, columnas, valores_a_escribir)
+        with fase(tiempos, "commit"):
+            conn.commit()
+        registrar_pagina(tabla_origen, tiempos, len(filas), ancho_medio_filas(filas) * len(filas))
+        estado["clave"] = tuple(filas[-1][:num_claves]) #Última clave de la página ya confirmada
+        guardar_progreso(tabla_origen, estado["clave"])
+
+    exito = True
+    try:
+        canalizar_paginas(leer_paginas(tabla_origen, columnas_clave, columnas, clave_inicial, rango), transformar, escribir)
+    except Exception as e:
+        print(f"Error en tabla {tabla_origen} desde la clave {estado['clave']}: {e}", flush=True)
+        conn.rollback()
+        guardar_progreso(tabla_origen, estado["clave"])
+        exito = False
+
+    if exito:
+        terminar_paso(tabla_origen)
+
+    return estado["clave"]
+
+
+def reordenar_columna_en_bloques(cursor, conn, tabla_origen, clave_inicial, *columnas, rango=None):
+    if recorrido_por_bloques(cursor, tabla_origen):
+        if debe_dividirse(cursor, tabla_origen, rango):
+            return reordenar_por_rangos(cursor, conn, tabla_origen, reordenar_columna_en_bloques, columnas)
+        return reordenar_por_bloques(cursor, conn, tabla_origen, clave_inicial, columnas,
+                                     lambda filas, _: reordenar_pagina_columnas(filas, 1), rango)
+    if ALCANCE_REORDENACION == "global":
+        return reordenar_global(cursor, conn, tabla_origen, clave_inicial, [[col] for col in columnas])
+    if debe_dividirse(cursor, tabla_origen, rango):
+        return reordenar_por_rangos(cursor, conn, tabla_origen, reordenar_columna_en_bloques, columnas)
+
+    columnas_clave = obtener_columnas_clave(cursor, tabla_origen)
+    exito = True
+
+    if MODO_EJECUCION == "sql":
+        #Cada columna se permuta de forma independiente
+        return reordenar_en_servidor(cursor, conn, tabla_origen, columnas_clave, clave_inicial, [[col] for col in columnas], rango)
+
+    clave_actual = clave_inicial if clave_inicial else None
+    if CANALIZAR_PAGINAS:
+        return reordenar_en_canalizacion(cursor, conn, tabla_origen, columnas_clave, columnas, clave_actual, rango,
+                                         reordenar_pagina_columnas)
+    #Solo se leen la clave y las columnas a reordenar, en ese orden
+    ancho_fila = None
+
+    while True:
+        try:
+            if ancho_fila is None:
+                ancho_fila = medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_actual, rango)
+            consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_actual, tam_pagina_efectivo(ancho_fila), rango, columnas)
+            tiempos = nueva_pagina()
+            with fase(tiempos, "lectura"):
+                cursor.execute(consulta, parametros)
+                filas = cursor.fetchall()
+            if not filas:
+                break
+            ancho_fila = ancho_medio_filas(filas) #La página siguiente se ajusta al ancho observado en esta
+
+            #Página por columnas: cada columna se reordena con su propia permutación
+            with fase(tiempos, "transformacion"):
+                valores_a_escribir = reordenar_pagina_columnas(filas, len(columnas_clave))
+            with fase(tiempos, "escritura"):
+                escribir_pagina(cursor, tabla_origen, columnas_clave, columnas, valores_a_escribir)
+            with fase(tiempos, "commit"):
+                conn.commit()
+            registrar_pagina(tabla_origen, tiempos, len(filas), ancho_fila * len(filas))
+
+            clave_actual = tuple(filas[-1][:len(columnas_clave)]) #Última clave de la página ya confirmada
+            guardar_progreso(tabla_origen, clave_actual)
+
+        except Exception as e:
+            print(f"Error en tabla {tabla_origen} desde la clave {clave_actual}: {e}", flush=True)
+            conn.rollback()
+            guardar_progreso(tabla_origen, clave_actual)
+            exito = False
+            break
+
+    if exito:
+        terminar_paso(tabla_origen)
+
+    return clave_actual
+
+
+def reordenar_bloques_columna_en_bloques(cursor, conn, tabla_origen, clave_inicial, *columnas, rango=None):
+    if recorrido_por_bloques(cursor, tabla_origen):
+        if debe_dividirse(cursor, tabla_origen, rango):
+            return reordenar_por_rangos(cursor, conn, tabla_origen, reordenar_bloques_columna_en_bloques, columnas)
+        return reordenar_por_bloques(cursor, conn, tabla_origen, clave_inicial, columnas,
+                                     lambda filas, _: reordenar_pagina_bloque(filas, 1), rango)
+    if ALCANCE_REORDENACION == "global":
+        return reordenar_global(cursor, conn, tabla_origen, clave_inicial, [list(columnas)])
+    if debe_dividirse(cursor, tabla_origen, rango):
+        return reordenar_por_rangos(cursor, conn, tabla_origen, reordenar_bloques_columna_en_bloques, columnas)
+
+    columnas_clave = obtener_columnas_clave(cursor, tabla_origen)
+    clave_actual = clave_inicial if clave_inicial else None
+    exito = True
+
+    if MODO_EJECUCION == "sql":
+        #Todas las columnas se permutan juntas como un único bloque
+        return reordenar_en_servidor(cursor, conn, tabla_origen, columnas_clave, clave_inicial, [list(columnas)], rango)
+    if CANALIZAR_PAGINAS:
+        return reordenar_en_canalizacion(cursor, conn, tabla_origen, columnas_clave, columnas, clave_actual, rango,
+                                         reordenar_pagina_bloque)
+
+    #Solo se leen la clave y las columnas a reordenar, en ese orden
+    ancho_fila = None
+
+    while True:
+        try:
+            if ancho_fila is None:
+                ancho_fila = medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_actual, rango)
+            consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_actual, tam_pagina_efectivo(ancho_fila), rango, columnas)
+            tiempos = nueva_pagina()
+            with fase(tiempos, "lectura"):
+                cursor.execute(consulta, parametros)
+                filas = cursor.fetchall()
+            if not filas:
+                break
+            ancho_fila = ancho_medio_filas(filas) #La página siguiente se ajusta al ancho observado en esta
+
+            #Página por columnas: una única permutación para todo el bloque de columnas
+            with fase(tiempos, "transformacion"):
+                valores_a_escribir = reordenar_pagina_bloque(filas, len(columnas_clave))
+            with fase(tiempos, "escritura"):
+                escribir_pagina(cursor, tabla_origen, columnas_clave, columnas, valores_a_escribir)
+            with fase(tiempos, "commit"):
+                conn.commit()
+            registrar_pagina(tabla_origen, tiempos, len(filas), ancho_fila * len(filas))
+            clave_actual = tuple(filas[-1][:len(columnas_clave)]) #Última clave de la página ya confirmada
+            guardar_progreso(tabla_origen, clave_actual)
+
+        except Exception as e:
+            print(f"Error en tabla {tabla_origen} en la clave {clave_actual}: {e}", flush=True)
+            conn.rollback()
+            guardar_progreso(tabla_origen, clave_actual)
+            exito = False
+            break
+
+    if exito:
+        terminar_paso(tabla_origen)
+
+    return clave_actual
+
+
+### REORDENACIÓN GLOBAL CON VOLCADO A DISCO ###
+def reordenar_global(cursor, conn, tabla_origen, clave_inicial, grupos):
+    #Permuta cada grupo de columnas sobre toda la tabla sin cargarla en memoria. Primera pasada: cada página se vuelca
+    #a disco como un tramo ordenado por claves aleatorias (uno por grupo). Segunda pasada: se recorren las claves de
+    #la tabla en orden y cada página recibe los siguientes valores de la mezcla de los tramos.
+    #Los tramos se conservan hasta terminar: al reanudar se saltan tantos valores como filas ya escritas
+    columnas_clave = obtener_columnas_clave(cursor, tabla_origen)
+    if MODO_EJECUCION == "sql":
+        return reordenar_en_servidor(cursor, conn, tabla_origen, columnas_clave, clave_inicial, grupos)
+
+    directorio = os.path.join(DIRECTORIO_REORDENACION, f"reordenacion_{tabla_origen}")
+    columnas = [col for grupo in grupos for col in grupo]
+    num_claves = len(columnas_clave)
+    clave_actual = clave_inicial if clave_inicial else None
+
+    try:
+        if not tramos_completos(directorio):
+            #Sin la primera pasada terminada todavía no se ha escrito nada en la tabla: se empieza de cero
+            preparar_directorio(directorio)
+            clave_actual = None
+            clave_lectura = None
+            ancho_fila = medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_lectura)
+            numero = 0
+            while True:
+                consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_lectura, tam_pagina_efectivo(ancho_fila), columnas=columnas)
+                tiempos = nueva_pagina()
+                with fase(tiempos, "lectura"):
+                    cursor.execute(consulta, parametros)
+                    filas = cursor.fetchall()
+                if not filas:
+                    break
+                ancho_fila = ancho_medio_filas(filas)
+
+                with fase(tiempos, "volcado"):
+                    inicio = num_claves
+                    for g, grupo in enumerate(grupos):
+                        escribir_tramo(ruta_tramo(directorio, g, numero), columnas_de_filas(filas, range(inicio, inicio + len(grupo))))
+                        inicio += len(grupo)
+                registrar_pagina(tabla_origen, tiempos, len(filas), ancho_fila * len(filas))
+                numero += 1
+                clave_lectura = tuple(filas[-1][:num_claves])
+            conn.commit()
+            marcar_tramos_completos(directorio)
+            print(f"Tabla {tabla_origen}: {numero} tramos volcados en {directorio}", flush=True)
+
+        flujos = [mezclar_tramos(tramos_grupo(directorio, g)) for g in range(len(grupos))]
+        ancho_fila = medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_actual)
+        if clave_actual is not None:
+            #Reanudación: las filas hasta la última clave confirmada ya recibieron sus valores
+            tupla_clave = ", ".join(columnas_clave)
+            cursor.execute(f"SELECT count(*) FROM {tabla_origen} WHERE ({tupla_clave}) <= ({', '.join(['%s'] * num_claves)});", list(clave_actual))
+            escritas = cursor.fetchone()[0]
+            flujos = [islice(flujo, escritas, None) for flujo in flujos]
+
+        while True:
+            consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_actual, tam_pagina_efectivo(ancho_fila), columnas=[])
+            tiempos = nueva_pagina()
+            with fase(tiempos, "lectura"):
+                cursor.execute(consulta, parametros)
+                claves = cursor.fetchall()
+            if not claves:
+                break
+
+            #La mezcla de los tramos cuenta como transformación
+            with fase(tiempos, "transformacion"):
+                valores = [list(islice(flujo, len(claves))) for flujo in flujos]
+                if any(len(valores_grupo) != len(claves) for valores_grupo in valores):
+                    raise RuntimeError("la tabla tiene más filas que cuando se volcaron los tramos")
+                valores_pagina = columnas_de_filas(claves, range(num_claves))
+                for grupo, valores_grupo in zip(grupos, valores):
+                    valores_pagina += columnas_de_filas(valores_grupo, range(len(grupo)))
+            with fase(tiempos, "escritura"):
+                escribir_pagina(cursor, tabla_origen, columnas_clave, columnas, valores_pagina)
+            with fase(tiempos, "commit"):
+                conn.commit()
+            registrar_pagina(tabla_origen, tiempos, len(claves), (ancho_fila or 0) * len(claves))
+
+            clave_actual = tuple(claves[-1]) #Última clave de la página ya confirmada
+            guardar_progreso(tabla_origen, clave_actual)
+
+    except Exception as e:
+        print(f"Error en tabla {tabla_origen} en la clave {clave_actual}: {e}", flush=True)
+        conn.rollback()
+        guardar_progreso(tabla_origen, clave_actual)
+        return clave_actual
+
+    borrar_tramos(directorio)
+    terminar_paso(tabla_origen)
+    return clave_actual
+
+
+### OPERACIONES FUSIONADAS ###
+def anonimizar_pagina(valores, operaciones, columnas_clave, invalidos):
+    #Aplica todas las operaciones a una página en memoria. valores es un diccionario columna -> array de objetos
+    #con los valores de la página (en el orden de la clave, ver transformaciones.py) que se modifica en el sitio.
+    #Los valores que no se pueden transformar se acumulan en invalidos (ver registrar_invalidos)
+    for operacion, columnas in operaciones:
+        if operacion in TRANSFORMACIONES_VALOR:
+            transformar = TRANSFORMACIONES_VALOR[operacion]
+            claves = [valores[col] for col in columnas_clave]
+            for columna in columnas:
+                valores[columna], posiciones_invalidas = transformar(valores[columna])
+                registrar_invalidos(invalidos, columna, claves, valores[columna], posiciones_invalidas)
+        elif operacion == "reordenar_columna_en_bloques":
+            valores.update(zip(columnas, permutar_columnas([valores[col] for col in columnas])))
+        elif operacion == "reordenar_bloques_columna_en_bloques":
+            #Una única permutación para todo el grupo de columnas
+            valores.update(zip(columnas, permutar_bloque([valores[col] for col in columnas])))
+
+
+def anonimizar_tabla_fusionada(cursor, conn, tabla_origen, clave_inicial, *operaciones, rango=None):
+    #Aplica todas las operaciones de la tabla con una sola lectura y una sola escritura por página:
+    #primero se eliminan las columnas y después cada página se transforma en memoria y se escribe una vez
+    if rango is None:
+        for operacion, columnas in operaciones:
+            if operacion == "eliminar_columnas":
+                eliminar_columnas(cursor, conn, tabla_origen, *columnas)
+    operaciones = [(operacion, columnas) for operacion, columnas in operaciones if operacion != "eliminar_columnas"]
+    if not operaciones:
+        return clave_inicial
+
+    if debe_dividirse(cursor, tabla_origen, rango):
+        return reordenar_por_rangos(cursor, conn, tabla_origen, anonimizar_tabla_fusionada, operaciones)
+
+    columnas = list(dict.fromkeys(col for _, columnas_operacion in operaciones for col in columnas_operacion))
+    if recorrido_por_bloques(cursor, tabla_origen):
+        return reordenar_por_bloques(cursor, conn, tabla_origen, clave_inicial, columnas,
+                                     transformacion_fusionada(operaciones, columnas), rango)
+    columnas_clave = obtener_columnas_clave(cursor, tabla_origen)
+    clave_actual = clave_inicial if clave_inicial else None
+    exito = True
+    invalidos = {}
+    ancho_fila = None
+
+    while True:
+        try:
+            if ancho_fila is None:
+                ancho_fila = medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_actual, rango)
+            consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_actual, tam_pagina_efectivo(ancho_fila), rango, columnas)
+            tiempos = nueva_pagina()
+            with fase(tiempos, "lectura"):
+                cursor.execute(consulta, parametros)
+                filas = cursor.fetchall()
+            if not filas:
+                break
+            ancho_fila = ancho_medio_filas(filas) #La página siguiente se ajusta al ancho observado en esta
+
+            #Representación por columnas de la página: clave seguida de las columnas a anonimizar
+            with fase(tiempos, "transformacion"):
+                columnas_pagina = columnas_clave + columnas
+                valores = dict(zip(columnas_pagina, columnas_de_filas(filas, range(len(columnas_pagina)))))
+                anonimizar_pagina(valores, operaciones, columnas_clave, invalidos)
+            with fase(tiempos, "escritura"):
+                escribir_pagina(cursor, tabla_origen, columnas_clave, columnas, [valores[col] for col in columnas_pagina])
+            with fase(tiempos, "commit"):
+                conn.commit()
+            registrar_pagina(tabla_origen, tiempos, len(filas), ancho_fila * len(filas))
+
+            clave_actual = tuple(filas[-1][:len(columnas_clave)]) #Última clave de la página ya confirmada
+            guardar_progreso(tabla_origen, clave_actual)
+
+        except Exception as e:
+            print(f"Error en tabla {tabla_origen} en la clave {clave_actual}: {e}", flush=True)
+            conn.rollback()
+            guardar_progreso(tabla_origen, clave_actual)
+            exito = False
+            break
+
+    informar_invalidos(tabla_origen, invalidos)
+    if exito:
+        terminar_paso(tabla_origen)
+
+    return clave_actual
+
+
+### SUSPENSIÓN DE ÍNDICES Y TRIGGERS ###
+def archivo_indices(tabla_origen):
+    return f"indices_{tabla_origen}.json"
+
+
+def suspender_indices(cursor, conn, tabla_origen):
+    #Las definiciones se guardan en indices_<tabla>.json antes de borrar nada, así una ejecución interrumpida
+    #las encuentra y las restaura al terminar la tabla
+    archivo = archivo_indices(tabla_origen)
+    if os.path.exists(archivo):
+        print(f"Índices y triggers de {tabla_origen} ya suspendidos en una ejecución anterior ({archivo})", flush=True)
+        return
+    definiciones = DIALECTO.obtener_indices_y_triggers(cursor, tabla_origen)
+    if not definiciones["indices"] and not definiciones["triggers"]:
+        conn.commit()
+        return
+    archivo_temporal = f"{archivo}.tmp"
+    with open(archivo_temporal, "w") as f:
+        json.dump(definiciones, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(archivo_temporal, archivo)
+
+    DIALECTO.suspender_indices_y_triggers(cursor, tabla_origen, definiciones)
+    conn.commit()
+    print(f"Tabla {tabla_origen}: suspendidos {len(definiciones['indices'])} índices y {len(definiciones['triggers'])} triggers", flush=True)
+
+
+def construir_indice_en_proceso(tabla_origen, nombres, sentencia):
+    #Cada sentencia de índices (ver sentencias_indices del dialecto) se ejecuta en su propia conexión, en autocommit
+    #para no dejar transacciones abiertas
+    conn, cursor = conexion()
+    try:
+        conn.autocommit = True
+        DIALECTO.preparar_construccion_indices(cursor, MEMORIA_INDICES_MB)
+        if any(DIALECTO.indice_pendiente(cursor, tabla_origen, nombre) for nombre in nombres):
+            inicio = time.perf_counter()
+            cursor.execute(sentencia)
+            print(f"Índices {', '.join(nombres)} de {tabla_origen} reconstruidos en {time.perf_counter() - inicio:.2f} segundos", flush=True)
+        return True
+    except Exception as e:
+        print(f"Error al reconstruir los índices {', '.join(nombres)} de la tabla {tabla_origen}: {e}", flush=True)
+        return False
+    finally:
+        conn.close()
+
+
+def restaurar_indices(cursor, conn, tabla_origen):
+    #Reconstruye los índices suspendidos repartidos entre PROCESOS_INDICES conexiones (en MySQL, con una sola sentencia
+    #por tabla) y reactiva los triggers. El fichero de definiciones solo se borra si se han reconstruido todos
+    archivo = archivo_indices(tabla_origen)
+    if not os.path.exists(archivo):
+        return
+    with open(archivo) as f:
+        definiciones = json.load(f)
+
+    columnas = set(obtener_columnas(cursor, tabla_origen))
+    vigentes = []
+    for nombre, sentencia, columnas_indice in definiciones["indices"]:
+        if set(columnas_indice) <= columnas:
+            vigentes.append([nombre, sentencia, columnas_indice])
+        else:
+            print(f"Índice {nombre} de {tabla_origen} descartado: usa columnas eliminadas", flush=True)
+    tareas = [(tabla_origen, nombres, sentencia) for nombres, sentencia in DIALECTO.sentencias_indices(tabla_origen, vigentes)]
+    conn.commit() #Sin transacción abierta sobre la tabla mientras se construyen los índices
+
+    construidos = []
+
+    def al_terminar(indice, construido):
+        if construido:
+            construidos.append(indice)
+
+    ejecutar_en_paralelo(tareas, PROCESOS_INDICES, construir_indice_en_proceso, RUTA_LOGS, al_terminar)
+    DIALECTO.reactivar_triggers(cursor, tabla_origen, definiciones)
+    conn.commit()
+
+    if len(construidos) == len(tareas):
+        os.remove(archivo)
+    else:
+        print(f"Tabla {tabla_origen}: quedan índices sin reconstruir en {archivo}. Se reintentará en la próxima ejecución", flush=True)
+
+
+### REESCRITURA E INTERCAMBIO DE TABLAS ###
+def copia_reanudable(cursor, conn, tabla_nueva, columnas_clave, clave_actual):
+    #Al reanudar, la tabla nueva puede tener copiada una página posterior a la última clave del diario (caída entre el
+    #commit de la página y su anotación), o estar vacía: PostgreSQL vacía las tablas UNLOGGED al recuperarse de una
+    #caída. Se borran las filas posteriores a la clave y se comprueba que la fila de la clave sigue copiada.
+    #Sin clave de fila (copia por bloques) no se puede comprobar y la copia vuelve a empezar
+    if not columnas_clave:
+        return False
+    tupla_clave = ", ".join(columnas_clave)
+    marcadores = ", ".join(["%s"] * len(columnas_clave))
+    try:
+        cursor.execute(f"DELETE FROM {tabla_nueva} WHERE ({tupla_clave}) > ({marcadores});", list(clave_actual))
+        cursor.execute(f"SELECT 1 FROM {tabla_nueva} WHERE ({tupla_clave}) = ({marcadores}) LIMIT 1;", list(clave_actual))
+        copiada = cursor.fetchone() is not None
+        conn.commit()
+        return copiada
+    except Exception:
+        conn.rollback() #La tabla nueva no existe
+        return False
+
+
+def reescribir_tabla(cursor, conn, tabla_origen, clave_inicial, *operaciones):
+    #Copia la tabla página a página en una tabla nueva sin índices, sin las columnas eliminadas y con el resto de
+    #operaciones aplicadas en memoria, y al terminar la intercambia por la original con sus índices y restricciones.
+    #El diario guarda la última clave copiada: al reanudar se sigue llenando la misma tabla nueva si conserva lo
+    #copiado hasta esa clave (ver copia_reanudable) y si no se empieza de nuevo
+    tabla_nueva = f"{tabla_origen}_anonimizada"
+    total_columnas = obtener_columnas(cursor, tabla_origen)
+    #Sin clave de fila la tabla se copia por bloques físicos (ver recorrer_por_bloques) y todas sus columnas son datos
+    por_bloques = recorrido_por_bloques(cursor, tabla_origen)
+    columnas_clave = [] if por_bloques else obtener_columnas_clave(cursor, tabla_origen)
+    eliminadas = {col for operacion, columnas in operaciones if operacion == "eliminar_columnas" for col in columnas}
+    for columna in sorted(eliminadas - set(total_columnas)):
+        print(f"Error en tabla {tabla_origen} al eliminar la columna {columna}. Revisar si existía previamente.", flush=True)
+    operaciones = [(operacion, columnas) for operacion, columnas in operaciones if operacion != "eliminar_columnas"]
+    columnas = [col for col in total_columnas if col not in eliminadas and col not in columnas_clave]
+    clave_actual = clave_inicial if clave_inicial else None
+    invalidos = {}
+
+    try:
+        if clave_actual is not None and not copia_reanudable(cursor, conn, tabla_nueva, columnas_clave, clave_actual):
+            print(f"Tabla {tabla_origen}: no se puede seguir llenando {tabla_nueva} desde la clave {clave_actual}. Se copia desde el principio", flush=True)
+            clave_actual = None
+        if clave_actual is None:
+            DIALECTO.crear_tabla_nueva(cursor, tabla_origen, tabla_nueva, [col for col in total_columnas if col in eliminadas])
+            conn.commit()
+
+        if por_bloques:
+            def copiar(valores, inicio, fin):
+                DIALECTO.cargar_columnas(cursor, tabla_nueva, columnas, valores[1:]) #Sin la columna del ctid
+            clave_actual, exito = recorrer_por_bloques(cursor, conn, tabla_origen, clave_actual, columnas,
+                                                       transformacion_fusionada(operaciones, columnas), escribir=copiar)
+            if not exito:
+                return clave_actual
+        else:
+            ancho_fila = medir_ancho_fila(cursor, tabla_origen, columnas_clave, columnas, clave_actual)
+            while True:
+                consulta, parametros = consulta_pagina(tabla_origen, columnas_clave, clave_actual, tam_pagina_efectivo(ancho_fila), columnas=columnas)
+                tiempos = nueva_pagina()
+                with fase(tiempos, "lectura"):
+                    cursor.execute(consulta, parametros)
+                    filas = cursor.fetchall()
+                if not filas:
+                    break
+                ancho_fila = ancho_medio_filas(filas) #La página siguiente se ajusta al ancho observado en esta
+
+                with fase(tiempos, "transformacion"):
+                    columnas_pagina = columnas_clave + columnas
+                    valores = dict(zip(columnas_pagina, columnas_de_filas(filas, range(len(columnas_pagina)))))
+                    anonimizar_pagina(valores, operaciones, columnas_clave, invalidos)
+                with fase(tiempos, "escritura"):
+                    DIALECTO.cargar_columnas(cursor, tabla_nueva, columnas_pagina, [valores[col] for col in columnas_pagina])
+                with fase(tiempos, "commit"):
+                    conn.commit()
+                registrar_pagina(tabla_origen, tiempos, len(filas), ancho_fila * len(filas))
+
+                clave_actual = tuple(filas[-1][:len(columnas_clave)]) #Última clave de la página ya copiada
+                guardar_progreso(tabla_origen, clave_actual)
+
+        DIALECTO.intercambiar_tabla(cursor, tabla_origen, tabla_nueva)
+        conn.commit()
+        catalogo.cargar_catalogo(DIALECTO, cursor, [tabla_origen]) #La tabla es otra, sin las columnas eliminadas
+        conn.commit()
+
+    except Exception as e:
+        print(f"Error en tabla {tabla_origen} en la clave {clave_actual}: {e}", flush=True)
+        conn.rollback()
+        guardar_progreso(tabla_origen, clave_actual)
+        return clave_actual
+    finally:
+        informar_invalidos(tabla_origen, invalidos)
+
+    terminar_paso(tabla_origen)
+    return clave_actual
+
+
+def operaciones_tabla(tabla_origen):
+    #Operaciones de anonimización de la tabla según el plan (tablas.csv), como lista de (operación, columnas)
+    return leer_plan(RUTA_TABLAS_ANONIMIZABLES).get(tabla_origen, [])
+
+
+def paso_repetible(operaciones):
+    #Al reanudar desde la última clave del diario puede repetirse el último lote confirmado (una caída entre el commit y
+    #la anotación). Reordenar otra vez filas ya reordenadas no deshace nada, pero seudonimizar en el sitio un valor ya
+    #seudonimizado da otro seudónimo, que deja de cruzar con el de las demás tablas. La reescritura lee siempre de la
+    #tabla original y al reanudar descarta lo copiado después de la última clave (ver copia_reanudable), así que
+    #puede repetirse
+    return REESCRIBIR_TABLAS or all(operacion != "seudonimizar" for operacion, _ in operaciones)
+
+
+def empezar_paso_no_repetible(tabla_origen, paso):
+    #Anota en el diario que el paso empieza, antes de su primera escritura. Si ya había empezado en una ejecución
+    #anterior no se reanuda y devuelve False
+    if diario.paso_iniciado(tabla_origen, paso):
+        print(f"Error: {paso} en {tabla_origen} empezó en una ejecución anterior y no se terminó. No se reanuda, porque las "
+              f"filas escritas después de la última clave anotada se seudonimizarían dos veces. Restaure la tabla y aparte "
+              f"{diario.ARCHIVO_DIARIO} para empezar de cero", flush=True)
+        return False
+    diario.anotar_paso_iniciado(tabla_origen, paso)
+    return True
+
+
+def aviso_tabla_con_errores(tabla_origen, operaciones):
+    #Los pasos no repetibles que empezaron y no terminaron no se reanudan (ver empezar_paso_no_repetible)
+    if any(diario.paso_iniciado(tabla_origen, paso) and not diario.paso_terminado(tabla_origen, paso) for paso in pasos_tabla(operaciones)):
+        return f"Tabla {tabla_origen} terminada con errores. No se reanudará hasta restaurarla y apartar el diario"
+    return f"Tabla {tabla_origen} terminada con errores. Se reanudará en la próxima ejecución"
+
+
+def seudonimiza_por_rangos_de_bloques(cursor, tabla_origen, operaciones):
+    #La pasada fusionada divide en rangos de bloques las tablas sin clave con NUM_RANGOS. Una fila que un rango mueve a
+    #un bloque de otro rango se transformaría otra vez allí, lo que no se admite si seudonimiza en el sitio
+    return (FUSIONAR_OPERACIONES and not paso_repetible(operaciones) and recorrido_por_bloques(cursor, tabla_origen)
+            and debe_dividirse(cursor, tabla_origen, None))
+
+
+def ejecutar_paso(cursor, conn, tabla_origen, paso, funcion, *argumentos, repetible=True):
+    #Ejecuta funcion(cursor, conn, tabla_origen, clave, *argumentos) como un paso del diario: se salta si ya terminó
+    #y si no se reanuda desde su última clave confirmada. Un paso no repetible (ver paso_repetible) no se reanuda
+    terminado, clave = iniciar_paso(tabla_origen, paso)
+    if terminado:
+        print(f"Saltando {paso} en {tabla_origen} porque ya terminó", flush=True)
+        return
+    if not repetible and not empezar_paso_no_repetible(tabla_origen, paso):
+        return
+    if clave is not None:
+        print(f"Reanudando {paso} en {tabla_origen} desde la clave {clave}", flush=True)
+    funcion(cursor, conn, tabla_origen, clave, *argumentos)
+
+
+def eliminar_columnas_paso(cursor, conn, tabla_origen, clave, *columnas):
+    #eliminar_columnas no pagina: el paso termina con su commit
+    eliminar_columnas(cursor, conn, tabla_origen, *columnas)
+    terminar_paso(tabla_origen)
+
+
+def pasos_tabla(operaciones):
+    #Pasos del diario de una tabla según el modo: uno por operación, o uno solo para la pasada fusionada o la reescritura
+    if REESCRIBIR_TABLAS:
+        return ["reescritura"]
+    if FUSIONAR_OPERACIONES:
+        return ["fusionada"]
+    return [nombre_paso(operacion, columnas) for operacion, columnas in operaciones]
+
+
+def pasadas_tabla(operaciones):
+    #Veces que la anonimización lee la tabla entera según el modo, para estimar el trabajo total del progreso.
+    #La reordenación global lee la tabla dos veces: al volcar los tramos y al escribir la mezcla
+    reordenaciones = [operacion for operacion, _ in operaciones if operacion != "eliminar_columnas"]
+    if REESCRIBIR_TABLAS:
+        return 1
+    if FUSIONAR_OPERACIONES:
+        return 1 if reordenaciones else 0
+    if ALCANCE_REORDENACION == "global" and MODO_EJECUCION == "python":
+        return sum(2 if operacion in ("reordenar_columna_en_bloques", "reordenar_bloques_columna_en_bloques") else 1
+                   for operacion in reordenaciones)
+    return len(reordenaciones)
+
+
+def anonimizar_tabla(cursor, conn, tabla_origen):
+    #Aplica a la tabla las operaciones de anonimización que le corresponden. Devuelve False si la tabla no tiene operaciones
+    #o no se pueden aplicar
+    operaciones = operaciones_tabla(tabla_origen)
+    if not operaciones:
+        return False
+    if seudonimiza_por_rangos_de_bloques(cursor, tabla_origen, operaciones):
+        print(f"Error: {tabla_origen} no tiene clave de fila y con NUM_RANGOS={NUM_RANGOS} se dividiría en rangos de bloques, "
+              f"que no se admiten con seudonimizar. Use NUM_RANGOS=1 o REESCRIBIR_TABLAS", flush=True)
+        return False
+    #La reescritura ya crea la tabla nueva sin índices
+    suspender = SUSPENDER_INDICES and not REESCRIBIR_TABLAS
+    if suspender:
+        suspender_indices(cursor, conn, tabla_origen)
+
+    if REESCRIBIR_TABLAS:
+        ejecutar_paso(cursor, conn, tabla_origen, "reescritura", reescribir_tabla, *operaciones)
+    elif FUSIONAR_OPERACIONES:
+        ejecutar_paso(cursor, conn, tabla_origen, "fusionada", anonimizar_tabla_fusionada, *operaciones,
+                      repetible=paso_repetible(operaciones))
+    else:
+        for operacion, columnas in operaciones:
+            funcion = eliminar_columnas_paso if operacion == "eliminar_columnas" else OPERACIONES[operacion]
+            ejecutar_paso(cursor, conn, tabla_origen, nombre_paso(operacion, columnas), funcion, *columnas,
+                          repetible=paso_repetible([(operacion, columnas)]))
+
+    #Con todos los pasos terminados la tabla queda terminada en el diario y se reconstruyen los índices
+    if all(diario.paso_terminado(tabla_origen, paso) for paso in pasos_tabla(operaciones)):
+        diario.anotar_tabla_terminada(tabla_origen)
+        if suspender:
+            restaurar_indices(cursor, conn, tabla_origen)
+    else:
+        print(aviso_tabla_con_errores(tabla_origen, operaciones), flush=True)
+    return True
+
+
+def procesar_tabla(cursor, conn, tabla_origen):
+    inicio = time.perf_counter()
+    timestamp_inicio = datetime.now()
+    if anonimizar_tabla(cursor, conn, tabla_origen):
+        fin = time.perf_counter()
+        timestamp_fin = datetime.now()
+        print(f"Tabla {tabla_origen} procesada. Tiempo transcurrido: {fin - inicio:.2f} segundos. Inicio: {timestamp_inicio.strftime('%Y-%m-%d %H:%M:%S')}. Fin: {timestamp_fin.strftime('%Y-%m-%d %H:%M:%S')}", flush=True)
+        resumen = metricas.resumen_tabla(tabla_origen)
+        if resumen:
+            print(f"Tabla {tabla_origen}: {resumen}", flush=True)
+
+
+def procesar_tabla_en_proceso(tabla_origen, argumento=None):
+    #Punto de entrada de cada proceso del pool, con su propia conexión. Los pasos de la tabla leen del diario
+    #desde dónde reanudarse, así que el argumento de la tarea no se usa
+    conn, cursor = conexion()
+    try:
+        procesar_tabla(cursor, conn, tabla_origen)
+    finally:
+        conn.close()
+
+
+def saltar_tabla_terminada(cursor, conn, tabla_origen):
+    #Las tablas terminadas en una ejecución anterior no se repiten
+    if not diario.tabla_terminada(tabla_origen):
+        return False
+    print(f"Saltando tabla {tabla_origen} porque ya fue procesada", flush=True)
+    restaurar_indices(cursor, conn, tabla_origen) #Si la ejecución anterior se interrumpió al reconstruirlos
+    return True
+
+
+def terminar_ejecucion(tablas):
+    #Si todas las tablas con operaciones terminaron, se archiva el diario y la próxima ejecución empieza de cero
+    progreso.informar_progreso(forzar=True)
+    if all(diario.tabla_terminada(tabla) for tabla in tablas):
+        diario.archivar_diario()
+
+
+def main_paralelo(cursor, conn, entradas_plan):
+    #Solo las tablas con operaciones en el plan
+    entradas_plan = [entrada for entrada in entradas_plan if entrada.operaciones]
+    tablas = [entrada.tabla for entrada in entradas_plan]
+
+    #Tablas que no pueden reescribirse a la vez, según migraciones/foreign_keys.sql y el catálogo
+    pares = leer_claves_foraneas(RUTA_CLAVES_FORANEAS) | DIALECTO.obtener_claves_foraneas(cursor)
+    conflictos = construir_conflictos(tablas, pares)
+
+    #Las tablas más costosas primero, según el plan
+    tareas = [(tabla, None) for tabla in tablas if not saltar_tabla_terminada(cursor, conn, tabla)]
+    ejecutar_tablas_en_paralelo(tareas, conflictos, NUM_PROCESOS, procesar_tabla_en_proceso, RUTA_LOGS)
+
+    terminar_ejecucion(tablas)
+
+
+OPERACIONES = {
+    "reordenar_antes_arroba": reordenar_antes_arroba,
+    "reordenar_grupos_ip": reordenar_grupos_ip,
+    "reordenar_columna_en_bloques": reordenar_columna_en_bloques,
+    "reordenar_bloques_columna_en_bloques": reordenar_bloques_columna_en_bloques,
+    "seudonimizar": seudonimizar,
+}
+#Operaciones que transforman cada valor por separado, sin mezclar filas
+TRANSFORMACIONES_VALOR = {
+    "reordenar_antes_arroba": reordenar_locales_email,
+    "reordenar_grupos_ip": reordenar_octetos_ipv4,
+    "seudonimizar": seudonimizar_columna,
+}
+
+
+### MAIN ###
+def leer_argumentos():
+    parser = argparse.ArgumentParser(description="Anonimización de las tablas de tablas.csv")
+    #"procesos": el motor de este módulo, secuencial o con NUM_PROCESOS procesos. "asyncio": motor_asincrono.py,
+    #varias tablas en un solo proceso sobre conexiones asíncronas con consultas en pipeline (solo PostgreSQL)
+    parser.add_argument("--motor", choices=["procesos", "asyncio"], default="procesos")
+    return parser.parse_args()
+
+
+def main():
+    argumentos = leer_argumentos()
+    #Se vacía el log y se abre en modo append para que los procesos paralelos no se pisen las líneas
+    open(RUTA_LOGS, 'w').close()
+    sys.stdout = open(RUTA_LOGS, 'a', encoding='utf-8')
+    if alcance_sin_memoria_acotada():
+        print(f"Error: ALCANCE_REORDENACION={ALCANCE_REORDENACION} carga la tabla o el rango completos en memoria. Solo se admite "
+              f"con MODO_EJECUCION=sql, sin FUSIONAR_OPERACIONES ni REESCRIBIR_TABLAS. Use ALCANCE_REORDENACION=global para "
+              f"reordenar toda la tabla con memoria acotada", flush=True)
+        return
+    if any(operacion == "seudonimizar" for operaciones in leer_plan(RUTA_TABLAS_ANONIMIZABLES).values() for operacion, _ in operaciones):
+        error = comprobar_clave()
+        if error:
+            print(f"Error: {error}. El plan usa seudonimizar; no se ha anonimizado ninguna tabla", flush=True)
+            return
+    conn, cursor = conexion()
+
+    #Lista de tablas a anonimizar, instantánea de su catálogo y plan de ejecución ordenado por coste
+    tablas_anonimizables = obtener_tablas_anonimizables()
+    instantanea = catalogo.cargar_catalogo(DIALECTO, cursor, [tabla for tabla, _ in tablas_anonimizables])
+    conn.commit()
+    entradas_plan = planificar(
+        leer_plan(RUTA_TABLAS_ANONIMIZABLES),
+        {tabla: (entrada["filas"], entrada["tamano"]) for tabla, entrada in instantanea.items()}
+    )
+    imprimir_plan(entradas_plan)
+    diario.reparar_diario()
+    #Trabajo de la ejecución para el progreso: las tablas pendientes por las pasadas de sus operaciones
+    progreso.iniciar_progreso({entrada.tabla: entrada.filas_estimadas * pasadas_tabla(entrada.operaciones)
+                               for entrada in entradas_plan if entrada.operaciones and not diario.tabla_terminada(entrada.tabla)})
+
+    if argumentos.motor == "asyncio":
+        #Se importa aquí para que el motor de procesos no dependa de psycopg 3
+        from motor_asincrono import main_asincrono
+        main_asincrono(cursor, conn, entradas_plan)
+        conn.close()
+        return
+
+    if NUM_PROCESOS > 1:
+        main_paralelo(cursor, conn, entradas_plan)
+        conn.close()
+        return
+
+    for tabla_origen, _ in tablas_anonimizables:
+        #Si la ejecución anterior se interrumpió, las tablas ya terminadas se saltan y el resto de pasos se
+        #reanudan desde su última clave confirmada en el diario
+        if saltar_tabla_terminada(cursor, conn, tabla_origen):
+            continue
+
+        """
+        if tabla_origen == "pruebas_reordenar_bloques_columna_en_bloques":
+            reordenar_bloques_columna_en_bloques(cursor, conn, tabla_origen, clave,
+                                                 *['direccion', 'piso', 'ciudad'])
+        """
+
+        procesar_tabla(cursor, conn, tabla_origen)
+
+    terminar_ejecucion([tabla for tabla, _ in tablas_anonimizables if operaciones_tabla(tabla)])
+    conn.close()
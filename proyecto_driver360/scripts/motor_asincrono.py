@@ -0,0 +1,299 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+
+import diario
+import metricas
+import motor
+from catalogo import CATALOGO, quitar_columnas
+from ejecucion_paralela import construir_conflictos, leer_claves_foraneas
+from metricas import fase, nueva_pagina
+from transformaciones import columnas_de_filas, num_filas, reordenar_pagina_bloque, reordenar_pagina_columnas, transformar_pagina
+
+### MOTOR ASYNCIO CON CONSULTAS EN PIPELINE (POSTGRESQL) ###
+#Alternativa al motor de procesos para cuando la latencia con la base de datos domina (p. ej. el contenedor contra
+#host.docker.internal). Un único proceso con NUM_CONEXIONES_ASINCRONAS conexiones asíncronas de psycopg 3: cada
+#conexión procesa una tabla y varias tablas avanzan a la vez, respetando las claves foráneas igual que NUM_PROCESOS.
+#Cada página se escribe en modo pipeline: BEGIN, un único UPDATE unido a la página pasada como arrays (unnest), COMMIT
+#y la lectura de la página siguiente se envían seguidos y se esperan en una sola ida y vuelta. Se anota en el mismo
+#diario y las mismas métricas que el motor de procesos (la escritura incluye el commit y la lectura de la página siguiente).
+#La transformación de cada página y sus anotaciones (métricas, progreso y diario, con sus fsync) se hacen en hilos
+#con asyncio.to_thread, así el bucle de eventos sigue atendiendo a las demás conexiones mientras tanto.
+#Se elige con "--motor asyncio" en la línea de comandos
+
+NUM_CONEXIONES_ASINCRONAS = int(os.environ.get("NUM_CONEXIONES_ASINCRONAS", 4))
+
+#Operaciones que reordenan páginas y su función de transformación de página (filas, número de columnas de la clave)
+TRANSFORMACIONES_PAGINA = {
+    "reordenar_columna_en_bloques": reordenar_pagina_columnas,
+    "reordenar_bloques_columna_en_bloques": reordenar_pagina_bloque,
+}
+
+#metricas, progreso y diario guardan su estado en variables del módulo pensadas para un solo hilo: las anotaciones
+#de las distintas conexiones se hacen de una en una
+BLOQUEO_ANOTACIONES = threading.Lock()
+
+
+def anotar(funcion, *argumentos):
+    with BLOQUEO_ANOTACIONES:
+        return funcion(*argumentos)
+
+
+async def anotar_en_hilo(funcion, *argumentos):
+    #Anotación fuera del bucle de eventos. asyncio.to_thread copia el contexto, así que el hilo ve el PASO_ACTUAL de la tarea
+    return await asyncio.to_thread(anotar, funcion, *argumentos)
+
+
+def anotar_pagina(tabla_origen, tiempos, filas, bytes_leidos, clave):
+    motor.registrar_pagina(tabla_origen, tiempos, filas, bytes_leidos)
+    motor.guardar_progreso(tabla_origen, clave)
+
+
+def anotar_tabla(tabla_origen, operaciones):
+    #Anota la tabla como terminada si lo están todos sus pasos. Devuelve si ha terminado y el resumen de sus métricas,
+    #o el aviso de la tabla con errores
+    if not all(diario.paso_terminado(tabla_origen, paso) for paso in motor.pasos_tabla(operaciones)):
+        return False, motor.aviso_tabla_con_errores(tabla_origen, operaciones)
+    diario.anotar_tabla_terminada(tabla_origen)
+    return True, metricas.resumen_tabla(tabla_origen)
+
+
+def modos_no_admitidos():
+    #Opciones del motor de procesos que este motor no implementa
+    modos = []
+    if motor.MODO_EJECUCION != "python":
+        modos.append(f"MODO_EJECUCION={motor.MODO_EJECUCION}")
+    if motor.ALCANCE_REORDENACION != "pagina":
+        modos.append(f"ALCANCE_REORDENACION={motor.ALCANCE_REORDENACION}")
+    if motor.REESCRIBIR_TABLAS:
+        modos.append("REESCRIBIR_TABLAS=1")
+    if motor.SUSPENDER_INDICES:
+        modos.append("SUSPENDER_INDICES=1")
+    if motor.NUM_RANGOS > 1:
+        modos.append(f"NUM_RANGOS={motor.NUM_RANGOS}")
+    return modos
+
+
+async def eliminar_columnas(conn, tabla_origen, columnas):
+    for columna in columnas:
+        try:
+            await conn.execute(f"ALTER TABLE {tabla_origen} DROP COLUMN {columna};")
+            quitar_columnas(tabla_origen, [columna])
+        except Exception as e:
+            print(f"Error en tabla {tabla_origen} al eliminar la columna {columna}. Revisar si existía previamente. {e}", flush=True)
+
+
+async def medir_ancho_fila(conn, tabla_origen, columnas_clave, columnas, clave_actual):
+    #Igual que motor.medir_ancho_fila, con la conexión asíncrona
+    consulta, parametros = motor.consulta_pagina(tabla_origen, columnas_clave, clave_actual, motor.FILAS_MUESTRA_ANCHO, columnas=columnas)
+    cursor = await conn.execute(consulta, parametros)
+    ancho_fila = motor.ancho_medio_filas(await cursor.fetchall())
+    if ancho_fila:
+        print(f"Tabla {tabla_origen}: {ancho_fila:.0f} bytes por fila en memoria, páginas de {motor.tam_pagina_efectivo(ancho_fila)} filas", flush=True)
+    return ancho_fila
+
+
+def sentencia_actualizacion(tabla_origen, columnas_clave, columnas, tipos):
+    #UPDATE de toda una página: cada columna (clave incluida) llega como un array del tipo de la columna
+    columnas_pagina = list(columnas_clave) + list(columnas)
+    arrays = ", ".join(f"%s::{tipos[col]}[]" for col in columnas_pagina)
+    set_clause = ", ".join([f"{col} = v.{col}" for col in columnas])
+    where_clause = " AND ".join([f"t.{col} = v.{col}" for col in columnas_clave])
+    return f"UPDATE {tabla_origen} AS t SET {set_clause} FROM unnest({arrays}) AS v({', '.join(columnas_pagina)}) WHERE {where_clause};"
+
+
+async def recorrer_paginas(conn, tabla_origen, columnas_clave, tipos, columnas, clave_inicial, transformar, paginas_fijas=None):
+    #Recorre la tabla por páginas de clave y aplica transformar(filas) -> columnas a escribir (clave + columnas).
+    #Con paginas_fijas las páginas tienen ese tamaño; si no, se ajustan a MEMORIA_PAGINA_MB como en el motor de procesos
+    num_claves = len(columnas_clave)
+    clave_actual = tuple(clave_inicial) if clave_inicial else None
+    clave_confirmada = clave_actual
+    actualizacion = sentencia_actualizacion(tabla_origen, columnas_clave, columnas, tipos)
+
+    try:
+        ancho_fila = None if paginas_fijas else await medir_ancho_fila(conn, tabla_origen, columnas_clave, columnas, clave_actual)
+        tiempos = nueva_pagina()
+        with fase(tiempos, "lectura"):
+            consulta, parametros = motor.consulta_pagina(tabla_origen, columnas_clave, clave_actual,
+                                                         paginas_fijas or motor.tam_pagina_efectivo(ancho_fila), columnas=columnas)
+            lectura = await conn.execute(consulta, parametros)
+            filas = await lectura.fetchall()
+
+        while filas:
+            if not paginas_fijas:
+                ancho_fila = motor.ancho_medio_filas(filas)
+            with fase(tiempos, "transformacion"):
+                valores_a_escribir = await asyncio.to_thread(transformar, filas)
+            clave_actual = tuple(filas[-1][:num_claves])
+
+            #UPDATE de la página, COMMIT y lectura de la página siguiente en una sola ida y vuelta
+            consulta, parametros = motor.consulta_pagina(tabla_origen, columnas_clave, clave_actual,
+                                                         paginas_fijas or motor.tam_pagina_efectivo(ancho_fila), columnas=columnas)
+            with fase(tiempos, "escritura"):
+                async with conn.pipeline():
+                    await conn.execute("BEGIN;")
+                    if num_filas(valores_a_escribir):
+                        await conn.execute(actualizacion, [columna.tolist() for columna in valores_a_escribir])
+                    await conn.execute("COMMIT;")
+                    lectura = await conn.execute(consulta, parametros)
+                siguientes = await lectura.fetchall()
+            clave_confirmada = clave_actual
+            await anotar_en_hilo(anotar_pagina, tabla_origen, tiempos, len(filas), (ancho_fila or 0) * len(filas), clave_confirmada)
+            filas = siguientes
+            tiempos = nueva_pagina()
+
+    except Exception as e:
+        print(f"Error en tabla {tabla_origen} en la clave {clave_confirmada}: {e}", flush=True)
+        #Un error en el pipeline deja la transacción abortada: se descarta la página
+        await conn.rollback()
+        await anotar_en_hilo(motor.guardar_progreso, tabla_origen, clave_confirmada)
+        return False
+
+    await anotar_en_hilo(motor.terminar_paso, tabla_origen)
+    return True
+
+
+async def ejecutar_paso(conn, tabla_origen, columnas_clave, tipos, paso, operacion, columnas):
+    #Mismo comportamiento que motor.ejecutar_paso: el paso se salta si ya terminó y si no se reanuda desde su última clave.
+    #iniciar_paso fija el PASO_ACTUAL de la tarea, así que se llama en el bucle de eventos (una vez por paso)
+    terminado, clave = anotar(motor.iniciar_paso, tabla_origen, paso)
+    if terminado:
+        print(f"Saltando {paso} en {tabla_origen} porque ya terminó", flush=True)
+        return
+    operaciones_paso = columnas if operacion == "fusionada" else [(operacion, columnas)]
+    if not motor.paso_repetible(operaciones_paso) and not await anotar_en_hilo(motor.empezar_paso_no_repetible, tabla_origen, paso):
+        return
+    if clave is not None:
+        print(f"Reanudando {paso} en {tabla_origen} desde la clave {clave}", flush=True)
+
+    if operacion == "eliminar_columnas":
+        await eliminar_columnas(conn, tabla_origen, columnas)
+        await anotar_en_hilo(motor.terminar_paso, tabla_origen)
+        return
+
+    num_claves = len(columnas_clave)
+    invalidos = {}
+    if operacion == "fusionada":
+        #columnas es la lista de operaciones de la tabla: primero se eliminan columnas y después se recorre la tabla
+        for operacion_tabla, columnas_operacion in columnas:
+            if operacion_tabla == "eliminar_columnas":
+                await eliminar_columnas(conn, tabla_origen, columnas_operacion)
+        operaciones = [(op, columnas_operacion) for op, columnas_operacion in columnas if op != "eliminar_columnas"]
+        if not operaciones:
+            await anotar_en_hilo(motor.terminar_paso, tabla_origen)
+            return
+        columnas = list(dict.fromkeys(col for _, columnas_operacion in operaciones for col in columnas_operacion))
+        columnas_pagina = columnas_clave + columnas
+
+        def transformar(filas):
+            valores = dict(zip(columnas_pagina, columnas_de_filas(filas, range(len(columnas_pagina)))))
+            motor.anonimizar_pagina(valores, operaciones, columnas_clave, invalidos)
+            return [valores[col] for col in columnas_pagina]
+        paginas_fijas = None
+    elif operacion in TRANSFORMACIONES_PAGINA:
+        def transformar(filas):
+            return TRANSFORMACIONES_PAGINA[operacion](filas, num_claves)
+        paginas_fijas = None
+    else:
+        #Emails, IPs y seudónimos: lotes de TAM_LOTE filas, y solo se escriben las filas que cambian
+        def transformar(filas):
+            valores_a_escribir, claves, originales, invalidas = transformar_pagina(filas, num_claves, motor.TRANSFORMACIONES_VALOR[operacion])
+            for columna, valores, posiciones_invalidas in zip(columnas, originales, invalidas):
+                motor.registrar_invalidos(invalidos, columna, claves, valores, posiciones_invalidas)
+            return valores_a_escribir
+        paginas_fijas = motor.TAM_LOTE
+
+    await recorrer_paginas(conn, tabla_origen, columnas_clave, tipos, columnas, clave, transformar, paginas_fijas)
+    motor.informar_invalidos(tabla_origen, invalidos)
+
+
+async def procesar_tabla(conn, tabla_origen, columnas_clave, tipos):
+    #Mismo esquema que motor.anonimizar_tabla y motor.procesar_tabla, con un paso del diario por operación
+    #o uno solo con FUSIONAR_OPERACIONES
+    operaciones = motor.operaciones_tabla(tabla_origen)
+    inicio = time.perf_counter()
+    timestamp_inicio = datetime.now()
+    if motor.FUSIONAR_OPERACIONES:
+        await ejecutar_paso(conn, tabla_origen, columnas_clave, tipos, "fusionada", "fusionada", operaciones)
+    else:
+        for operacion, columnas in operaciones:
+            await ejecutar_paso(conn, tabla_origen, columnas_clave, tipos, motor.nombre_paso(operacion, columnas), operacion, columnas)
+
+    terminada, resumen = await anotar_en_hilo(anotar_tabla, tabla_origen, operaciones)
+    if terminada:
+        print(f"Tabla {tabla_origen} procesada. Tiempo transcurrido: {time.perf_counter() - inicio:.2f} segundos. Inicio: {timestamp_inicio.strftime('%Y-%m-%d %H:%M:%S')}. Fin: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", flush=True)
+        if resumen:
+            print(f"Tabla {tabla_origen}: {resumen}", flush=True)
+    else:
+        print(resumen, flush=True)
+
+
+async def trabajador(pendientes, en_curso, conflictos, catalogo, condicion):
+    #Cada trabajador tiene su conexión y toma la primera tabla pendiente sin conflicto con las que están en curso
+    try:
+        conn = await motor.DIALECTO.conectar_asincrono()
+    except Exception as error:
+        print(f"Error de conexión: {error}", flush=True)
+        return
+    try:
+        while True:
+            async with condicion:
+                while True:
+                    if not pendientes:
+                        return
+                    tabla = next((tabla for tabla in pendientes if not conflictos.get(tabla, set()) & en_curso), None)
+                    if tabla is not None:
+                        break
+                    await condicion.wait()
+                pendientes.remove(tabla)
+                en_curso.add(tabla)
+            print(f"Lanzada tabla {tabla} ({len(en_curso)} en curso, {len(pendientes)} pendientes)", flush=True)
+            try:
+                await procesar_tabla(conn, tabla, *catalogo[tabla])
+            except Exception as e:
+                print(f"Error en la tarea de la tabla {tabla}: {e}", flush=True)
+            finally:
+                async with condicion:
+                    en_curso.discard(tabla)
+                    condicion.notify_all()
+    finally:
+        await conn.close()
+
+
+async def ejecutar_tablas(tablas, conflictos, catalogo):
+    pendientes = list(tablas)
+    en_curso = set()
+    condicion = asyncio.Condition()
+    num_conexiones = max(1, min(NUM_CONEXIONES_ASINCRONAS, len(tablas)))
+    await asyncio.gather(*[trabajador(pendientes, en_curso, conflictos, catalogo, condicion) for _ in range(num_conexiones)])
+
+
+def main_asincrono(cursor, conn, entradas_plan):
+    if not hasattr(motor.DIALECTO, "conectar_asincrono"):
+        print(f"El motor asyncio no está disponible para {motor.DIALECTO.nombre}. Use el motor de procesos", flush=True)
+        return
+    modos = modos_no_admitidos()
+    if modos:
+        print(f"El motor asyncio no admite {', '.join(modos)}. Use el motor de procesos", flush=True)
+        return
+
+    entradas_plan = [entrada for entrada in entradas_plan if entrada.operaciones]
+    tablas = [entrada.tabla for entrada in entradas_plan]
+    pares = leer_claves_foraneas(motor.RUTA_CLAVES_FORANEAS) | motor.DIALECTO.obtener_claves_foraneas(cursor)
+    conflictos = construir_conflictos(tablas, pares)
+    #La clave y los tipos de las columnas de cada tabla salen de la instantánea del catálogo (catalogo.py), antes de
+    #arrancar el bucle de eventos
+    pendientes = [tabla for tabla in tablas if not motor.saltar_tabla_terminada(cursor, conn, tabla)]
+    #Las tablas sin clave de fila se recorren por bloques físicos (motor.recorrer_por_bloques) al terminar las demás
+    por_bloques = [tabla for tabla in pendientes if motor.recorrido_por_bloques(cursor, tabla)]
+    pendientes = [tabla for tabla in pendientes if tabla not in por_bloques]
+    catalogo = {tabla: (motor.obtener_columnas_clave(cursor, tabla), dict(CATALOGO[tabla]["tipos"]))
+                for tabla in pendientes}
+    conn.commit()
+
+    asyncio.run(ejecutar_tablas(pendientes, conflictos, catalogo))
+    for tabla in por_bloques:
+        motor.procesar_tabla(cursor, conn, tabla)
+    motor.terminar_ejecucion(tablas)
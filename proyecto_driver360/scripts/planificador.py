@@ -0,0 +1,71 @@
+import csv
+from collections import namedtuple
+from functools import lru_cache
+
+### PLAN DE ANONIMIZACIÓN ###
+
+#Operaciones que se pueden indicar en la columna "operacion" de tablas.csv
+OPERACIONES_VALIDAS = (
+    "eliminar_columnas",
+    "reordenar_antes_arroba",
+    "reordenar_grupos_ip",
+    "reordenar_columna_en_bloques",
+    "reordenar_bloques_columna_en_bloques",
+    "seudonimizar",
+)
+BYTES_POR_FILA_SIN_ESTADISTICAS = 100 #Para estimar filas a partir del tamaño si la tabla no se ha analizado
+
+#Una tabla del plan de ejecución: operaciones en orden de aplicación y coste estimado
+EntradaPlan = namedtuple("EntradaPlan", ["tabla", "orden", "operaciones", "filas_estimadas", "coste"])
+
+
+@lru_cache(maxsize=None)
+def leer_plan(ruta):
+    #Lee tablas.csv (tabla,operacion,columnas) y devuelve un diccionario tabla -> lista de (operación, columnas)
+    #en el orden del fichero. Las columnas van separadas por espacios. Una tabla sin operación queda con lista vacía
+    plan = {}
+    with open(ruta, newline='') as csvfile:
+        for num_linea, fila in enumerate(csv.DictReader(csvfile), start=2):
+            tabla = (fila.get("tabla") or "").strip()
+            if not tabla:
+                continue
+            operaciones = plan.setdefault(tabla, [])
+            operacion = (fila.get("operacion") or "").strip()
+            if not operacion:
+                continue
+            if operacion not in OPERACIONES_VALIDAS:
+                raise ValueError(f"{ruta}:{num_linea}: operación desconocida '{operacion}' para la tabla {tabla}")
+            columnas = (fila.get("columnas") or "").split()
+            if not columnas:
+                raise ValueError(f"{ruta}:{num_linea}: la operación {operacion} de la tabla {tabla} no tiene columnas")
+            operaciones.append((operacion, columnas))
+    return plan
+
+
+def coste_tabla(operaciones, filas_estimadas):
+    #Eliminar columnas solo cambia el catálogo. El resto lee la tabla y reescribe cada fila, con un coste
+    #que crece con el número de columnas que se anonimizan
+    columnas_reescritas = {col for operacion, columnas in operaciones if operacion != "eliminar_columnas" for col in columnas}
+    if not columnas_reescritas:
+        return 0
+    return filas_estimadas * (1 + len(columnas_reescritas))
+
+
+def planificar(plan, estimaciones):
+    #estimaciones: tabla -> (filas estimadas, bytes). Devuelve las entradas del plan de mayor a menor coste
+    entradas = []
+    for orden, (tabla, operaciones) in enumerate(plan.items()):
+        filas, tamano = estimaciones.get(tabla, (0, 0))
+        if filas <= 0 and tamano > 0:
+            filas = tamano // BYTES_POR_FILA_SIN_ESTADISTICAS
+        entradas.append(EntradaPlan(tabla, orden, operaciones, filas, coste_tabla(operaciones, filas)))
+    return sorted(entradas, key=lambda entrada: (entrada.coste, entrada.filas_estimadas), reverse=True)
+
+
+def imprimir_plan(entradas):
+    for entrada in entradas:
+        if not entrada.operaciones:
+            print(f"Aviso: la tabla {entrada.tabla} no tiene operaciones en el plan y no se anonimiza", flush=True)
+            continue
+        resumen = ", ".join(f"{operacion}({len(columnas)})" for operacion, columnas in entrada.operaciones)
+        print(f"Plan: {entrada.tabla} ~{entrada.filas_estimadas} filas, coste {entrada.coste}: {resumen}", flush=True)
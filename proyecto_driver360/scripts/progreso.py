@@ -0,0 +1,120 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import diario
+import metricas
+
+### PROGRESO Y TIEMPO ESTIMADO ###
+#Al arrancar se fija el trabajo de la ejecución: por cada tabla pendiente, sus filas estimadas en el catálogo por las
+#pasadas completas que hará la anonimización. Las filas hechas salen de las páginas confirmadas que todos los procesos
+#anotan en RUTA_METRICAS (metricas.py) con el identificador de esta ejecución. Cada INTERVALO_PROGRESO segundos, el
+#primer proceso que registra una página escribe un informe en el log y lo deja también en RUTA_PROGRESO.
+#Una tabla que se reanuda cuenta desde cero, así que su tiempo estimado es pesimista hasta que termina
+
+RUTA_PROGRESO = os.environ.get("RUTA_PROGRESO", "progreso.txt")
+INTERVALO_PROGRESO = int(os.environ.get("INTERVALO_PROGRESO", 60)) #Segundos entre informes. Con 0 no se informa
+
+#Trabajo de la ejecución, fijado en el proceso principal antes de lanzar los procesos paralelos (que lo heredan)
+OBJETIVO = {"inicio": None, "filas": {}}
+#Filas hechas y momento de la primera y la última página de cada tabla, leídas de RUTA_METRICAS
+AVANCE = {"posicion": 0, "tablas": {}}
+
+
+def iniciar_progreso(filas_por_tabla):
+    #filas_por_tabla: tabla -> filas que se leerán en total (filas estimadas por pasadas)
+    OBJETIVO.update({"inicio": time.time(), "filas": dict(filas_por_tabla)})
+    #Las páginas de ejecuciones anteriores no cuentan: se empieza a leer por el final actual del fichero
+    AVANCE.update({"posicion": os.path.getsize(metricas.RUTA_METRICAS) if os.path.exists(metricas.RUTA_METRICAS) else 0,
+                   "tablas": {}})
+    if os.path.exists(RUTA_PROGRESO):
+        os.remove(RUTA_PROGRESO)
+
+
+def actualizar_avance():
+    #Suma las páginas de esta ejecución anotadas desde la última lectura (por cualquier proceso)
+    if not os.path.exists(metricas.RUTA_METRICAS):
+        return
+    with open(metricas.RUTA_METRICAS, "rb") as f:
+        f.seek(AVANCE["posicion"])
+        contenido = f.read()
+    completo = contenido[:contenido.rfind(b"\n") + 1]
+    for linea in completo.splitlines():
+        registro = json.loads(linea)
+        if registro["ejecucion"] != metricas.EJECUCION:
+            continue
+        momento = datetime.fromisoformat(registro["momento"]).timestamp()
+        avance = AVANCE["tablas"].setdefault(registro["tabla"], {"filas": 0, "primera": momento - registro["segundos"], "ultima": momento})
+        avance["filas"] += registro["filas"]
+        avance["ultima"] = max(avance["ultima"], momento)
+    AVANCE["posicion"] += len(completo)
+
+
+def duracion(segundos):
+    if segundos is None:
+        return "?"
+    segundos = int(segundos)
+    if segundos < 60:
+        return f"{segundos} s"
+    if segundos < 3600:
+        return f"{segundos // 60} min {segundos % 60} s"
+    return f"{segundos // 3600} h {segundos % 3600 // 60} min"
+
+
+def porcentaje(hechas, total):
+    return f"{min(100.0, 100.0 * hechas / total):.1f} %" if total else "-"
+
+
+def informe_progreso():
+    #Líneas del informe: una para toda la ejecución y una por tabla en curso
+    actualizar_avance()
+    ahora = time.time()
+    lineas = []
+    filas_hechas = 0
+    filas_pendientes = 0
+    for tabla, objetivo in OBJETIVO["filas"].items():
+        avance = AVANCE["tablas"].get(tabla)
+        hechas = avance["filas"] if avance else 0
+        filas_hechas += hechas
+        if diario.tabla_terminada(tabla):
+            continue
+        #Las estimaciones del catálogo son aproximadas: una tabla sin terminar nunca tiene menos de 0 filas pendientes
+        pendientes = max(objetivo - hechas, 0)
+        filas_pendientes += pendientes
+        if not avance:
+            continue
+        segundos = max(avance["ultima"] - avance["primera"], 1e-6)
+        velocidad = hechas / segundos
+        eta = pendientes / velocidad if velocidad else None
+        lineas.append(f"  {tabla}: {hechas}/{objetivo} filas ({porcentaje(hechas, objetivo)}), {velocidad:.0f} filas/s, "
+                      f"quedan {duracion(eta)}, última página hace {duracion(ahora - avance['ultima'])}")
+
+    transcurrido = ahora - OBJETIVO["inicio"]
+    velocidad = filas_hechas / transcurrido if transcurrido > 0 else 0
+    eta = filas_pendientes / velocidad if velocidad else None
+    fin = f" (hacia las {(datetime.now() + timedelta(seconds=eta)).strftime('%H:%M')})" if eta is not None else ""
+    total = filas_hechas + filas_pendientes
+    lineas.insert(0, f"Progreso: {filas_hechas}/{total} filas ({porcentaje(filas_hechas, total)}) en {duracion(transcurrido)}, "
+                     f"{velocidad:.0f} filas/s, quedan {duracion(eta)}{fin}")
+    return lineas
+
+
+def escribir_progreso(lineas):
+    #Se escribe aparte y se renombra, así quien lo consulte nunca ve un informe a medias
+    temporal = f"{RUTA_PROGRESO}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+    os.replace(temporal, RUTA_PROGRESO)
+
+
+def informar_progreso(forzar=False):
+    #Se llama después de cada página. La fecha de RUTA_PROGRESO marca el último informe de cualquier proceso
+    if OBJETIVO["inicio"] is None or not INTERVALO_PROGRESO:
+        return
+    ultimo = os.path.getmtime(RUTA_PROGRESO) if os.path.exists(RUTA_PROGRESO) else OBJETIVO["inicio"]
+    if not forzar and time.time() - ultimo < INTERVALO_PROGRESO:
+        return
+    lineas = informe_progreso()
+    escribir_progreso(lineas)
+    print("\n".join(lineas), flush=True)
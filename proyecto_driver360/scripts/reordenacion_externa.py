@@ -0,0 +1,79 @@
+import heapq
+import os
+import pickle
+import shutil
+from operator import itemgetter
+
+import numpy as np
+
+from transformaciones import claves_aleatorias, filas_de_columnas
+
+### REORDENACIÓN DE TODA UNA TABLA CON MEMORIA ACOTADA ###
+#Cada página leída se convierte en un tramo: sus valores se ordenan por claves aleatorias y se vuelcan a disco
+#(claves en un .npy que se lee con mmap, valores en bloques pickle en un .pkl). Mezclar todos los tramos por la
+#clave aleatoria da los valores de toda la tabla en un orden aleatorio uniforme, leyendo solo un bloque por tramo
+
+FILAS_POR_BLOQUE = 10000 #Filas de cada bloque de un tramo; la mezcla tiene en memoria un bloque por tramo
+MARCA_COMPLETO = "completo" #Fichero que indica que la primera pasada (volcado de todos los tramos) ha terminado
+
+
+def ruta_tramo(directorio, grupo, numero):
+    return os.path.join(directorio, f"g{grupo}_t{numero:06d}")
+
+
+def escribir_tramo(ruta, columnas):
+    #Ordena las filas de un grupo de columnas (arrays de objetos de la misma longitud) por claves aleatorias y las vuelca
+    claves = claves_aleatorias(len(columnas[0]))
+    orden = np.argsort(claves)
+    filas = filas_de_columnas([columna[orden] for columna in columnas])
+    with open(ruta + ".pkl", "wb") as f:
+        for inicio in range(0, len(filas), FILAS_POR_BLOQUE):
+            pickle.dump(filas[inicio:inicio + FILAS_POR_BLOQUE], f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    #El .npy se escribe el último: un tramo sin .npy está incompleto y no se usa
+    np.save(ruta + ".npy", claves[orden])
+
+
+def leer_tramo(ruta):
+    #Genera (clave aleatoria, valores) del tramo en orden. El fichero de valores se abre para cada bloque,
+    #así la mezcla no mantiene abierto un descriptor por tramo
+    claves = np.load(ruta + ".npy", mmap_mode="r")
+    posicion = 0
+    inicio = 0
+    while inicio < len(claves):
+        with open(ruta + ".pkl", "rb") as f:
+            f.seek(posicion)
+            bloque = pickle.load(f)
+            posicion = f.tell()
+        yield from zip(claves[inicio:inicio + len(bloque)].tolist(), bloque)
+        inicio += len(bloque)
+
+
+def tramos_grupo(directorio, grupo):
+    prefijo = f"g{grupo}_t"
+    return [os.path.join(directorio, nombre[:-len(".npy")]) for nombre in sorted(os.listdir(directorio))
+            if nombre.startswith(prefijo) and nombre.endswith(".npy")]
+
+
+def mezclar_tramos(rutas):
+    #Valores de todos los tramos en el orden global de las claves aleatorias (mezcla de k vías)
+    return map(itemgetter(1), heapq.merge(*[leer_tramo(ruta) for ruta in rutas], key=itemgetter(0)))
+
+
+def tramos_completos(directorio):
+    return os.path.exists(os.path.join(directorio, MARCA_COMPLETO))
+
+
+def marcar_tramos_completos(directorio):
+    open(os.path.join(directorio, MARCA_COMPLETO), "w").close()
+
+
+def preparar_directorio(directorio):
+    #Descarta los tramos de una primera pasada que no llegó a terminar
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio)
+
+
+def borrar_tramos(directorio):
+    shutil.rmtree(directorio, ignore_errors=True)
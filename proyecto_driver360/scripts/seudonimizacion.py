@@ -0,0 +1,159 @@
+import argparse
+import csv
+import hashlib
+import hmac
+import os
+import sqlite3
+from functools import lru_cache
+
+import numpy as np
+
+from transformaciones import columna_objetos
+
+### SEUDONIMIZACIÓN DETERMINISTA CON CLAVE ###
+#La operación seudonimizar sustituye cada valor por un seudónimo que depende solo del valor y de la clave secreta
+#CLAVE_SEUDONIMIZACION: el mismo valor da el mismo seudónimo en cualquier tabla, proceso o ejecución, así que las
+#columnas que se cruzan entre tablas (matrículas, nombres...) siguen cruzándose después de anonimizar. No se necesita
+#leer la tabla entera ni coordinar procesos.
+#El seudónimo conserva el formato: cada dígito se cambia por un dígito y cada letra por una letra ASCII del mismo caso,
+#según HMAC-SHA256(clave, valor); el resto de caracteres y el dominio de los emails (desde la arroba) se conservan.
+#No es reversible sin la clave, y dos valores distintos pueden coincidir en el mismo seudónimo.
+#Los seudónimos más frecuentes se guardan en una caché LRU de TAM_CACHE_SEUDONIMOS valores por proceso. Con
+#RUTA_DICCIONARIO_SEUDONIMOS, los valores que tienen un sustituto en ese diccionario SQLite (p. ej. un nombre real
+#en lugar de letras al azar) se sustituyen por él. El diccionario solo guarda la huella HMAC de cada valor, nunca el
+#valor original, y se llena con: python scripts/seudonimizacion.py sustitutos.csv (columnas valor,sustituto)
+
+CLAVE_SEUDONIMIZACION = os.environ.get("CLAVE_SEUDONIMIZACION", "")
+TAM_CACHE_SEUDONIMOS = int(os.environ.get("TAM_CACHE_SEUDONIMOS", 100000))
+RUTA_DICCIONARIO_SEUDONIMOS = os.environ.get("RUTA_DICCIONARIO_SEUDONIMOS", "")
+COMPROBACION_CLAVE = "driver360" #Valor cuya huella se guarda en el diccionario para detectar una clave distinta
+
+DIGITOS = "0123456789"
+MINUSCULAS = "abcdefghijklmnopqrstuvwxyz"
+MAYUSCULAS = MINUSCULAS.upper()
+
+#Conexión de solo lectura al diccionario de este proceso. Los procesos hijos abren la suya (no se comparte tras un fork)
+DICCIONARIO = {"pid": None, "conexion": None}
+
+
+def clave_secreta():
+    if not CLAVE_SEUDONIMIZACION:
+        raise ValueError("seudonimizar necesita la clave secreta en la variable de entorno CLAVE_SEUDONIMIZACION")
+    return CLAVE_SEUDONIMIZACION.encode("utf-8")
+
+
+def huella(texto):
+    return hmac.new(clave_secreta(), texto.encode("utf-8"), hashlib.sha256).digest()
+
+
+def abrir_diccionario(ruta, modo="ro"):
+    return sqlite3.connect(f"file:{ruta}?mode={modo}", uri=True, check_same_thread=False)
+
+
+def comprobar_diccionario(conexion, ruta):
+    #La fila de huella vacía guarda la huella de COMPROBACION_CLAVE con la clave con que se creó el diccionario. Un
+    #diccionario con sustitutos y sin esa fila (p. ej. de otra versión) no se puede comprobar y no se usa
+    comprobacion = conexion.execute("SELECT sustituto FROM seudonimos WHERE huella = ?", (b"",)).fetchone()
+    if comprobacion is None:
+        if conexion.execute("SELECT 1 FROM seudonimos LIMIT 1").fetchone():
+            raise ValueError(f"{ruta} no tiene la huella de comprobación y no se sabe con qué CLAVE_SEUDONIMIZACION se creó")
+    elif comprobacion[0] != huella(COMPROBACION_CLAVE).hex():
+        raise ValueError(f"{ruta} se creó con otra CLAVE_SEUDONIMIZACION")
+
+
+def conexion_diccionario():
+    if DICCIONARIO["pid"] != os.getpid():
+        conexion = abrir_diccionario(RUTA_DICCIONARIO_SEUDONIMOS)
+        comprobar_diccionario(conexion, RUTA_DICCIONARIO_SEUDONIMOS)
+        DICCIONARIO.update({"pid": os.getpid(), "conexion": conexion})
+    return DICCIONARIO["conexion"]
+
+
+def sustituto_diccionario(digest):
+    if not RUTA_DICCIONARIO_SEUDONIMOS:
+        return None
+    fila = conexion_diccionario().execute("SELECT sustituto FROM seudonimos WHERE huella = ?", (digest, )).fetchone()
+    return fila[0] if fila else None
+
+
+def comprobar_clave():
+    #Se llama al arrancar si el plan usa seudonimizar, antes de tocar la base de datos: comprueba que hay clave y que
+    #el diccionario, si se usa, se abre y es de esa clave. Devuelve el mensaje de error o None
+    try:
+        clave_secreta()
+        if RUTA_DICCIONARIO_SEUDONIMOS:
+            conexion_diccionario()
+    except (ValueError, sqlite3.Error) as e:
+        return f"{RUTA_DICCIONARIO_SEUDONIMOS}: {e}" if isinstance(e, sqlite3.Error) else str(e)
+    return None
+
+
+def texto_con_formato(texto, digest):
+    #Cambia cada dígito y cada letra (también las acentuadas y la ñ) por uno de su clase elegido con un flujo de bytes
+    #derivado de la huella. Los demás caracteres se conservan
+    flujo = hashlib.shake_256(digest).digest(len(texto))
+    caracteres = []
+    for caracter, byte in zip(texto, flujo):
+        if caracter.isdigit():
+            caracteres.append(DIGITOS[byte % 10])
+        elif caracter.isalpha():
+            caracteres.append((MAYUSCULAS if caracter.isupper() else MINUSCULAS)[byte % 26])
+        else:
+            caracteres.append(caracter)
+    return "".join(caracteres)
+
+
+@lru_cache(maxsize=TAM_CACHE_SEUDONIMOS)
+def seudonimo(texto):
+    digest = huella(texto)
+    sustituto = sustituto_diccionario(digest)
+    if sustituto is not None:
+        return sustituto
+    local, arroba, dominio = texto.partition("@")
+    return texto_con_formato(local, digest) + arroba + dominio
+
+
+def seudonimizar_columna(columna):
+    #Núcleo de la operación seudonimizar, con el mismo contrato que los de transformaciones.py: devuelve la columna
+    #transformada y las posiciones de los valores inválidos (no son texto), que quedan sin cambios.
+    #Los None se conservan y no cuentan como inválidos
+    resultado = columna.copy()
+    es_texto = np.array([type(valor) is str for valor in columna], dtype=bool)
+    invalidos = np.flatnonzero(~es_texto & np.array([valor is not None for valor in columna], dtype=bool))
+    posiciones = np.flatnonzero(es_texto)
+    resultado[posiciones] = columna_objetos([seudonimo(texto) for texto in columna[posiciones].tolist()])
+    return resultado, invalidos
+
+
+def cargar_sustitutos(ruta_csv, ruta_diccionario):
+    #Añade (o reemplaza) en el diccionario los sustitutos de un CSV con columnas valor,sustituto. La huella de
+    #comprobación de la clave solo se escribe en un diccionario nuevo; a uno existente solo se añade con su misma clave
+    conexion = abrir_diccionario(ruta_diccionario, "rwc")
+    try:
+        with conexion, open(ruta_csv, newline="", encoding="utf-8") as f:
+            conexion.execute("CREATE TABLE IF NOT EXISTS seudonimos (huella BLOB PRIMARY KEY, sustituto TEXT NOT NULL) WITHOUT ROWID")
+            comprobar_diccionario(conexion, ruta_diccionario)
+            if conexion.execute("SELECT 1 FROM seudonimos LIMIT 1").fetchone() is None:
+                conexion.execute("INSERT INTO seudonimos VALUES (?, ?)", (b"", huella(COMPROBACION_CLAVE).hex()))
+            filas = [(huella(fila["valor"]), fila["sustituto"]) for fila in csv.DictReader(f)]
+            conexion.executemany("INSERT OR REPLACE INTO seudonimos VALUES (?, ?)", filas)
+    finally:
+        conexion.close()
+    return len(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga sustitutos en el diccionario de seudónimos (RUTA_DICCIONARIO_SEUDONIMOS)")
+    parser.add_argument("csv", help="fichero con columnas valor,sustituto")
+    parser.add_argument("--diccionario", default=RUTA_DICCIONARIO_SEUDONIMOS or "seudonimos.sqlite")
+    argumentos = parser.parse_args()
+    try:
+        cargados = cargar_sustitutos(argumentos.csv, argumentos.diccionario)
+    except ValueError as e:
+        print(f"Error: {e}", flush=True)
+        return
+    print(f"{cargados} sustitutos cargados en {argumentos.diccionario}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import os
+from operator import itemgetter
+
+import numpy as np
+
+### NÚCLEOS DE TRANSFORMACIÓN DE PÁGINAS ###
+#Una página se representa por columnas: un array de NumPy de tipo object por columna, que guarda los mismos objetos
+#de Python que devuelve el driver (None, Decimal, fechas...). Reordenar una columna es una única indexación
+#por una permutación, sin recorrer las filas en Python. Los núcleos devuelven la página a escribir también por columnas
+#(clave seguida de las columnas), que es lo que reciben los escritores: la carga masiva la serializa columna a columna
+
+GENERADOR = np.random.default_rng()
+
+
+def reiniciar_generador():
+    #Los procesos hijos creados con fork heredan el estado del generador: sin reiniciarlo, todos los procesos
+    #paralelos producirían las mismas permutaciones
+    global GENERADOR
+    GENERADOR = np.random.default_rng()
+
+
+os.register_at_fork(after_in_child=reiniciar_generador)
+
+
+def columna_objetos(valores):
+    #Array de objetos de una dimensión aunque los valores sean listas o tuplas (np.array los convertiría en 2D)
+    columna = np.empty(len(valores), dtype=object)
+    columna[:] = valores
+    return columna
+
+
+def columnas_de_filas(filas, indices):
+    #Extrae de una lista de filas (tuplas) las columnas de las posiciones indicadas, calculadas una vez por tabla
+    return [columna_objetos(list(map(itemgetter(i), filas))) for i in indices]
+
+
+def filas_de_columnas(columnas):
+    #Vuelve a la representación por filas (lista de tuplas), para los escritores que trabajan fila a fila
+    return list(zip(*[columna.tolist() for columna in columnas]))
+
+
+def num_filas(columnas):
+    return len(columnas[0]) if columnas else 0
+
+
+def permutar_columnas(columnas):
+    #Cada columna se reordena con su propia permutación
+    return [columna[GENERADOR.permutation(len(columna))] for columna in columnas]
+
+
+def permutar_bloque(columnas):
+    #Una única permutación para todas las columnas, que se mueven juntas
+    if not columnas:
+        return []
+    permutacion = GENERADOR.permutation(len(columnas[0]))
+    return [columna[permutacion] for columna in columnas]
+
+
+def permutar_caracteres(textos):
+    #Reordena los caracteres de cada texto por separado. Los caracteres de todos los textos se concatenan en un único
+    #array de códigos y se ordenan por (texto, clave aleatoria): una sola ordenación para toda la lista
+    if not textos:
+        return []
+    longitudes = np.fromiter(map(len, textos), dtype=np.int64, count=len(textos))
+    codigos = np.frombuffer("".join(textos).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    #Clave entera exacta: texto en los 32 bits altos y número aleatorio en los bajos, así nunca se mezclan textos
+    segmentos = np.repeat(np.arange(len(textos), dtype=np.uint64), longitudes)
+    claves = (segmentos << np.uint64(32)) | GENERADOR.integers(0, 2**32, size=len(codigos), dtype=np.uint64)
+    mezclado = codigos[np.argsort(claves)].tobytes().decode("utf-32-le", "surrogatepass")
+    finales = np.cumsum(longitudes).tolist()
+    return [mezclado[inicio:fin] for inicio, fin in zip([0] + finales[:-1], finales)]
+
+
+def reordenar_locales_email(columna):
+    #Reordena los caracteres a la izquierda de la arroba (todo el valor si no hay arroba) de toda una columna.
+    #Devuelve la columna transformada y las posiciones de los valores inválidos (no son texto), que quedan sin cambios.
+    #Los None se conservan y no cuentan como inválidos
+    resultado = columna.copy()
+    es_texto = np.array([type(valor) is str for valor in columna], dtype=bool)
+    invalidos = np.flatnonzero(~es_texto & np.array([valor is not None for valor in columna], dtype=bool))
+    posiciones = np.flatnonzero(es_texto)
+    partes = [texto.partition("@") for texto in columna[posiciones].tolist()]
+    locales = permutar_caracteres([local for local, _, _ in partes])
+    resultado[posiciones] = columna_objetos([local + arroba + dominio for local, (_, arroba, dominio) in zip(locales, partes)])
+    return resultado, invalidos
+
+
+def reordenar_octetos_ipv4(columna):
+    #Reordena los cuatro grupos de cada IPv4 de una columna con una matriz de claves aleatorias (una fila por IP).
+    #Devuelve la columna transformada y las posiciones de los valores inválidos (sin cuatro grupos), que quedan sin cambios
+    resultado = columna.copy()
+    grupos = [None if valor is None else str(valor).split(".") for valor in columna]
+    invalidos = np.flatnonzero(np.array([g is not None and len(g) != 4 for g in grupos], dtype=bool))
+    posiciones = np.flatnonzero(np.array([g is not None and len(g) == 4 for g in grupos], dtype=bool))
+    if len(posiciones):
+        matriz = np.empty((len(posiciones), 4), dtype=object)
+        matriz[:] = [grupos[i] for i in posiciones.tolist()]
+        orden = np.argsort(GENERADOR.random(matriz.shape), axis=1)
+        mezclado = np.take_along_axis(matriz, orden, axis=1)
+        resultado[posiciones] = columna_objetos(list(map(".".join, mezclado.tolist())))
+    return resultado, invalidos
+
+
+def reordenar_pagina_columnas(filas, num_claves):
+    #Página de reordenar_columna_en_bloques: filas con la clave (num_claves primeros valores) seguida de las columnas.
+    #Devuelve las columnas a escribir (clave y columnas), con cada columna reordenada por su propia permutación
+    indices_columnas = range(num_claves, len(filas[0])) if filas else []
+    claves = columnas_de_filas(filas, range(num_claves))
+    return claves + permutar_columnas(columnas_de_filas(filas, indices_columnas))
+
+
+def reordenar_pagina_bloque(filas, num_claves):
+    #Página de reordenar_bloques_columna_en_bloques: igual que reordenar_pagina_columnas pero con una única
+    #permutación para todas las columnas
+    indices_columnas = range(num_claves, len(filas[0])) if filas else []
+    claves = columnas_de_filas(filas, range(num_claves))
+    return claves + permutar_bloque(columnas_de_filas(filas, indices_columnas))
+
+
+def transformar_pagina(filas, num_claves, transformar):
+    #Lote de reordenar_antes_arroba y reordenar_grupos_ip: aplica transformar (reordenar_locales_email o
+    #reordenar_octetos_ipv4) a cada columna que sigue a la clave. Devuelve las columnas de las filas que han cambiado
+    #(clave + columnas nuevas), las columnas de la clave, las columnas originales y las posiciones inválidas de cada columna
+    indices_columnas = range(num_claves, len(filas[0])) if filas else []
+    claves = columnas_de_filas(filas, range(num_claves))
+    originales = columnas_de_filas(filas, indices_columnas)
+    nuevas = []
+    invalidas = []
+    for valores in originales:
+        transformados, posiciones = transformar(valores)
+        nuevas.append(transformados)
+        invalidas.append(posiciones)
+    return columnas_modificadas(claves, originales, nuevas), claves, originales, invalidas
+
+
+def columnas_modificadas(claves, originales, nuevas):
+    #Columnas (clave + columnas nuevas) de las filas en las que ha cambiado al menos una columna, para no reescribir las demás
+    if not originales:
+        return []
+    cambiadas = np.zeros(len(originales[0]), dtype=bool)
+    for original, nueva in zip(originales, nuevas):
+        cambiadas |= (original != nueva).astype(bool)
+    return [columna[cambiadas] for columna in claves + nuevas]
+
+
+def claves_aleatorias(n):
+    #Claves de ordenación aleatorias de 63 bits: ordenar por ellas equivale a una permutación uniforme
+    return GENERADOR.integers(0, 2**63, size=n, dtype=np.int64)
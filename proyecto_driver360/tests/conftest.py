@@ -0,0 +1,121 @@
+import os
+import sys
+
+import pytest
+
+#Los módulos del motor están en scripts/, igual que cuando se ejecutan los scripts de anonimización
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from dialectos import DialectoMysql, DialectoPostgres
+
+### CONEXIONES Y CURSORES FALSOS ###
+#Registran las sentencias y los volcados COPY en lugar de enviarlos a una base de datos. Las lecturas devuelven las
+#filas preparadas en el test, así los dos dialectos pasan por los mismos casos sin PostgreSQL ni MySQL
+
+
+class CursorFalso:
+    def __init__(self, filas=None, nombre=None):
+        self.sentencias = [] #(sql, parámetros) en orden de ejecución
+        self.copias = [] #(sql, contenido) de cada copy_expert
+        self.filas = list(filas or [])
+        self.nombre = nombre
+        self.itersize = None
+        self.cerrado = False
+
+    def execute(self, sql, parametros=None):
+        self.sentencias.append((sql, parametros))
+
+    def copy_expert(self, sql, buffer):
+        self.copias.append((sql, buffer.read()))
+
+    def fetchmany(self, tam):
+        lote, self.filas = self.filas[:tam], self.filas[tam:]
+        return lote
+
+    def fetchall(self):
+        filas, self.filas = self.filas, []
+        return filas
+
+    def fetchone(self):
+        return self.filas.pop(0) if self.filas else None
+
+    def close(self):
+        self.cerrado = True
+
+
+class ConexionFalsa:
+    def __init__(self, filas=None):
+        self.filas = filas
+        self.cursores = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.cerrada = False
+
+    def cursor(self, name=None, **opciones):
+        cursor = CursorFalso(self.filas, nombre=name)
+        cursor.opciones = opciones
+        self.cursores.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.cerrada = True
+
+
+def leer_copy(contenido):
+    #Inverso de dialectos.valor_copy para el formato texto de COPY: filas de textos, con None para \N
+    escapes = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+    filas = []
+    for linea in contenido.split("\n")[:-1]:
+        fila = []
+        for campo in linea.split("\t"):
+            if campo == "\\N":
+                fila.append(None)
+                continue
+            texto, i = [], 0
+            while i < len(campo):
+                if campo[i] == "\\":
+                    texto.append(escapes[campo[i + 1]])
+                    i += 2
+                else:
+                    texto.append(campo[i])
+                    i += 1
+            fila.append("".join(texto))
+        filas.append(tuple(fila))
+    return filas
+
+
+def filas_cargadas(dialecto, cursor):
+    #Filas que ha cargado cargar_filas, sea cual sea el dialecto: el contenido de los COPY en PostgreSQL y los
+    #parámetros de los INSERT multifila en MySQL (convertidos a texto como los vería COPY)
+    if dialecto.nombre == "postgres":
+        return [fila for _, contenido in cursor.copias for fila in leer_copy(contenido)]
+    filas = []
+    for sql, parametros in cursor.sentencias:
+        if sql.startswith("INSERT INTO"):
+            num_columnas = sql[sql.index("(") + 1:sql.index(")")].count(",") + 1
+            for i in range(0, len(parametros), num_columnas):
+                filas.append(tuple(None if valor is None else str(valor) for valor in parametros[i:i + num_columnas]))
+    return filas
+
+
+@pytest.fixture(params=[DialectoPostgres, DialectoMysql], ids=["postgres", "mysql"])
+def dialecto(request):
+    return request.param()
+
+
+@pytest.fixture
+def cursor():
+    return CursorFalso()
+
+
+@pytest.fixture
+def en_directorio_temporal(tmp_path, monkeypatch):
+    #El diario y los ficheros de trabajo se crean en el directorio de ejecución
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,57 @@
+import pytest
+
+import catalogo
+from catalogo import clave_tabla, tabla_vacia
+
+
+def entrada(**datos):
+    nueva = tabla_vacia()
+    nueva.update(datos)
+    return nueva
+
+
+def test_clave_tabla_primaria():
+    assert clave_tabla(entrada(primaria=["id", "rev_ver"], unicas=[["email"]])) == ["id", "rev_ver"]
+
+
+def test_clave_tabla_unica_mas_corta_sin_nulos():
+    datos = entrada(unicas=[["a", "b"], ["email"], ["dni"]], nulas={"email"})
+    assert clave_tabla(datos) == ["dni"]
+    assert clave_tabla(entrada(unicas=[["a", "b"], ["email"]], nulas={"email"})) == ["a", "b"]
+
+
+def test_clave_tabla_sin_clave():
+    assert clave_tabla(entrada(unicas=[["email"]], nulas={"email"})) is None
+    assert clave_tabla(tabla_vacia()) is None
+
+
+@pytest.fixture
+def catalogo_limpio(monkeypatch):
+    monkeypatch.setattr(catalogo, "CATALOGO", {})
+    return catalogo.CATALOGO
+
+
+def test_quitar_columnas_borra_claves_e_indices(catalogo_limpio):
+    catalogo_limpio["t"] = entrada(columnas=["id", "email", "dni"], tipos={"id": "int", "email": "text", "dni": "text"},
+                                   nulas={"email"}, primaria=["id", "email"], unicas=[["dni"], ["email", "dni"]],
+                                   indices={"t_pkey": ["id", "email"], "t_dni": ["dni"]})
+    catalogo.quitar_columnas("t", ["email"])
+    datos = catalogo_limpio["t"]
+    assert datos["columnas"] == ["id", "dni"]
+    assert "email" not in datos["tipos"] and not datos["nulas"]
+    assert datos["primaria"] is None
+    assert datos["unicas"] == [["dni"]]
+    assert datos["indices"] == {"t_dni": ["dni"]}
+    assert clave_tabla(datos) == ["dni"]
+    catalogo.quitar_columnas("no_existe", ["a"])
+
+
+def test_cargar_catalogo_rellena_las_tablas_pedidas(catalogo_limpio):
+    class DialectoFalso:
+        def leer_catalogo(self, cursor, instantanea):
+            instantanea["t"]["columnas"].append("id")
+
+    catalogo.cargar_catalogo(DialectoFalso(), None, ["t", "otra"])
+    assert catalogo_limpio["t"]["columnas"] == ["id"]
+    assert catalogo_limpio["otra"] == tabla_vacia()
+    assert catalogo.tabla_catalogo(DialectoFalso(), None, "t") is catalogo_limpio["t"]
@@ -0,0 +1,197 @@
+import re
+from datetime import date
+from decimal import Decimal
+
+import dialectos
+import motor
+from conftest import ConexionFalsa, filas_cargadas
+from dialectos import columna_copy, texto_copy_columnas, valor_copy
+from transformaciones import columnas_de_filas
+
+FILAS = [
+    (1, "Ana\tMaría", None),
+    (2, "línea\nnueva\r", Decimal("10.50")),
+    (3, "barra \\ invertida", date(2024, 2, 29)),
+    (4, "", 0),
+]
+
+
+def normalizar(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def sentencias(cursor, prefijo):
+    return [normalizar(sql) for sql, _ in cursor.sentencias if normalizar(sql).startswith(prefijo)]
+
+
+#Carga masiva y aplicación de páginas: los mismos casos en los dos dialectos
+
+def test_cargar_filas_conserva_valores(dialecto, cursor):
+    dialecto.cargar_filas(cursor, "tmp_t", ["id", "nombre", "importe"], FILAS)
+    esperadas = [tuple(None if valor is None else str(valor) for valor in fila) for fila in FILAS]
+    assert filas_cargadas(dialecto, cursor) == esperadas
+
+
+def test_cargar_filas_sin_filas(dialecto, cursor):
+    dialecto.cargar_filas(cursor, "tmp_t", ["id", "nombre"], [])
+    assert filas_cargadas(dialecto, cursor) == []
+
+
+def test_cargar_columnas_igual_que_cargar_filas(dialecto, cursor):
+    dialecto.cargar_columnas(cursor, "tmp_t", ["id", "nombre", "importe"], columnas_de_filas(FILAS, range(3)))
+    esperadas = [tuple(None if valor is None else str(valor) for valor in fila) for fila in FILAS]
+    assert filas_cargadas(dialecto, cursor) == esperadas
+
+
+def test_aplicar_pagina_une_por_la_clave(dialecto, cursor):
+    valores = columnas_de_filas([(1, 1, "a", "b"), (1, 2, "c", "d")], range(4))
+    dialecto.aplicar_pagina(cursor, "cor_users_aud", ["id", "rev_ver"], ["name", "email"], valores)
+    assert filas_cargadas(dialecto, cursor) == [("1", "1", "a", "b"), ("1", "2", "c", "d")]
+    [creacion] = [sql for sql in map(normalizar, (s for s, _ in cursor.sentencias)) if "CREATE TEMP" in sql]
+    assert "SELECT id, rev_ver, name, email FROM cor_users_aud" in creacion
+    [actualizacion] = sentencias(cursor, "UPDATE")
+    assert "t.id = tmp.id AND t.rev_ver = tmp.rev_ver" in actualizacion
+    assert re.search(r"SET t?\.?name = tmp\.name, t?\.?email = tmp\.email", actualizacion)
+
+
+def test_aplicar_pagina_carga_en_la_tabla_temporal(dialecto, cursor):
+    dialecto.aplicar_pagina(cursor, "cor_users", ["id"], ["name"], columnas_de_filas([(1, "a")], range(2)))
+    destinos = [sql for sql, _ in cursor.copias] + [sql for sql in sentencias(cursor, "INSERT INTO")]
+    assert destinos and all("tmp_cor_users (id, name)" in sql for sql in destinos)
+
+
+def test_valor_copy_escapa_y_marca_nulos():
+    assert valor_copy(None) == "\\N"
+    assert valor_copy("a\tb\nc\rd\\e") == "a\\tb\\nc\\rd\\\\e"
+    assert valor_copy(b"\x00\xff") == "\\\\x00ff"
+    assert valor_copy({"a": [1, 2]}) == '{"a": [1, 2]}'
+    assert valor_copy(Decimal("1.10")) == "1.10"
+
+
+def test_texto_copy_columnas_igual_que_por_filas():
+    filas = FILAS + [(5, None, "x\x00y"), (6, "\\N", True), (7, "ñ", [1, "a\tb"]), (None, "\t", b"\x01")]
+    por_filas = "".join("\t".join(map(valor_copy, fila)) + "\n" for fila in filas)
+    assert texto_copy_columnas(columnas_de_filas(filas, range(3))) == por_filas
+    assert texto_copy_columnas(columnas_de_filas([], range(3))) == ""
+    assert columna_copy([None, "a\\b", None]) == ["\\N", "a\\\\b", "\\N"]
+    assert columna_copy([1, None, 3]) == ["1", "\\N", "3"]
+    assert columna_copy([]) == []
+    assert columna_copy(["a\x00b", "c\td"]) == ["a\x00b", "c\\td"]
+    assert columna_copy([date(2024, 1, 31), None]) == ["2024-01-31", "\\N"]
+    assert columna_copy([Decimal("1.10"), 2.5, True]) == ["1.10", "2.5", "True"]
+    assert columna_copy(["a", b"\x01", None]) == ["a", "\\\\x01", "\\N"]
+
+
+def test_cargar_filas_mysql_por_lotes(cursor, monkeypatch):
+    monkeypatch.setattr(dialectos, "FILAS_POR_INSERT", 2)
+    dialecto = dialectos.DialectoMysql()
+    filas = [(i, f"v{i}") for i in range(5)]
+    dialecto.cargar_filas(cursor, "tmp_t", ["id", "v"], filas)
+    assert [len(parametros) for _, parametros in cursor.sentencias] == [4, 4, 2]
+    assert filas_cargadas(dialecto, cursor) == [(str(i), f"v{i}") for i in range(5)]
+
+
+#Permutación en el servidor
+
+def test_sentencia_permutacion_un_grupo_por_permutacion(dialecto):
+    grupos = [["name"], ["email", "ip"]]
+    sql, parametros = dialecto.sentencia_permutacion("cor_users", ["id"], grupos, ["id > %s"], [10])
+    sql = normalizar(sql)
+    assert sql.startswith("WITH pagina") or sql.startswith("UPDATE cor_users")
+    #Cada grupo se ordena al azar por separado y sus columnas salen de la misma permutación
+    assert len(re.findall(r"ORDER BY (random|RAND)\(\)", sql)) == len(grupos)
+    assert re.search(r"name = perm_0\.name", sql)
+    assert re.search(r"email = perm_1\.email, t?\.?ip = perm_1\.ip", sql)
+    assert sql.count("%s") == len(parametros)
+    assert set(parametros) == {10}
+
+
+def test_sentencia_permutacion_sin_condiciones(dialecto):
+    sql, parametros = dialecto.sentencia_permutacion("t", ["id", "rev_ver"], [["a", "b"]], [], [])
+    assert parametros == []
+    assert "%s" not in sql
+    assert "ORDER BY id ASC, rev_ver ASC" in normalizar(sql)
+
+
+#Lectura en streaming
+
+def test_sentencias_indices_postgres_una_por_indice():
+    indices = [["t_a", "CREATE INDEX t_a ON t (a)", ["a"]], ["t_b", "CREATE INDEX t_b ON t (b)", ["b"]]]
+    assert dialectos.DialectoPostgres().sentencias_indices("t", indices) == [
+        (["t_a"], "CREATE INDEX t_a ON t (a)"), (["t_b"], "CREATE INDEX t_b ON t (b)")]
+
+
+def test_sentencias_indices_mysql_un_alter_por_tabla():
+    #Los ALTER TABLE de una misma tabla se esperan entre sí por el bloqueo de metadatos: van todos juntos
+    indices = [["t_a", "ADD INDEX t_a (a)", ["a"]], ["t_b", "ADD UNIQUE INDEX t_b (b(10))", ["b"]]]
+    assert dialectos.DialectoMysql().sentencias_indices("t", indices) == [
+        (["t_a", "t_b"], "ALTER TABLE t ADD INDEX t_a (a), ADD UNIQUE INDEX t_b (b(10)), ALGORITHM=INPLACE, LOCK=NONE;")]
+    assert dialectos.DialectoMysql().sentencias_indices("t", []) == []
+
+
+def test_leer_en_lotes_usa_una_conexion_propia(dialecto, monkeypatch):
+    filas = [(i, f"v{i}") for i in range(7)]
+    lectura = ConexionFalsa(filas)
+    monkeypatch.setattr(dialecto, "conectar", lambda *args, **kwargs: (lectura, lectura.cursor()))
+    principal = ConexionFalsa()
+    lotes = list(dialecto.leer_en_lotes(principal, "streaming_t", "SELECT id, v FROM t", [], 3))
+    assert lotes == [filas[:3], filas[3:6], filas[6:]]
+    assert lectura.cerrada
+    assert principal.cursores == [] and principal.commits == 0
+
+
+def test_leer_en_lotes_cierra_la_conexion_al_abandonar(dialecto, monkeypatch):
+    lectura = ConexionFalsa([(i, ) for i in range(10)])
+    monkeypatch.setattr(dialecto, "conectar", lambda *args, **kwargs: (lectura, lectura.cursor()))
+    lotes = dialecto.leer_en_lotes(ConexionFalsa(), "streaming_t", "SELECT id FROM t", [], 4)
+    assert next(lotes) == [(0, ), (1, ), (2, ), (3, )]
+    lotes.close()
+    assert lectura.cerrada
+
+
+def test_leer_en_lotes_postgres_cursor_con_nombre_sin_hold(monkeypatch):
+    dialecto = dialectos.DialectoPostgres()
+    lectura = ConexionFalsa([(1, )])
+    monkeypatch.setattr(dialecto, "conectar", lambda: (lectura, None))
+    list(dialecto.leer_en_lotes(ConexionFalsa(), "streaming_t", "SELECT id FROM t", [], 100))
+    [cursor_servidor] = lectura.cursores
+    assert cursor_servidor.nombre == "streaming_t"
+    assert cursor_servidor.itersize == 100
+    assert not cursor_servidor.opciones.get("withhold")
+
+
+#Paginación por clave (keyset)
+
+def test_consulta_pagina_primera_pagina():
+    sql, parametros = motor.consulta_pagina("cor_users_aud", ["id", "rev_ver"], None, 500, columnas=["name"])
+    assert sql == "SELECT id, rev_ver, name FROM cor_users_aud ORDER BY id ASC, rev_ver ASC LIMIT %s;"
+    assert parametros == [500]
+
+
+def test_consulta_pagina_sigue_tras_la_ultima_clave():
+    sql, parametros = motor.consulta_pagina("cor_users_aud", ["id", "rev_ver"], (7, 2), 500, columnas=["name"])
+    assert "WHERE (id, rev_ver) > (%s, %s)" in sql
+    assert "OFFSET" not in sql
+    assert parametros == [7, 2, 500]
+
+
+def test_consulta_pagina_dentro_de_un_rango():
+    sql, parametros = motor.consulta_pagina("t", ["id"], (150, ), None, rango=(100, 200), columnas=[])
+    assert sql == "SELECT id FROM t WHERE id > %s AND id <= %s AND (id) > (%s) ORDER BY id ASC;"
+    assert parametros == [100, 200, 150]
+
+
+def test_consulta_pagina_recorre_toda_la_tabla():
+    #Simula el recorrido: cada página empieza después de la última clave de la anterior y no se repite ninguna fila
+    tabla = sorted((i // 3, i % 3, f"v{i}") for i in range(20))
+    clave, leidas = None, []
+    while True:
+        sql, parametros = motor.consulta_pagina("t", ["id", "rev_ver"], clave, 6, columnas=["v"])
+        limite = parametros[-1]
+        desde = tuple(parametros[:2]) if clave is not None else None
+        pagina = [fila for fila in tabla if desde is None or fila[:2] > desde][:limite]
+        if not pagina:
+            break
+        leidas.extend(pagina)
+        clave = pagina[-1][:2]
+    assert leidas == tabla
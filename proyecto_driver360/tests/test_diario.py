@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import diario
+
+
+@pytest.fixture(autouse=True)
+def diario_limpio(en_directorio_temporal):
+    diario.reiniciar_estado()
+    yield
+    diario.reiniciar_estado()
+
+
+def lineas():
+    with open(diario.ARCHIVO_DIARIO, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f]
+
+
+def test_reproduce_progreso_pasos_y_tablas():
+    diario.anotar_progreso("t", "reordenar(a)", "", (10, 1))
+    diario.anotar_progreso("t", "reordenar(a)", "", (20, 3))
+    diario.anotar_progreso("t", "reordenar(a)", "r1", (5, ))
+    diario.anotar_rangos("t", "reordenar(a)", [[None, 5], [5, None]])
+    diario.anotar_paso_terminado("t", "eliminar(b)")
+    diario.anotar_paso_iniciado("t", "seudonimizar(c)")
+    assert diario.paso_iniciado("t", "seudonimizar(c)")
+    assert not diario.paso_iniciado("t", "reordenar(a)")
+    assert diario.clave_paso("t", "reordenar(a)") == [20, 3]
+    assert diario.clave_paso("t", "reordenar(a)", "r1") == [5]
+    assert diario.clave_paso("t", "otro") is None
+    assert diario.rangos_paso("t", "reordenar(a)") == [[None, 5], [5, None]]
+    assert diario.paso_terminado("t", "eliminar(b)")
+    assert not diario.paso_terminado("t", "reordenar(a)")
+    assert not diario.tabla_terminada("t")
+    diario.anotar_tabla_terminada("t")
+    assert diario.tabla_terminada("t")
+
+
+def test_lee_solo_las_lineas_nuevas_de_otros_procesos():
+    diario.anotar_progreso("t", "p", "", (1, ))
+    assert diario.clave_paso("t", "p") == [1]
+    #Otro proceso anexa una línea: se aplica sin releer el fichero entero
+    with open(diario.ARCHIVO_DIARIO, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"tipo": "progreso", "tabla": "t", "paso": "p", "ambito": "", "clave": [2]}) + "\n")
+    assert diario.clave_paso("t", "p") == [2]
+
+
+def test_ignora_la_linea_cortada_hasta_que_se_completa():
+    diario.anotar_progreso("t", "p", "", (1, ))
+    linea = json.dumps({"tipo": "progreso", "tabla": "t", "paso": "p", "ambito": "", "clave": [2]})
+    with open(diario.ARCHIVO_DIARIO, "a", encoding="utf-8") as f:
+        f.write(linea[:15])
+    assert diario.clave_paso("t", "p") == [1]
+    with open(diario.ARCHIVO_DIARIO, "a", encoding="utf-8") as f:
+        f.write(linea[15:] + "\n")
+    assert diario.clave_paso("t", "p") == [2]
+
+
+def test_reparar_diario_descarta_el_registro_incompleto(capsys):
+    diario.anotar_paso_terminado("t", "p")
+    with open(diario.ARCHIVO_DIARIO, "a", encoding="utf-8") as f:
+        f.write('{"tipo": "tab')
+    diario.reparar_diario()
+    assert "registro incompleto" in capsys.readouterr().out
+    diario.anotar_tabla_terminada("t")
+    assert [registro["tipo"] for registro in lineas()] == ["paso", "tabla"]
+    assert diario.tabla_terminada("t")
+
+
+def test_reparar_diario_sin_cambios():
+    diario.reparar_diario() #Sin diario no hace nada
+    diario.anotar_paso_terminado("t", "p")
+    antes = open(diario.ARCHIVO_DIARIO, "rb").read()
+    diario.reparar_diario()
+    assert open(diario.ARCHIVO_DIARIO, "rb").read() == antes
+
+
+def test_archivar_diario_empieza_de_cero(en_directorio_temporal):
+    diario.anotar_tabla_terminada("t")
+    assert diario.tabla_terminada("t")
+    diario.archivar_diario()
+    assert not diario.tabla_terminada("t")
+    assert len(list(en_directorio_temporal.glob("diario_*.jsonl"))) == 1
+    #Un diario nuevo en el mismo nombre se lee desde el principio
+    diario.anotar_progreso("t", "p", "", (3, ))
+    assert diario.clave_paso("t", "p") == [3]
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+import diario
+import metricas
+import motor
+import motor_asincrono
+import progreso
+
+
+@pytest.fixture(autouse=True)
+def diario_limpio(en_directorio_temporal, monkeypatch):
+    monkeypatch.setattr(metricas, "TOTALES", {})
+    monkeypatch.setattr(metricas, "DIRECTORIO_PROMETHEUS", "")
+    monkeypatch.setattr(progreso, "OBJETIVO", {"inicio": None, "filas": {}})
+    diario.reiniciar_estado()
+    yield
+    diario.reiniciar_estado()
+
+
+def test_las_anotaciones_en_hilos_usan_el_paso_de_cada_tarea():
+    #Varias tareas a la vez, cada una con su paso: las anotaciones hechas en hilos caen en el paso de su tarea
+    async def tarea(tabla):
+        terminado, clave = motor_asincrono.anotar(motor.iniciar_paso, tabla, "reordenar(a)")
+        assert not terminado and clave is None
+        for i in range(1, 21):
+            await motor_asincrono.anotar_en_hilo(motor_asincrono.anotar_pagina, tabla, metricas.nueva_pagina(), 10, 0, (i, ))
+        await motor_asincrono.anotar_en_hilo(motor.terminar_paso, tabla)
+
+    async def todas():
+        await asyncio.gather(*[tarea(f"t{i}") for i in range(4)])
+
+    asyncio.run(todas())
+    for i in range(4):
+        assert diario.clave_paso(f"t{i}", "reordenar(a)") == [20]
+        assert diario.paso_terminado(f"t{i}", "reordenar(a)")
+        assert metricas.TOTALES[(f"t{i}", "reordenar(a)", "")]["filas"] == 200
@@ -0,0 +1,61 @@
+import pytest
+
+from planificador import coste_tabla, leer_plan, planificar
+
+
+def escribir_plan(tmp_path, contenido, nombre="tablas.csv"):
+    ruta = tmp_path / nombre
+    ruta.write_text("tabla,operacion,columnas\n" + contenido, encoding="utf-8")
+    return str(ruta)
+
+
+def test_leer_plan_agrupa_las_operaciones_en_orden(tmp_path):
+    ruta = escribir_plan(tmp_path, (
+        "cor_users,eliminar_columnas,password\n"
+        "cor_users,reordenar_antes_arroba,email\n"
+        "cor_users,reordenar_columna_en_bloques, name  surname \n"
+        "cor_vacia,,\n"
+        ",,\n"
+    ))
+    assert leer_plan(ruta) == {
+        "cor_users": [("eliminar_columnas", ["password"]), ("reordenar_antes_arroba", ["email"]),
+                      ("reordenar_columna_en_bloques", ["name", "surname"])],
+        "cor_vacia": [],
+    }
+
+
+def test_leer_plan_rechaza_operaciones_desconocidas(tmp_path):
+    ruta = escribir_plan(tmp_path, "cor_users,cifrar,email\n")
+    with pytest.raises(ValueError, match=r":2: operación desconocida 'cifrar'"):
+        leer_plan(ruta)
+
+
+def test_leer_plan_rechaza_operaciones_sin_columnas(tmp_path):
+    ruta = escribir_plan(tmp_path, "cor_users,reordenar_grupos_ip,ip\ncor_users,reordenar_grupos_ip,\n")
+    with pytest.raises(ValueError, match=r":3: .* no tiene columnas"):
+        leer_plan(ruta)
+
+
+def test_tablas_csv_del_proyecto_es_valido():
+    import motor
+    plan = leer_plan(motor.RUTA_TABLAS_ANONIMIZABLES)
+    assert plan and any(operaciones for operaciones in plan.values())
+
+
+def test_coste_tabla():
+    assert coste_tabla([("eliminar_columnas", ["a"])], 1000) == 0
+    assert coste_tabla([("reordenar_columna_en_bloques", ["a", "b"]), ("reordenar_antes_arroba", ["b"])], 1000) == 3000
+
+
+def test_planificar_ordena_por_coste():
+    plan = {
+        "pequena": [("reordenar_columna_en_bloques", ["a"])],
+        "grande": [("reordenar_columna_en_bloques", ["a"])],
+        "sin_estadisticas": [("reordenar_columna_en_bloques", ["a", "b"])],
+        "solo_eliminar": [("eliminar_columnas", ["a"])],
+    }
+    estimaciones = {"pequena": (10, 0), "grande": (1000, 0), "sin_estadisticas": (0, 50000)}
+    entradas = planificar(plan, estimaciones)
+    assert [entrada.tabla for entrada in entradas] == ["grande", "sin_estadisticas", "pequena", "solo_eliminar"]
+    assert entradas[1].filas_estimadas == 500 #Sin reltuples se estima por el tamaño
+    assert [entrada.orden for entrada in entradas] == [1, 2, 0, 3]
@@ -0,0 +1,114 @@
+import pytest
+
+import diario
+import motor
+import seudonimizacion
+from transformaciones import columna_objetos
+
+
+@pytest.fixture(autouse=True)
+def clave(monkeypatch):
+    #La caché guarda seudónimos de la clave con que se calcularon: se vacía al cambiar la clave o el diccionario
+    monkeypatch.setattr(seudonimizacion, "CLAVE_SEUDONIMIZACION", "clave de prueba")
+    monkeypatch.setattr(seudonimizacion, "RUTA_DICCIONARIO_SEUDONIMOS", "")
+    monkeypatch.setattr(seudonimizacion, "DICCIONARIO", {"pid": None, "conexion": None})
+    seudonimizacion.seudonimo.cache_clear()
+    yield
+    seudonimizacion.seudonimo.cache_clear()
+
+
+def test_el_mismo_valor_da_el_mismo_seudonimo():
+    columna = columna_objetos(["1234ABC", "ana.lopez@correo.es", "1234ABC", None, 7])
+    resultado, invalidos = seudonimizacion.seudonimizar_columna(columna)
+    assert resultado[0] == resultado[2] != "1234ABC"
+    assert resultado[3] is None and resultado[4] == 7
+    assert invalidos.tolist() == [4]
+    assert columna[0] == "1234ABC" #La columna original no se modifica
+
+
+def test_el_seudonimo_conserva_el_formato():
+    texto = seudonimizacion.seudonimo("Matrícula 1234-ÑBC")
+    assert len(texto) == len("Matrícula 1234-ÑBC")
+    assert texto[0].isupper() and texto[9] == " " and texto[14] == "-"
+    assert texto[10:14].isdigit() and texto[15:].isupper()
+    local, dominio = seudonimizacion.seudonimo("ana.lopez@correo.es").split("@")
+    assert dominio == "correo.es" and local[3] == "."
+
+
+def test_otra_clave_da_otro_seudonimo(monkeypatch):
+    antes = seudonimizacion.seudonimo("1234ABC")
+    monkeypatch.setattr(seudonimizacion, "CLAVE_SEUDONIMIZACION", "otra clave")
+    seudonimizacion.seudonimo.cache_clear()
+    assert seudonimizacion.seudonimo("1234ABC") != antes
+
+
+def test_sin_clave_falla(monkeypatch):
+    monkeypatch.setattr(seudonimizacion, "CLAVE_SEUDONIMIZACION", "")
+    with pytest.raises(ValueError, match="CLAVE_SEUDONIMIZACION"):
+        seudonimizacion.seudonimo("1234ABC")
+
+
+def test_diccionario_de_sustitutos(tmp_path, monkeypatch):
+    (tmp_path / "sustitutos.csv").write_text("valor,sustituto\nAna López,Marta Ruiz\n", encoding="utf-8")
+    ruta = str(tmp_path / "seudonimos.sqlite")
+    assert seudonimizacion.cargar_sustitutos(str(tmp_path / "sustitutos.csv"), ruta) == 1
+    monkeypatch.setattr(seudonimizacion, "RUTA_DICCIONARIO_SEUDONIMOS", ruta)
+    assert seudonimizacion.seudonimo("Ana López") == "Marta Ruiz"
+    assert seudonimizacion.seudonimo("Luis Gil") != "Luis Gil"
+    #El diccionario no guarda los valores originales
+    contenido = seudonimizacion.abrir_diccionario(ruta).execute("SELECT sustituto FROM seudonimos").fetchall()
+    assert ("Ana López", ) not in contenido
+
+
+def test_diccionario_de_otra_clave(tmp_path, monkeypatch):
+    (tmp_path / "sustitutos.csv").write_text("valor,sustituto\nAna López,Marta Ruiz\n", encoding="utf-8")
+    ruta = str(tmp_path / "seudonimos.sqlite")
+    seudonimizacion.cargar_sustitutos(str(tmp_path / "sustitutos.csv"), ruta)
+    monkeypatch.setattr(seudonimizacion, "CLAVE_SEUDONIMIZACION", "otra clave")
+    monkeypatch.setattr(seudonimizacion, "RUTA_DICCIONARIO_SEUDONIMOS", ruta)
+    with pytest.raises(ValueError, match="otra CLAVE_SEUDONIMIZACION"):
+        seudonimizacion.seudonimo("Ana López")
+    #Tampoco se añaden sustitutos con otra clave, ni se cambia la huella de comprobación
+    with pytest.raises(ValueError, match="otra CLAVE_SEUDONIMIZACION"):
+        seudonimizacion.cargar_sustitutos(str(tmp_path / "sustitutos.csv"), ruta)
+
+
+def test_diccionario_sin_huella_de_comprobacion(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "seudonimos.sqlite")
+    conexion = seudonimizacion.abrir_diccionario(ruta, "rwc")
+    with conexion:
+        conexion.execute("CREATE TABLE seudonimos (huella BLOB PRIMARY KEY, sustituto TEXT NOT NULL) WITHOUT ROWID")
+        conexion.execute("INSERT INTO seudonimos VALUES (?, ?)", (seudonimizacion.huella("Ana López"), "Marta Ruiz"))
+    conexion.close()
+    monkeypatch.setattr(seudonimizacion, "RUTA_DICCIONARIO_SEUDONIMOS", ruta)
+    assert "no tiene la huella de comprobación" in seudonimizacion.comprobar_clave()
+
+
+def test_comprobar_clave(tmp_path, monkeypatch):
+    assert seudonimizacion.comprobar_clave() is None
+    monkeypatch.setattr(seudonimizacion, "RUTA_DICCIONARIO_SEUDONIMOS", str(tmp_path / "no_existe.sqlite"))
+    assert "no_existe.sqlite" in seudonimizacion.comprobar_clave()
+    monkeypatch.setattr(seudonimizacion, "CLAVE_SEUDONIMIZACION", "")
+    assert "CLAVE_SEUDONIMIZACION" in seudonimizacion.comprobar_clave()
+
+
+def test_seudonimizar_en_el_sitio_no_se_reanuda(en_directorio_temporal, monkeypatch, capsys):
+    #Un paso que seudonimiza en el sitio y ya empezó no se vuelve a ejecutar: su último lote podría repetirse
+    monkeypatch.setattr(motor, "REESCRIBIR_TABLAS", False)
+    diario.reiniciar_estado()
+    llamadas = []
+
+    def paso(cursor, conn, tabla_origen, clave, *columnas):
+        llamadas.append(clave)
+        motor.guardar_progreso(tabla_origen, (10, ))
+
+    repetible = motor.paso_repetible([("seudonimizar", ["matricula"])])
+    assert not repetible and motor.paso_repetible([("reordenar_grupos_ip", ["ip"])])
+    motor.ejecutar_paso(None, None, "t", "seudonimizar(matricula)", paso, "matricula", repetible=repetible)
+    motor.ejecutar_paso(None, None, "t", "seudonimizar(matricula)", paso, "matricula", repetible=repetible)
+    assert llamadas == [None]
+    assert "No se reanuda" in capsys.readouterr().out
+    #La reescritura lee de la tabla original y puede reanudarse
+    monkeypatch.setattr(motor, "REESCRIBIR_TABLAS", True)
+    assert motor.paso_repetible([("seudonimizar", ["matricula"])])
+    diario.reiniciar_estado()
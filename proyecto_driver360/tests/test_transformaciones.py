@@ -0,0 +1,102 @@
+from collections import Counter
+
+import numpy as np
+
+from transformaciones import (columna_objetos, columnas_de_filas, columnas_modificadas, filas_de_columnas, num_filas,
+                              permutar_bloque, permutar_caracteres, permutar_columnas, reordenar_locales_email,
+                              reordenar_octetos_ipv4, reordenar_pagina_bloque, reordenar_pagina_columnas, transformar_pagina)
+
+FILAS = [(i, f"nombre{i}", f"apellido{i}", None if i % 7 == 0 else i * 10) for i in range(200)]
+
+
+def test_columna_objetos_no_convierte_listas_en_2d():
+    columna = columna_objetos([[1, 2], (3, 4), None])
+    assert columna.shape == (3, )
+    assert columna[0] == [1, 2]
+
+
+def test_columnas_y_filas_ida_y_vuelta():
+    columnas = columnas_de_filas(FILAS, range(4))
+    assert all(columna.dtype == object for columna in columnas)
+    assert filas_de_columnas(columnas) == FILAS
+
+
+def test_permutar_columnas_conserva_cada_columna():
+    columnas = columnas_de_filas(FILAS, range(1, 4))
+    for original, permutada in zip(columnas, permutar_columnas(columnas)):
+        assert Counter(original.tolist()) == Counter(permutada.tolist())
+
+
+def test_permutar_bloque_mueve_las_columnas_juntas():
+    columnas = columnas_de_filas(FILAS, range(1, 3))
+    nombres, apellidos = permutar_bloque(columnas)
+    assert sorted(nombres.tolist()) == sorted(columnas[0].tolist())
+    assert all(nombre[6:] == apellido[8:] for nombre, apellido in zip(nombres, apellidos))
+    assert permutar_bloque([]) == []
+
+
+def test_reordenar_pagina_columnas_conserva_la_clave():
+    columnas = reordenar_pagina_columnas(FILAS, 1)
+    assert len(columnas) == 4 and all(columna.dtype == object for columna in columnas)
+    reordenadas = filas_de_columnas(columnas)
+    assert [fila[0] for fila in reordenadas] == [fila[0] for fila in FILAS]
+    for i in range(1, 4):
+        assert Counter(fila[i] for fila in reordenadas) == Counter(fila[i] for fila in FILAS)
+    assert num_filas(reordenar_pagina_columnas([], 1)) == 0
+
+
+def test_reordenar_pagina_bloque_conserva_las_tuplas_de_columnas():
+    reordenadas = filas_de_columnas(reordenar_pagina_bloque(FILAS, 1))
+    assert [fila[0] for fila in reordenadas] == [fila[0] for fila in FILAS]
+    assert Counter(fila[1:] for fila in reordenadas) == Counter(fila[1:] for fila in FILAS)
+
+
+def test_permutar_caracteres_conserva_los_caracteres_de_cada_texto():
+    textos = ["maría.núñez", "", "a", "😀x😀y", "abcabc"]
+    for original, mezclado in zip(textos, permutar_caracteres(textos)):
+        assert sorted(original) == sorted(mezclado)
+    assert permutar_caracteres([]) == []
+
+
+def test_reordenar_locales_email():
+    columna = columna_objetos(["ana.lopez@ejemplo.es", None, 42, "sin_arroba", "a@b@c"])
+    resultado, invalidos = reordenar_locales_email(columna)
+    assert invalidos.tolist() == [2]
+    assert resultado[1] is None and resultado[2] == 42
+    local, arroba, dominio = resultado[0].partition("@")
+    assert dominio == "ejemplo.es" and sorted(local) == sorted("ana.lopez")
+    assert sorted(resultado[3]) == sorted("sin_arroba")
+    assert resultado[4].endswith("@b@c")
+    assert columna[0] == "ana.lopez@ejemplo.es" #La columna original no se modifica
+
+
+def test_reordenar_octetos_ipv4():
+    columna = columna_objetos(["10.20.30.40", "bad", None, "1.2.3"])
+    resultado, invalidos = reordenar_octetos_ipv4(columna)
+    assert invalidos.tolist() == [1, 3]
+    assert sorted(resultado[0].split(".")) == ["10", "20", "30", "40"]
+    assert resultado[1:].tolist() == ["bad", None, "1.2.3"]
+
+
+def test_columnas_modificadas_solo_las_filas_que_cambian():
+    claves = [columna_objetos([1, 2, 3])]
+    originales = [columna_objetos(["a", "b", "c"]), columna_objetos(["x", None, "z"])]
+    nuevas = [columna_objetos(["a", "B", "c"]), columna_objetos(["x", None, "Z"])]
+    assert filas_de_columnas(columnas_modificadas(claves, originales, nuevas)) == [(2, "B", None), (3, "c", "Z")]
+    assert columnas_modificadas(claves, [], []) == []
+
+
+def test_transformar_pagina():
+    filas = [(1, "ana@x.es", "1.2.3.4"), (2, 7, "bad"), (3, None, None)]
+
+    def mayusculas(columna):
+        es_texto = np.array([type(valor) is str for valor in columna], dtype=bool)
+        resultado = columna.copy()
+        resultado[es_texto] = columna_objetos([valor.upper() for valor in columna[es_texto]])
+        return resultado, np.flatnonzero(~es_texto & np.array([valor is not None for valor in columna], dtype=bool))
+
+    valores_a_escribir, claves, originales, invalidas = transformar_pagina(filas, 1, mayusculas)
+    assert filas_de_columnas(valores_a_escribir) == [(1, "ANA@X.ES", "1.2.3.4"), (2, 7, "BAD")]
+    assert claves[0].tolist() == [1, 2, 3]
+    assert originales[0].tolist() == ["ana@x.es", 7, None]
+    assert [posiciones.tolist() for posiciones in invalidas] == [[1], []]